@@ -1,13 +1,18 @@
-import pandas as pd
+import numpy as np
 
-df = pd.read_csv("logs/trade_log.csv")
-df["timestamp"] = pd.to_datetime(df["timestamp"])
+from analysis.performance import closed_columns, group_stats
+from logs.journal import read_columns
+
+signals = read_columns("trades", columns=["ml_decision"])
 
 # Separate filtered trades
-executed = df[df["ml_decision"] == 1]
-skipped = df[df["ml_decision"] == 0]
+executed = int(np.count_nonzero(signals["ml_decision"] == 1))
+skipped = int(np.count_nonzero(signals["ml_decision"] == 0))
 
-print(f"✅ Executed trades: {len(executed)}")
-print(f"❌ Skipped trades (ML said no): {len(skipped)}")
+print(f"✅ Executed trades: {executed}")
+print(f"❌ Skipped trades (ML said no): {skipped}")
 
-# Optional: You can evaluate % win/loss once you add the `label` column again
+# === Closed trades: win rate / expectancy / drawdown by strategy ===
+closed = closed_columns()
+if len(closed["pnl"]):
+    print(group_stats(closed, ["strategy"]).to_string(float_format=lambda v: f"{v:.2f}"))
@@ -0,0 +1,287 @@
+"""
+Trade performance analytics over the closed-position journal.
+
+    python -m analysis.performance                          # book by strategy, ML decision, hour, regime
+    python -m analysis.performance --by strategy hour       # ad-hoc group-by
+    python -m analysis.performance --by symbol --since 2025-07-01
+
+PerformanceBook keeps running aggregates (PnL, win rate, expectancy,
+profit factor, drawdown, MAE/MFE) overall and per value of each
+dimension, updated in O(1) per closed trade; the live bot's book is fed
+by execution/position_tracker.py. group_stats answers any group-by over
+journal columns with vectorised scans (hashing / bincount / reduceat),
+never a Python loop over rows.
+"""
+import argparse
+import math
+import threading
+
+import numpy as np
+import pandas as pd
+
+from logs.journal import read_columns
+
+DIMENSIONS = ("strategy", "ml_decision", "hour", "regime")
+STATS = ("trades", "win_rate", "pnl", "expectancy", "avg_win", "avg_loss", "profit_factor",
+         "max_drawdown", "mae", "mfe")
+
+
+class Aggregate:
+    """Running performance of one group of trades, in close order. O(1) per trade."""
+
+    __slots__ = ("count", "wins", "pnl", "gross_win", "gross_loss", "equity", "peak", "max_drawdown",
+                 "mae_sum", "mfe_sum", "excursions")
+
+    def __init__(self):
+        self.count = self.wins = self.excursions = 0
+        self.pnl = self.gross_win = self.gross_loss = 0.0
+        self.equity = self.peak = self.max_drawdown = 0.0
+        self.mae_sum = self.mfe_sum = 0.0
+
+    def add(self, pnl, mae=math.nan, mfe=math.nan):
+        self.count += 1
+        self.pnl += pnl
+        if pnl > 0:
+            self.wins += 1
+            self.gross_win += pnl
+        else:
+            self.gross_loss -= pnl
+        self.equity += pnl
+        self.peak = max(self.peak, self.equity)
+        self.max_drawdown = max(self.max_drawdown, self.peak - self.equity)
+        if not (math.isnan(mae) or math.isnan(mfe)):
+            self.excursions += 1
+            self.mae_sum += mae
+            self.mfe_sum += mfe
+
+    def stats(self):
+        n = self.count
+        losses = n - self.wins
+        return {
+            "trades": n,
+            "win_rate": self.wins / n if n else math.nan,
+            "pnl": self.pnl,
+            "expectancy": self.pnl / n if n else math.nan,
+            "avg_win": self.gross_win / self.wins if self.wins else math.nan,
+            "avg_loss": -self.gross_loss / losses if losses else math.nan,
+            "profit_factor": self.gross_win / self.gross_loss if self.gross_loss else math.nan,
+            "max_drawdown": self.max_drawdown,
+            "mae": self.mae_sum / self.excursions if self.excursions else math.nan,
+            "mfe": self.mfe_sum / self.excursions if self.excursions else math.nan,
+        }
+
+
+# === Columnar scans ===
+def dimension(columns, name):
+    """Key column of a dimension; `hour` is the entry hour (broker time) from open_time."""
+    if name == "hour":
+        return (columns["open_time"] // 3_600_000) % 24
+    return columns[name]
+
+
+def _factorize(values):
+    """(uniques, codes) of a key column. Fixed-width strings are hashed by 8-byte words, then checked."""
+    values = np.asarray(values)
+    if values.dtype.kind == "S" and values.dtype.itemsize % 8 == 0 and len(values):
+        words = values.view("<u8").reshape(len(values), -1)
+        hashed = words[:, 0].copy()
+        for i in range(1, words.shape[1]):
+            hashed *= np.uint64(0x100000001B3)
+            hashed ^= words[:, i]
+        codes, _ = pd.factorize(hashed)
+        seen = np.maximum.accumulate(codes)  # codes are numbered in order of first appearance
+        first = np.flatnonzero(np.r_[True, seen[1:] > seen[:-1]])
+        if (words == words[first][codes]).all():
+            return np.char.decode(values[first], "utf-8", "ignore"), codes
+    codes, uniques = pd.factorize(values)
+    if values.dtype.kind == "S":
+        uniques = np.char.decode(np.asarray(uniques, dtype=values.dtype), "utf-8", "ignore")
+    return np.asarray(uniques), codes
+
+
+def _scan(columns, by):
+    """Group keys and the Aggregate fields of every group, as arrays (one element per group)."""
+    n = len(columns["pnl"])
+    codes, keys = np.zeros(n, dtype=np.int64), []
+    for name in by:
+        uniques, inverse = _factorize(dimension(columns, name))
+        codes = codes * len(uniques) + inverse
+        keys.append(uniques)
+    g, groups = pd.factorize(codes)
+    size = len(groups)
+
+    # Each group's key per dimension, from its combined code
+    key_columns, rest = [], groups
+    for uniques in reversed(keys):
+        key_columns.append(uniques[rest % len(uniques)])
+        rest = rest // len(uniques)
+    key_columns.reverse()
+
+    pnl = np.asarray(columns["pnl"], dtype=np.float64)
+    win = pnl > 0
+    mae = np.asarray(columns.get("mae", np.full(n, np.nan)), dtype=np.float64)
+    mfe = np.asarray(columns.get("mfe", np.full(n, np.nan)), dtype=np.float64)
+    seen = ~(np.isnan(mae) | np.isnan(mfe))
+
+    fields = {
+        "count": np.bincount(g, minlength=size),
+        "wins": np.bincount(g, weights=win, minlength=size).astype(np.int64),
+        "pnl": np.bincount(g, weights=pnl, minlength=size),
+        "gross_win": np.bincount(g, weights=np.where(win, pnl, 0.0), minlength=size),
+        "gross_loss": -np.bincount(g, weights=np.where(win, 0.0, pnl), minlength=size),
+        "excursions": np.bincount(g, weights=seen, minlength=size).astype(np.int64),
+        "mae_sum": np.bincount(g, weights=np.where(seen, mae, 0.0), minlength=size),
+        "mfe_sum": np.bincount(g, weights=np.where(seen, mfe, 0.0), minlength=size),
+    }
+
+    # === Drawdown: per-group equity curves in one pass over the rows sorted by group ===
+    # Stable (close order kept inside each group); a radix sort when the codes fit in 16 bits
+    order = np.argsort(g.astype(np.int16) if size < 1 << 15 else g, kind="stable")
+    gs, p = g[order], pnl[order]
+    starts = np.flatnonzero(np.r_[True, gs[1:] != gs[:-1]]) if n else np.zeros(0, dtype=np.int64)
+    equity = np.cumsum(p)
+    equity -= np.repeat(equity[starts] - p[starts], np.diff(np.r_[starts, n]))
+    # Running max restarted per group: lift each group above all the previous ones
+    span = (equity.max() - equity.min() + 1.0) if n else 1.0
+    lift = gs * span
+    peak = np.maximum(np.maximum.accumulate(equity + lift) - lift, 0.0)
+    fields["max_drawdown"] = np.maximum.reduceat(peak - equity, starts) if n else np.zeros(0)
+    ends = np.r_[starts[1:], n] - 1
+    fields["equity"] = equity[ends] if n else np.zeros(0)
+    fields["peak"] = peak[ends] if n else np.zeros(0)
+    return key_columns, fields
+
+
+def group_stats(columns, by=("strategy",)):
+    """DataFrame of STATS per combination of the `by` dimensions (journal columns or "hour")."""
+    by = [by] if isinstance(by, str) else list(by)
+    if not len(columns["pnl"]):
+        return pd.DataFrame(columns=list(STATS), index=pd.MultiIndex.from_arrays([[]] * len(by), names=by))
+    keys, f = _scan(columns, by)
+    count, wins = f["count"], f["wins"]
+    losses = count - wins
+    with np.errstate(divide="ignore", invalid="ignore"):
+        out = pd.DataFrame({
+            "trades": count,
+            "win_rate": wins / count,
+            "pnl": f["pnl"],
+            "expectancy": f["pnl"] / count,
+            "avg_win": np.where(wins > 0, f["gross_win"] / wins, np.nan),
+            "avg_loss": np.where(losses > 0, -f["gross_loss"] / losses, np.nan),
+            "profit_factor": np.where(f["gross_loss"] > 0, f["gross_win"] / f["gross_loss"], np.nan),
+            "max_drawdown": f["max_drawdown"],
+            "mae": np.where(f["excursions"] > 0, f["mae_sum"] / f["excursions"], np.nan),
+            "mfe": np.where(f["excursions"] > 0, f["mfe_sum"] / f["excursions"], np.nan),
+        }, index=pd.MultiIndex.from_arrays(keys, names=by) if len(by) > 1 else pd.Index(keys[0], name=by[0]))
+    return out.sort_index()
+
+
+def closed_columns(root=None, since=None, symbol=None):
+    """Columns of the closed-position journal, optionally from `since` (exit time) / for one symbol."""
+    columns = read_columns("closed") if root is None else read_columns("closed", root)
+    keep = np.ones(len(columns["pnl"]), dtype=bool)
+    if since is not None:
+        keep &= columns["timestamp"] >= int(pd.Timestamp(since).timestamp() * 1000)
+    if symbol is not None:
+        keep &= columns["symbol"] == symbol.encode()
+    return columns if keep.all() else {name: values[keep] for name, values in columns.items()}
+
+
+# === Running book ===
+class PerformanceBook:
+    """Aggregate overall and per value of every dimension; thread-safe, O(dimensions) per trade."""
+
+    def __init__(self, dimensions=DIMENSIONS):
+        self.dimensions = tuple(dimensions)
+        self.total = Aggregate()
+        self.groups = {name: {} for name in self.dimensions}
+        self._lock = threading.Lock()
+
+    def add(self, trade):
+        """One closed trade: a dict (or journal record) with pnl, mae, mfe, open_time and the dimensions."""
+        pnl = float(trade["pnl"])
+        mae, mfe = float(trade.get("mae", math.nan)), float(trade.get("mfe", math.nan))
+        with self._lock:
+            self.total.add(pnl, mae, mfe)
+            for name in self.dimensions:
+                key = (int(trade["open_time"]) // 3_600_000) % 24 if name == "hour" else trade[name]
+                if isinstance(key, bytes):
+                    key = key.decode("utf-8", "ignore")
+                group = self.groups[name].get(key)
+                if group is None:
+                    group = self.groups[name][key] = Aggregate()
+                group.add(pnl, mae, mfe)
+
+    @classmethod
+    def from_columns(cls, columns, dimensions=DIMENSIONS):
+        """Book as if every journal row had been added in order (vectorised)."""
+        book = cls(dimensions)
+        if not len(columns["pnl"]):
+            return book
+        columns = dict(columns, _all=np.zeros(len(columns["pnl"]), dtype=np.int8))
+        for name, target in [("_all", None)] + [(name, book.groups[name]) for name in book.dimensions]:
+            (keys,), fields = _scan(columns, [name])
+            for i, key in enumerate(keys):
+                agg = Aggregate()
+                for field, values in fields.items():
+                    setattr(agg, field, values[i].item())
+                if target is None:
+                    book.total = agg
+                else:
+                    target[key.item() if hasattr(key, "item") else key] = agg
+        return book
+
+    def table(self, name):
+        with self._lock:
+            rows = {key: agg.stats() for key, agg in self.groups[name].items()}
+        return pd.DataFrame.from_dict(rows, orient="index", columns=list(STATS)).rename_axis(name).sort_index()
+
+    def report(self):
+        """Overall line, then one table per dimension."""
+        with self._lock:
+            total = self.total.stats()
+        lines = ["📊 " + _line(total)]
+        for name in self.dimensions:
+            lines.append(f"— by {name}")
+            table = self.table(name)
+            lines.extend(f"  {key}: {_line(row)}" for key, row in table.iterrows())
+        return "\n".join(lines)
+
+
+def _line(stats):
+    return (f"{int(stats['trades'])} trades | win {stats['win_rate']:.0%} | PnL {stats['pnl']:.2f} | "
+            f"exp {stats['expectancy']:.2f} | PF {stats['profit_factor']:.2f} | maxDD {stats['max_drawdown']:.2f} | "
+            f"MAE/MFE {stats['mae']:.2f}/{stats['mfe']:.2f}") if stats["trades"] else "no trades"
+
+
+_book = None
+_book_lock = threading.Lock()
+
+
+def get_book():
+    """Process-wide PerformanceBook, seeded from the closed journal on first use."""
+    global _book
+    if _book is None:
+        with _book_lock:
+            if _book is None:
+                _book = PerformanceBook.from_columns(closed_columns())
+    return _book
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Performance of closed trades from the journal")
+    parser.add_argument("--by", nargs="+", help=f"group-by dimensions (journal columns or hour); default: {DIMENSIONS}")
+    parser.add_argument("--since", help="only trades closed from this date")
+    parser.add_argument("--symbol")
+    parser.add_argument("--root", help="journal root (default logs/journal)")
+    args = parser.parse_args()
+
+    columns = closed_columns(args.root, args.since, args.symbol)
+    if args.by:
+        print(group_stats(columns, args.by).to_string(float_format=lambda v: f"{v:.2f}"))
+    else:
+        print(PerformanceBook.from_columns(columns).report())
+
+
+if __name__ == "__main__":
+    main()
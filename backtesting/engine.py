@@ -0,0 +1,380 @@
+import time
+from bisect import bisect_left
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass
+
+import numpy as np
+import pandas as pd
+from numpy.lib.stride_tricks import sliding_window_view
+
+from indicators.macd import macd_array
+from indicators.rsi import rsi_array
+from indicators.streaming import IndicatorEngine
+from indicators.trailing_stop import calculate_trailing_stop
+from models.garch_model import garch_path
+from models.hmm_model import regime_path
+from strategies.ensemble import combine_signals_array, entry_features, should_exit
+from utils.risk import calculate_lot_size
+
+# Same window manage_open_positions reads (snapshot.bars.tail(100))
+EXIT_WINDOW = 100
+
+# When open positions get the trailing stop / ML exit check:
+#   "bar"   - at every bar open, gates or not (live: Pipeline.on_exit runs between bar closes)
+#   "gated" - only in cycles that pass the vol/regime gates (the bot before the intra-bar exit loop)
+EXIT_CADENCES = ("bar", "gated")
+
+
+@dataclass
+class BacktestResult:
+    ledger: pd.DataFrame   # one row per closed trade
+    equity: pd.DataFrame   # time, balance, equity, open_positions per bar
+    timings: dict          # seconds per phase
+
+    def summary(self):
+        return summarize(self.ledger, self.equity)
+
+
+# === Walk-forward model state (each stream only ever sees bars <= i) ===
+def _indicator_path(bars, warmup, indicator_params=None):
+    engine = IndicatorEngine(**(indicator_params or {}))
+    n = len(bars)
+    cols = ["rsi2", "rsi14", "macd_line", "macd_signal", "macd_hist", "bb_upper", "bb_lower", "obv", "atr"]
+    values = {col: np.full(n, np.nan) for col in cols}
+    signals = np.zeros((n, 3), dtype=np.int8)  # rsi2, macd_bb, structure
+
+    engine.seed(bars.iloc[:warmup - 1])
+    rows = zip(bars["time"].to_numpy(), bars["open"].to_numpy(), bars["high"].to_numpy(),
+               bars["low"].to_numpy(), bars["close"].to_numpy(), bars["tick_volume"].to_numpy())
+    for i, row in enumerate(rows):
+        if i < warmup - 1:
+            continue
+        last = engine.update(*row)
+        for col in cols:
+            values[col][i] = last[col]
+        signals[i] = last["signal"], last["signal_macd_bb"], last["signal_structure"]
+    return values, signals
+
+
+def walk_forward(bars, warmup=1000, refit_every=96, workers=3, indicator_params=None):
+    """
+    Per-bar model outputs as of each bar's close: GARCH vol, HMM regime and
+    dominant state, indicator values and strategy signals. GARCH and HMM run
+    in worker processes next to the indicator stream when workers > 1.
+    """
+    closes = bars["close"].to_numpy(dtype=float)
+    if workers > 1:
+        with ProcessPoolExecutor(max_workers=2) as pool:
+            garch_job = pool.submit(garch_path, closes, warmup, refit_every)
+            regime_job = pool.submit(regime_path, closes, warmup, refit_every)
+            values, signals = _indicator_path(bars, warmup, indicator_params)
+            vol = garch_job.result()
+            regime, dominant = regime_job.result()
+    else:
+        vol = garch_path(closes, warmup, refit_every)
+        regime, dominant = regime_path(closes, warmup, refit_every)
+        values, signals = _indicator_path(bars, warmup, indicator_params)
+    return vol, regime, dominant, values, signals
+
+
+def exit_features(bars, decisions):
+    """
+    Exit-model inputs for cycles run as bar i + 1 opens, for each i in `decisions`.
+    Like the live snapshot, the window is the last EXIT_WINDOW - 1 closed bars
+    plus the just-opened bar, whose only price so far is its open.
+    """
+    closes = bars["close"].to_numpy(dtype=float)
+    opens = bars["open"].to_numpy(dtype=float)
+    decisions = np.asarray(decisions)
+    windows = sliding_window_view(closes, EXIT_WINDOW - 1)  # row j = closes[j : j + 99]
+
+    rsi = np.empty(len(decisions))
+    macd = np.empty(len(decisions))
+    signal = np.empty(len(decisions))
+    for lo in range(0, len(decisions), 4096):
+        idx = decisions[lo:lo + 4096]
+        # (EXIT_WINDOW, m): one column per cycle, time on axis 0
+        window = np.vstack([windows[idx - (EXIT_WINDOW - 2)].T, opens[idx + 1]])
+        rsi[lo:lo + len(idx)] = rsi_array(window, 14)[-1]
+        macd_line, macd_signal, _ = macd_array(window)
+        macd[lo:lo + len(idx)] = macd_line[-1]
+        signal[lo:lo + len(idx)] = macd_signal[-1]
+
+    return pd.DataFrame({
+        "rsi": rsi,
+        "macd": macd,
+        "macd_signal": signal,
+        "body_ratio": 0.0,  # open == close on a bar that has just opened
+        "trend_strength": (opens[decisions + 1] - closes[decisions - 8]) / 10,
+    })
+
+
+# === Fills ===
+def _intrabar_exit(direction, o, h, l, c, sl, tp, spread):
+    """
+    (price, reason) if SL/TP is hit inside the bar, else None. The bid follows
+    O -> L -> H -> C on up bars and O -> H -> L -> C otherwise (as in the
+    sim broker); sells trigger on the ask (bid + spread).
+    """
+    low_first = c >= o  # path of the bid, before any spread shift
+    if direction == -1:
+        o, h, l = o + spread, h + spread, l + spread
+    sl_hit = sl > 0 and (l <= sl if direction == 1 else h >= sl)
+    tp_hit = tp > 0 and (h >= tp if direction == 1 else l <= tp)
+    if not (sl_hit or tp_hit):
+        return None
+
+    # Gap through a level at the open: filled at the open
+    if sl > 0 and (o <= sl if direction == 1 else o >= sl):
+        return o, "SL"
+    if tp > 0 and (o >= tp if direction == 1 else o <= tp):
+        return o, "TP"
+
+    adverse_first = low_first if direction == 1 else not low_first
+    if sl_hit and (adverse_first or not tp_hit):
+        return sl, "SL"
+    return tp, "TP"
+
+
+def simulate(bars, decisions, entries, p_win, balance=10_000.0, sl=150, tp=300, risk_percent=1.0,
+             spread_points=20, slippage_points=0, point=0.01, contract_size=100.0, trailing_distance=100,
+             stop_drawdown=None):
+    """
+    Replay main.py's cycle over the bars (DataFrame or dict of arrays).
+    `decisions` are the closed-bar indices whose cycle passed the
+    volatility/regime gates, `entries` maps decision index -> (signal,
+    strategy) after the ML filter, `p_win` maps closed-bar index ->
+    (p_win, macd, macd_signal, rsi) for every cycle that runs the exit check
+    (see exit_checks). A cycle for bar i runs as bar i + 1 opens.
+
+    Stretches without open positions are skipped up to the next entry. With
+    `stop_drawdown` (e.g. 0.5) the run stops, flattening at the close, once
+    equity falls that far below its peak; the equity curve then ends there.
+    """
+    times = np.asarray(bars["time"])
+    n = len(times)
+    spreads = np.asarray(bars["spread"], dtype=float) * point if "spread" in bars else np.zeros(n)
+    spreads = np.where(spreads > 0, spreads, spread_points * point).tolist()
+    # Python floats: scalar access in the per-bar loop is much cheaper than on ndarrays
+    o, h, l, c = (np.asarray(bars[col], dtype=float).tolist() for col in ("open", "high", "low", "close"))
+    slip = slippage_points * point
+
+    gated = set(int(i) for i in decisions)
+    opens_at = sorted(i + 1 for i in entries)  # bars whose open cycle places a trade
+
+    positions = []  # [ticket, direction, entry, volume, sl, tp, entry_time, strategy, initial_sl, initial_tp]
+    ledger = []
+    equity = np.empty(n)
+    balances = np.empty(n)
+    open_counts = np.zeros(n, dtype=np.int32)
+    ticket = 0
+    peak = balance
+
+    def close(pos, price, reason, at):
+        nonlocal balance
+        pnl = (price - pos[2]) * pos[1] * pos[3] * contract_size
+        balance += pnl
+        ledger.append({
+            "ticket": pos[0], "direction": "BUY" if pos[1] == 1 else "SELL", "strategy": pos[7],
+            "entry_time": pos[6], "entry_price": pos[2], "volume": pos[3],
+            "sl": pos[8], "tp": pos[9], "final_sl": pos[4],
+            "exit_time": at, "exit_price": price, "reason": reason,
+            "pnl": pnl, "balance": balance,
+        })
+
+    first = min(gated) + 1 if gated else n
+    end = n
+    k = first
+    while k < n:
+        if not positions:
+            # Flat: nothing can happen before the next cycle that opens a trade
+            j = bisect_left(opens_at, k)
+            nk = opens_at[j] if j < len(opens_at) else n
+            balances[k:nk] = equity[k:nk] = balance
+            k = nk
+            if k >= n:
+                break
+
+        i = k - 1  # the cycle at bar k's open decides on closed bar i
+        bid, ask = o[k], o[k] + spreads[k]
+
+        account_balance = balance  # snapshot.account, taken before this cycle's orders
+
+        # === manage_open_positions (positions from before this cycle's entry) ===
+        exit_check = p_win.get(i)
+        if exit_check is not None and positions:
+            prob, macd_now, signal_now, rsi_now = exit_check
+            survivors = []
+            for pos in positions:
+                new_sl = calculate_trailing_stop(pos[2], bid, pos[1], distance=trailing_distance)
+                if new_sl and (pos[4] == 0 or (new_sl > pos[4] if pos[1] == 1 else new_sl < pos[4])):
+                    pos[4] = new_sl
+                if should_exit(pos[1], prob, rsi_now, macd_now, signal_now):
+                    close(pos, bid - slip if pos[1] == 1 else ask + slip, "ML Exit", times[k])
+                else:
+                    survivors.append(pos)
+            positions = survivors
+
+        # === open_trade (gated cycles only) ===
+        if i in gated:
+            if i in entries:
+                signal, strategy = entries[i]
+                lot = round(calculate_lot_size(account_balance, sl, risk_percent), 2)
+                if lot > 0:
+                    price = ask + slip if signal == 1 else bid - slip
+                    ticket += 1
+                    sl_price = round(price - sl * point if signal == 1 else price + sl * point, 2)
+                    tp_price = round(price + tp * point if signal == 1 else price - tp * point, 2)
+                    positions.append([ticket, signal, price, lot, sl_price, tp_price, times[k], strategy,
+                                      sl_price, tp_price])
+
+        # === Broker-side SL/TP during bar k ===
+        if positions:
+            survivors = []
+            for pos in positions:
+                hit = _intrabar_exit(pos[1], o[k], h[k], l[k], c[k], pos[4], pos[5], spreads[k])
+                if hit is None:
+                    survivors.append(pos)
+                    continue
+                price, reason = hit
+                if reason == "SL":
+                    price = price - slip if pos[1] == 1 else price + slip
+                close(pos, price, reason, times[k])
+            positions = survivors
+
+        # === Mark to market at bar k's close ===
+        unrealized = sum(
+            ((c[k] if pos[1] == 1 else c[k] + spreads[k]) - pos[2]) * pos[1] * pos[3] * contract_size
+            for pos in positions
+        )
+        value = balance + unrealized
+        balances[k] = balance
+        equity[k] = value
+        open_counts[k] = len(positions)
+
+        peak = max(peak, value)
+        if stop_drawdown is not None and value < peak * (1 - stop_drawdown):
+            end = k + 1
+            break
+        k += 1
+
+    last = end - 1
+    for pos in positions:
+        price = c[last] if pos[1] == 1 else c[last] + spreads[last]
+        close(pos, price, "Stopped" if end < n else "End", times[last])
+    if first < end:
+        balances[last] = equity[last] = balance
+        open_counts[last] = 0
+
+    equity_df = pd.DataFrame({
+        "time": times[first:end], "balance": balances[first:end], "equity": equity[first:end],
+        "open_positions": open_counts[first:end],
+    })
+    return pd.DataFrame(ledger), equity_df
+
+
+def gate_decisions(vol, regime, dominant, warmup, n):
+    """Closed-bar indices whose cycle passes main.py's high-vol and regime gates."""
+    idx = np.arange(warmup - 1, n - 1)
+    return idx[~(vol[idx] > 2.0) & (regime[idx] == dominant[idx])]
+
+
+def ml_entries(decisions, signals, values, vol, regime, use_ml=True):
+    """Ensemble signals of the gated cycles, kept where the ML filter agrees: {i: (signal, strategy)}."""
+    signal, strategy = combine_signals_array(*signals[decisions].T)
+    keep = signal != 0
+    idx, signal, strategy = decisions[keep], signal[keep], strategy[keep]
+    if use_ml and len(idx):
+        from ml.predictor import predict_trades  # lazy: walk-forward workers never need the models
+
+        last = {col: values[col][idx] for col in values}
+        passed = predict_trades(entry_features(last, vol[idx], regime[idx].astype(int))) != 0
+        idx, signal, strategy = idx[passed], signal[passed], strategy[passed]
+    return dict(zip(idx.tolist(), zip(signal.tolist(), strategy.tolist())))
+
+
+def exit_checks(decisions, n, cadence="bar"):
+    """Closed-bar indices whose next open runs the exit check (EXIT_CADENCES), from the first gated cycle on."""
+    if cadence not in EXIT_CADENCES:
+        raise ValueError(f"Unknown exit cadence {cadence!r}")
+    decisions = np.asarray(decisions)
+    if cadence == "gated" or len(decisions) == 0:
+        return decisions
+    return np.arange(decisions[0], n - 1)
+
+
+def exit_inputs(bars, decisions):
+    """{i: (p_win, macd, macd_signal, rsi)} for every cycle in `decisions`, one batched exit-model call."""
+    from ml.predict_exit_probability import predict_exit_probabilities
+
+    exits = exit_features(bars, decisions)
+    probs = predict_exit_probabilities(exits) if len(exits) else np.zeros(0)
+    columns = (np.asarray(probs).tolist(), exits["macd"].tolist(), exits["macd_signal"].tolist(), exits["rsi"].tolist())
+    return dict(zip(np.asarray(decisions).tolist(), zip(*columns)))
+
+
+def run_backtest(bars, balance=10_000.0, warmup=1000, refit_every=96, sl=150, tp=300, risk_percent=1.0,
+                 spread_points=20, slippage_points=0, workers=3, indicator_params=None, use_ml=True,
+                 exit_cadence="bar"):
+    """
+    Lookahead-free replay of the live bot over `bars` (DataFrame with time,
+    OHLC, tick_volume and optionally spread, oldest first).
+
+    1. walk_forward: indicators, GARCH and HMM are fed bar by bar from
+       incrementally maintained state, exactly as the live loop feeds them.
+    2. The ML entry filter and exit model run once, batched over every
+       cycle that needs them (their inputs depend only on the bars).
+    3. simulate: fills, sizing, trailing stops, ML exits and SL/TP.
+
+    `indicator_params` go to IndicatorEngine (rsi_low/rsi_high, lookback,
+    bb_period, bb_std, ...); use_ml=False skips the ML entry filter.
+
+    Exits: live checks open positions every exit_every seconds (60) between
+    bar closes, whatever the gates say. With exit_cadence="bar" the replay
+    checks them once per bar, at its open, from the closed bars plus the
+    open; the later checks inside a bar are not modelled, so ML exits and
+    trailing stops can fire up to one bar later than live. "gated" is the
+    old once-per-gated-cycle behaviour.
+    """
+    if warmup < EXIT_WINDOW:
+        raise ValueError(f"warmup must be at least {EXIT_WINDOW} bars")
+    if len(bars) <= warmup + 1:
+        raise ValueError(f"Need more than {warmup + 1} bars, got {len(bars)}")
+    bars = bars.reset_index(drop=True)
+    if "tick_volume" not in bars:
+        bars["tick_volume"] = 0.0
+    timings = {}
+
+    start = time.perf_counter()
+    vol, regime, dominant, values, signals = walk_forward(bars, warmup, refit_every, workers, indicator_params)
+    timings["walk_forward"] = time.perf_counter() - start
+
+    start = time.perf_counter()
+    decisions = gate_decisions(vol, regime, dominant, warmup, len(bars))
+    entries = ml_entries(decisions, signals, values, vol, regime, use_ml)
+    p_win = exit_inputs(bars, exit_checks(decisions, len(bars), exit_cadence))
+    timings["ml"] = time.perf_counter() - start
+
+    start = time.perf_counter()
+    ledger, equity = simulate(bars, decisions, entries, p_win, balance=balance, sl=sl, tp=tp,
+                              risk_percent=risk_percent, spread_points=spread_points,
+                              slippage_points=slippage_points)
+    timings["simulate"] = time.perf_counter() - start
+    return BacktestResult(ledger, equity, timings)
+
+
+def summarize(ledger, equity):
+    """Headline stats of a backtest."""
+    if len(ledger) == 0:
+        return {"trades": 0}
+    pnl = ledger["pnl"]
+    peak = equity["equity"].cummax()
+    gross_loss = -pnl[pnl < 0].sum()
+    return {
+        "trades": len(ledger),
+        "win_rate": float((pnl > 0).mean()),
+        "net_pnl": float(pnl.sum()),
+        "profit_factor": float(pnl[pnl > 0].sum() / gross_loss) if gross_loss > 0 else np.inf,
+        "max_drawdown": float(((equity["equity"] - peak) / peak).min()),
+        "final_balance": float(ledger["balance"].iloc[-1]),
+    }
@@ -1,44 +1,50 @@
-import pandas as pd
-import joblib
-import os
-from data.fetch_data import get_ohlcv
-from models.garch_model import forecast_garch_volatility
-from models.hmm_model import detect_market_regime
-from features.extract_features import extract_features
-
-# Load Models
-rf_model = joblib.load("ml/models/rf_model.pkl")
-xgb_model = joblib.load("ml/models/xgb_model.pkl")
-
-# Get OHLCV
-df = get_ohlcv(symbol="XAUUSDc", timeframe="M15", count=500)
-df["timestamp"] = df["time"]  # for consistency with feature engineering
-
-# Add Volatility + Regime
-df["garch_vol"] = forecast_garch_volatility(df)
-regime, dominant = detect_market_regime(df)
-df["regime"] = regime
-
-# Feature Engineering
-features_df = extract_features(df)
-features_df.reset_index(drop=True, inplace=True)
-
-# Drop datetime column before ML prediction
-X = features_df.drop(columns=["timestamp", "time"], errors="ignore")
-
-# Ensure model input alignment
-required_features = list(rf_model.feature_names_in_)
-X = X[required_features]
-
-# Predict
-rf_preds = rf_model.predict(X)
-xgb_preds = xgb_model.predict(X)
-
-features_df["rf_signal"] = rf_preds
-features_df["xgb_signal"] = xgb_preds
-features_df["final_signal"] = (rf_preds == xgb_preds) & (rf_preds != 0)
-features_df["final_signal"] = features_df["final_signal"].astype(int) * rf_preds
-
-# Save to CSV
-features_df.to_csv("backtest_trades.csv", index=False)
-print("✅ Backtest complete. Results saved to backtest_trades.csv")
+import argparse
+import time
+
+from backtesting.engine import EXIT_CADENCES, run_backtest
+from data.bar_store import get_store
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Walk-forward backtest of the live bot (main.py) on stored bars")
+    parser.add_argument("--symbol", default="XAUUSDc")
+    parser.add_argument("--timeframe", default="M15")
+    parser.add_argument("--start", default=None, help="first bar (warm-up included), e.g. 2022-01-01")
+    parser.add_argument("--end", default=None)
+    parser.add_argument("--balance", type=float, default=10_000.0)
+    parser.add_argument("--warmup", type=int, default=1000, help="bars used to seed the models before trading")
+    parser.add_argument("--refit-every", type=int, default=96, help="GARCH/HMM refit interval in bars")
+    parser.add_argument("--spread", type=int, default=20, help="spread in points when the bars carry none")
+    parser.add_argument("--slippage", type=int, default=0, help="slippage in points")
+    parser.add_argument("--workers", type=int, default=3, help="1 runs the walk-forward in-process")
+    parser.add_argument("--exit-cadence", choices=EXIT_CADENCES, default="bar",
+                        help="exit checks at every bar open, or only in gated cycles")
+    parser.add_argument("--trades-out", default="backtest_trades.csv")
+    parser.add_argument("--equity-out", default="backtest_equity.csv")
+    args = parser.parse_args()
+
+    bars = get_store(args.symbol, args.timeframe).frame(start=args.start, end=args.end)
+    if len(bars) <= args.warmup + 1:
+        print(f"❌ Only {len(bars)} stored bars; backfill the store first (data/bar_store.py)")
+        return
+    print(f"📦 {len(bars)} bars: {bars['time'].iloc[0]} → {bars['time'].iloc[-1]}")
+
+    start = time.perf_counter()
+    result = run_backtest(bars, balance=args.balance, warmup=args.warmup, refit_every=args.refit_every,
+                          spread_points=args.spread, slippage_points=args.slippage, workers=args.workers,
+                          exit_cadence=args.exit_cadence)
+    elapsed = time.perf_counter() - start
+
+    result.ledger.to_csv(args.trades_out, index=False)
+    result.equity.to_csv(args.equity_out, index=False)
+
+    print(f"⏱️ {elapsed:.1f}s ({', '.join(f'{k}: {v:.1f}s' for k, v in result.timings.items())})")
+    for key, value in result.summary().items():
+        print(f"   {key}: {value:.4f}" if isinstance(value, float) else f"   {key}: {value}")
+    print(f"ℹ️ Exits checked {'at every bar open' if args.exit_cadence == 'bar' else 'in gated cycles only'}; "
+          "live also checks every 60s inside the bar, so ML exits / trailing stops may fire later here")
+    print(f"✅ Backtest complete. Trades → {args.trades_out}, equity → {args.equity_out}")
+
+
+if __name__ == "__main__":
+    main()
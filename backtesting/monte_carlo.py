@@ -0,0 +1,165 @@
+import argparse
+import os
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass
+
+import numpy as np
+import pandas as pd
+
+from logs.journal import load as load_journal
+
+METHODS = ("bootstrap", "block", "shuffle")
+
+
+@dataclass
+class MonteCarloResult:
+    max_drawdown: np.ndarray   # per path, fraction of the running peak
+    terminal: np.ndarray       # per path, final equity / initial equity
+    ruined: np.ndarray         # per path, equity touched the ruin level
+
+    def summary(self, initial_balance=10_000.0):
+        dd = np.percentile(self.max_drawdown, [50, 95, 99])
+        term = np.percentile(self.terminal, [5, 50, 95]) * initial_balance
+        return {
+            "paths": len(self.terminal),
+            "risk_of_ruin": float(self.ruined.mean()),
+            "max_dd_p50": float(dd[0]),
+            "max_dd_p95": float(dd[1]),
+            "max_dd_p99": float(dd[2]),
+            "terminal_p5": float(term[0]),
+            "terminal_p50": float(term[1]),
+            "terminal_p95": float(term[2]),
+            "p_loss": float((self.terminal < 1).mean()),
+        }
+
+
+# === Ledger input ===
+JOURNALS = ("closed", "exits")
+
+
+def load_ledger(path):
+    """
+    Trade ledger from a journal ("closed": positions as closed at the broker,
+    "exits": the exit manager's closes), an exit_log.csv (PnL) or a backtest
+    ledger (pnl, balance).
+    """
+    if path in JOURNALS:
+        return load_journal(path, columns=["timestamp", "pnl"])
+    df = pd.read_csv(path)
+    return df.rename(columns={"PnL": "pnl"})
+
+
+def ledger_returns(ledger, initial_balance=10_000.0):
+    """
+    Per-trade return as a fraction of the balance the trade was sized from.
+    Backtest ledgers carry the post-trade balance; the journals do not, so
+    their PnL is taken relative to `initial_balance`.
+    """
+    pnl = ledger["pnl"].to_numpy(dtype=float)
+    if "balance" in ledger:
+        before = ledger["balance"].to_numpy(dtype=float) - pnl
+    else:
+        before = np.full(len(pnl), float(initial_balance))
+    return pnl / before
+
+
+# === Path generation ===
+def _indices(rng, method, n_paths, n_returns, horizon, block):
+    if method == "bootstrap":
+        return rng.integers(0, n_returns, size=(n_paths, horizon))
+    if method == "block":
+        # Circular block bootstrap: keeps streaks of wins/losses together
+        n_blocks = -(-horizon // block)
+        starts = rng.integers(0, n_returns, size=(n_paths, n_blocks, 1))
+        return ((starts + np.arange(block)) % n_returns).reshape(n_paths, -1)[:, :horizon]
+    if method == "shuffle":
+        return rng.permuted(np.broadcast_to(np.arange(n_returns), (n_paths, n_returns)), axis=1)
+    raise ValueError(f"Unknown method {method!r}, expected one of {METHODS}")
+
+
+def _simulate_chunk(returns, method, n_paths, horizon, block, risk_scale, ruin_level, seed):
+    """Per-path max drawdown, terminal equity and ruin flag for one chunk of paths."""
+    rng = np.random.default_rng(seed)
+    growth = returns[_indices(rng, method, n_paths, len(returns), horizon, block)]
+
+    # Equity relative to the start, compounded trade by trade (in place)
+    growth *= risk_scale
+    growth += 1.0
+    np.maximum(growth, 0.0, out=growth)
+    equity = np.cumprod(growth, axis=1, out=growth)
+
+    peak = np.maximum.accumulate(equity, axis=1)
+    np.maximum(peak, 1.0, out=peak)
+    drawdown = np.divide(peak - equity, peak, out=peak)
+
+    return (
+        drawdown.max(axis=1),
+        equity[:, -1].copy(),
+        (equity <= ruin_level).any(axis=1),
+    )
+
+
+def run_monte_carlo(returns, n_paths=100_000, method="bootstrap", horizon=None, block=10, risk_scale=1.0,
+                    ruin_level=0.5, seed=0, workers=None, chunk_mb=64):
+    """
+    Resample per-trade returns into `n_paths` equity paths of `horizon` trades.
+
+    Paths are generated in chunks of at most ~`chunk_mb` per working matrix
+    and spread over a process pool, so memory stays bounded whatever the
+    path count. Chunk seeds come from one SeedSequence, so results depend
+    on `seed` only, not on `workers`. `risk_scale` multiplies every return
+    (e.g. 2.0 for risk_percent 2 on a ledger traded at 1).
+    """
+    returns = np.asarray(returns, dtype=float)
+    if len(returns) == 0:
+        raise ValueError("Empty ledger")
+    horizon = horizon or len(returns)
+    if method == "shuffle" and horizon != len(returns):
+        raise ValueError("shuffle permutes the whole ledger; horizon must equal the number of trades")
+
+    chunk_paths = max(1, int(chunk_mb * 2**20 // (horizon * 8)))
+    sizes = [min(chunk_paths, n_paths - lo) for lo in range(0, n_paths, chunk_paths)]
+    seeds = np.random.SeedSequence(seed).spawn(len(sizes))
+    jobs = [(returns, method, size, horizon, block, risk_scale, ruin_level, s) for size, s in zip(sizes, seeds)]
+
+    workers = workers or os.cpu_count() or 1
+    if workers > 1 and len(jobs) > 1:
+        with ProcessPoolExecutor(max_workers=min(workers, len(jobs))) as pool:
+            parts = list(pool.map(_simulate_chunk, *zip(*jobs)))
+    else:
+        parts = [_simulate_chunk(*job) for job in jobs]
+
+    return MonteCarloResult(*(np.concatenate(column) for column in zip(*parts)))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Monte Carlo drawdown / ruin analysis of a trade ledger")
+    parser.add_argument("--ledger", default="closed",
+                        help='"closed" (closed positions), "exits" (exit manager closes), an exit_log.csv '
+                             'or a backtest_trades.csv')
+    parser.add_argument("--paths", type=int, default=100_000)
+    parser.add_argument("--method", choices=METHODS, default="bootstrap")
+    parser.add_argument("--horizon", type=int, default=None, help="trades per path (default: ledger length)")
+    parser.add_argument("--block", type=int, default=10, help="block length for --method block")
+    parser.add_argument("--balance", type=float, default=10_000.0)
+    parser.add_argument("--base-risk", type=float, default=1.0, help="risk_percent the ledger was traded at")
+    parser.add_argument("--risk-percent", type=float, nargs="+", default=[1.0], help="risk levels to evaluate")
+    parser.add_argument("--ruin", type=float, default=0.5, help="ruin = equity at or below this fraction")
+    parser.add_argument("--workers", type=int, default=None)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    returns = ledger_returns(load_ledger(args.ledger), args.balance)
+    print(f"📒 {len(returns)} trades from {args.ledger} | {args.paths} {args.method} paths")
+
+    rows = {}
+    for risk in args.risk_percent:
+        result = run_monte_carlo(returns, args.paths, args.method, args.horizon, args.block,
+                                 risk_scale=risk / args.base_risk, ruin_level=args.ruin,
+                                 seed=args.seed, workers=args.workers)
+        rows[f"{risk:g}%"] = result.summary(args.balance)
+    print(pd.DataFrame(rows).T.round(4).to_string())
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,374 @@
+import argparse
+import csv
+import hashlib
+import itertools
+import json
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from multiprocessing import shared_memory
+
+import numpy as np
+import pandas as pd
+from numpy.lib.stride_tricks import sliding_window_view
+
+from backtesting.engine import (EXIT_CADENCES, exit_checks, exit_features, gate_decisions, ml_entries, simulate,
+                                summarize, walk_forward)
+from indicators.bollinger import bollinger_array
+
+# Parameters main.py / the strategies hard-code today, with the live values in each list
+DEFAULT_SPACE = {
+    "rsi_low": [5, 10, 15, 20],
+    "rsi_high": [80, 85, 90, 95],
+    "lookback": [10, 20, 30, 50],
+    "bb_period": [14, 21, 30],
+    "bb_std": [1.5, 2.0, 2.5],
+    "sl": [100, 150, 200],
+    "tp": [200, 300, 450],
+}
+PARAMS = list(DEFAULT_SPACE)
+METRICS = ["trades", "win_rate", "net_pnl", "profit_factor", "max_drawdown", "final_balance", "pruned", "score"]
+
+# Per-bar inputs that do not depend on the searched parameters, shared with the workers
+COLUMNS = [
+    "open", "high", "low", "close", "spread", "tick_volume",
+    "gate", "vol", "regime", "rsi2", "rsi14", "macd_line", "macd_signal", "macd_hist", "obv", "atr",
+    "exit_check", "p_win", "exit_macd", "exit_signal", "exit_rsi",
+]
+
+
+# === Search spaces ===
+def _valid(config):
+    return config["rsi_low"] < config["rsi_high"]
+
+
+def grid(space):
+    keys = list(space)
+    configs = (dict(zip(keys, values)) for values in itertools.product(*(space[k] for k in keys)))
+    return [c for c in configs if _valid(c)]
+
+
+def random_configs(space, n, seed=0):
+    """`n` distinct random configs (or the whole grid if it is smaller)."""
+    rng = np.random.default_rng(seed)
+    full = grid(space)
+    if n >= len(full):
+        return full
+    return [full[i] for i in rng.choice(len(full), size=n, replace=False)]
+
+
+def _key(config):
+    return tuple(config[k] for k in PARAMS)
+
+
+# === Shared bars ===
+def prepare(bars, warmup=1000, refit_every=96, workers=3, exit_cadence="bar"):
+    """
+    Parameter-independent inputs for every bar: gates (GARCH/HMM walk-forward),
+    the default indicator values and the exit-model outputs of the bars that
+    run the exit check (backtesting.engine.exit_checks). Computed once.
+    """
+    bars = bars.reset_index(drop=True)
+    vol, regime, dominant, values, _ = walk_forward(bars, warmup, refit_every, workers)
+    decisions = gate_decisions(vol, regime, dominant, warmup, len(bars))
+
+    from ml.predict_exit_probability import predict_exit_probabilities
+
+    n = len(bars)
+    data = {col: np.full(n, np.nan) for col in COLUMNS}
+    for col in ("open", "high", "low", "close"):
+        data[col] = bars[col].to_numpy(dtype=float)
+    data["spread"] = bars["spread"].to_numpy(dtype=float) if "spread" in bars else np.zeros(n)
+    data["tick_volume"] = bars["tick_volume"].to_numpy(dtype=float)
+    data["gate"] = np.zeros(n)
+    data["gate"][decisions] = 1.0
+    data["vol"] = vol
+    data["regime"] = regime.astype(float)
+    for col in ("rsi2", "rsi14", "macd_line", "macd_signal", "macd_hist", "obv", "atr"):
+        data[col] = values[col]
+
+    checks = exit_checks(decisions, n, exit_cadence)
+    exits = exit_features(bars, checks)
+    data["exit_check"] = np.zeros(n)
+    data["exit_check"][checks] = 1.0
+    data["p_win"][checks] = predict_exit_probabilities(exits) if len(exits) else []
+    data["exit_macd"][checks] = exits["macd"]
+    data["exit_signal"][checks] = exits["macd_signal"]
+    data["exit_rsi"][checks] = exits["rsi"]
+    return np.vstack([data[col] for col in COLUMNS])
+
+
+_worker = {}
+
+
+def _init_worker(shm_name, shape, settings):
+    shm = shared_memory.SharedMemory(name=shm_name)  # the parent owns and unlinks it
+    matrix = np.ndarray(shape, dtype=np.float64, buffer=shm.buf)
+    _worker.clear()
+    _worker.update(shm=shm, data=dict(zip(COLUMNS, matrix)), settings=settings, cache={})
+
+
+def _cached(key, build):
+    cache = _worker["cache"]
+    if key not in cache:
+        cache[key] = build()
+    return cache[key]
+
+
+def _bands(period, std_dev):
+    upper, _, lower = bollinger_array(_worker["data"]["close"], period, std_dev, ddof=0)
+    return upper, lower
+
+
+def _extremes(lookback):
+    data = _worker["data"]
+    n = len(data["high"])
+    prev_high, prev_low = np.full(n, np.nan), np.full(n, np.nan)
+    if n > lookback:
+        prev_high[lookback:] = sliding_window_view(data["high"], lookback)[:-1].max(axis=1)
+        prev_low[lookback:] = sliding_window_view(data["low"], lookback)[:-1].min(axis=1)
+    return prev_high, prev_low
+
+
+def _p_win(end):
+    data = _worker["data"]
+    decisions = np.flatnonzero(data["gate"][:end - 1])
+    checks = np.flatnonzero(data["exit_check"][:end - 1])
+    columns = (data[col][checks].tolist() for col in ("p_win", "exit_macd", "exit_signal", "exit_rsi"))
+    p_win = dict(zip(checks.tolist(), zip(*columns)))
+    return decisions, p_win
+
+
+def evaluate(config, end):
+    """Backtest one config on bars [:end] inside a worker; returns the summary metrics."""
+    data, settings = _worker["data"], _worker["settings"]
+    close = data["close"]
+
+    upper, lower = _cached(("bb", config["bb_period"], config["bb_std"]),
+                           lambda: _bands(config["bb_period"], config["bb_std"]))
+    prev_high, prev_low = _cached(("structure", config["lookback"]), lambda: _extremes(config["lookback"]))
+    decisions, p_win = _cached(("exits", end), lambda: _p_win(end))
+
+    # Vectorised rsi2_signal / macd_bb_signal / structure_signal (NaN compares False -> 0)
+    with np.errstate(invalid="ignore"):
+        rsi2 = data["rsi2"]
+        hist = data["macd_hist"]
+        signals = np.zeros((len(close), 3), dtype=np.int8)
+        signals[:, 0] = np.where(rsi2 < config["rsi_low"], 1, np.where(rsi2 > config["rsi_high"], -1, 0))
+        signals[:, 1] = np.where((close < lower) & (hist > 0), 1, np.where((close > upper) & (hist < 0), -1, 0))
+        signals[:, 2] = np.where(close > prev_high, 1, np.where(close < prev_low, -1, 0))
+
+    values = {col: data[col] for col in ("rsi2", "rsi14", "macd_line", "macd_signal", "macd_hist", "obv", "atr")}
+    values["bb_upper"], values["bb_lower"] = upper, lower
+    entries = ml_entries(decisions, signals, values, data["vol"], data["regime"].astype(int), settings["use_ml"])
+
+    bars = {col: data[col][:end] for col in ("open", "high", "low", "close", "spread")}
+    bars["time"] = np.arange(end)
+    ledger, equity = simulate(bars, decisions, entries, p_win, balance=settings["balance"],
+                              sl=config["sl"], tp=config["tp"], risk_percent=settings["risk_percent"],
+                              spread_points=settings["spread_points"], slippage_points=settings["slippage_points"],
+                              stop_drawdown=settings["stop_drawdown"])
+
+    stats = {"trades": 0, "win_rate": 0.0, "net_pnl": 0.0, "profit_factor": 0.0,
+             "max_drawdown": 0.0, "final_balance": settings["balance"]}
+    stats.update(summarize(ledger, equity))
+    stats["pruned"] = int(len(equity) > 0 and len(equity) < end - (decisions[0] + 1 if len(decisions) else end))
+    stats["score"] = _score(stats, settings["objective"], settings["balance"])
+    return stats
+
+
+def _score(stats, objective, balance):
+    if stats["pruned"] or stats["trades"] == 0:
+        return -np.inf
+    if objective == "profit_factor":
+        return min(stats["profit_factor"], 100.0)
+    if objective == "calmar":
+        return stats["net_pnl"] / balance / max(-stats["max_drawdown"], 1e-3)
+    return stats["net_pnl"]
+
+
+# === Checkpointing ===
+FIELDS = ["fingerprint", "rung", "end"] + PARAMS + METRICS
+
+
+def fingerprint(matrix, settings):
+    """
+    Short hash of the prepared bars (symbol, range, warmup / refit gates and
+    exit-model outputs all end up in them) and of the scoring settings.
+    Checkpoint rows of another fingerprint are never reused.
+    """
+    digest = hashlib.sha1(np.ascontiguousarray(matrix).tobytes())
+    digest.update(json.dumps(settings, sort_keys=True).encode())
+    return digest.hexdigest()[:16]
+
+
+def _load_checkpoint(path, fingerprint):
+    if not path or not os.path.exists(path):
+        return {}
+    df = pd.read_csv(path, dtype={"fingerprint": str})
+    if "fingerprint" not in df:
+        return {}
+    done = {}
+    for row in df[df["fingerprint"] == fingerprint].to_dict("records"):
+        config = {k: row[k] for k in PARAMS}
+        done[(int(row["end"]), _key(config))] = {m: row[m] for m in METRICS}
+    return done
+
+
+class _Checkpoint:
+    def __init__(self, path, fingerprint):
+        self.path = path
+        self.fingerprint = fingerprint
+        self.file = None
+        if path:
+            if os.path.exists(path):
+                with open(path, newline="") as f:
+                    header = next(csv.reader(f), None)
+                if header != FIELDS:  # written by an older optimizer: keep it aside, start afresh
+                    os.replace(path, f"{path}.old")
+                    print(f"⚠️ {path} has an older layout; moved to {path}.old")
+            new = not os.path.exists(path)
+            self.file = open(path, "a", newline="")
+            self.writer = csv.DictWriter(self.file, fieldnames=FIELDS)
+            if new:
+                self.writer.writeheader()
+
+    def write(self, rung, end, config, stats):
+        if self.file:
+            self.writer.writerow({"fingerprint": self.fingerprint, "rung": rung, "end": end, **config, **stats})
+            self.file.flush()
+
+    def close(self):
+        if self.file:
+            self.file.close()
+
+
+# === Search ===
+class Optimizer:
+    """
+    Parallel parameter search over the live strategy set.
+
+    The per-bar inputs are placed once in a shared-memory block; workers map
+    it as NumPy views and only receive small config dicts. Every evaluation
+    is appended to the checkpoint CSV, and a rerun on the same bars and
+    settings skips what is already there. Configs whose equity falls `stop_drawdown`
+    below its peak are stopped early and ranked last.
+    """
+
+    def __init__(self, bars, warmup=1000, refit_every=96, workers=None, checkpoint=None, balance=10_000.0,
+                 risk_percent=1.0, spread_points=20, slippage_points=0, stop_drawdown=0.5, use_ml=True,
+                 objective="net_pnl", exit_cadence="bar"):
+        self.warmup = warmup
+        self.workers = workers or os.cpu_count() or 1
+        self.checkpoint = checkpoint
+        self.settings = dict(balance=balance, risk_percent=risk_percent, spread_points=spread_points,
+                             slippage_points=slippage_points, stop_drawdown=stop_drawdown, use_ml=use_ml,
+                             objective=objective)
+        start = time.perf_counter()
+        self.matrix = prepare(bars, warmup, refit_every, workers=min(self.workers, 3), exit_cadence=exit_cadence)
+        self.n = self.matrix.shape[1]
+        self.fingerprint = fingerprint(self.matrix, self.settings)
+        print(f"🧮 Prepared {self.n} bars in {time.perf_counter() - start:.1f}s")
+
+    def run(self, configs, end=None, rung=0):
+        """Evaluate `configs` on bars [:end]; returns a DataFrame sorted by score."""
+        end = end or self.n
+        done = _load_checkpoint(self.checkpoint, self.fingerprint)
+        results = {}
+        todo = []
+        for config in configs:
+            cached = done.get((end, _key(config)))
+            if cached is not None:
+                results[_key(config)] = {**config, **cached}
+            else:
+                todo.append(config)
+
+        if todo:
+            shm = shared_memory.SharedMemory(create=True, size=self.matrix.nbytes)
+            checkpoint = _Checkpoint(self.checkpoint, self.fingerprint)
+            try:
+                np.ndarray(self.matrix.shape, dtype=np.float64, buffer=shm.buf)[:] = self.matrix
+                with ProcessPoolExecutor(max_workers=self.workers, initializer=_init_worker,
+                                         initargs=(shm.name, self.matrix.shape, self.settings)) as pool:
+                    futures = {pool.submit(evaluate, config, end): config for config in todo}
+                    for i, future in enumerate(as_completed(futures), 1):
+                        config, stats = futures[future], future.result()
+                        results[_key(config)] = {**config, **stats}
+                        checkpoint.write(rung, end, config, stats)
+                        if i % 100 == 0 or i == len(todo):
+                            print(f"   rung {rung}: {i}/{len(todo)} configs")
+            finally:
+                checkpoint.close()
+                shm.close()
+                shm.unlink()
+
+        return pd.DataFrame(list(results.values())).sort_values("score", ascending=False, ignore_index=True)
+
+    def halving(self, configs, eta=3, min_fraction=1 / 9):
+        """
+        Successive halving: score every config on the first `min_fraction` of
+        the tradable bars, keep the best 1/eta, grow the window by eta, repeat
+        until the survivors have seen all bars.
+        """
+        fraction = min_fraction
+        rung = 0
+        while True:
+            end = self.warmup + int(round(min(fraction, 1.0) * (self.n - self.warmup)))
+            results = self.run(configs, end=end, rung=rung)
+            if fraction >= 1.0 or len(results) <= 1:
+                return results
+            keep = results[np.isfinite(results["score"])].head(max(1, len(results) // eta))
+            if keep.empty:
+                return results  # everything was pruned
+            configs = keep[PARAMS].to_dict("records")
+            fraction *= eta
+            rung += 1
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Grid / random / successive-halving search of strategy parameters")
+    parser.add_argument("--symbol", default="XAUUSDc")
+    parser.add_argument("--timeframe", default="M15")
+    parser.add_argument("--start", default=None)
+    parser.add_argument("--end", default=None)
+    parser.add_argument("--search", choices=["grid", "random", "halving"], default="halving")
+    parser.add_argument("--samples", type=int, default=500, help="configs for --search random")
+    parser.add_argument("--eta", type=int, default=3)
+    parser.add_argument("--min-fraction", type=float, default=1 / 9)
+    parser.add_argument("--objective", choices=["net_pnl", "profit_factor", "calmar"], default="net_pnl")
+    parser.add_argument("--warmup", type=int, default=1000)
+    parser.add_argument("--refit-every", type=int, default=96)
+    parser.add_argument("--stop-drawdown", type=float, default=0.5, help="prune configs at this drawdown")
+    parser.add_argument("--no-ml", action="store_true", help="skip the ML entry filter")
+    parser.add_argument("--exit-cadence", choices=EXIT_CADENCES, default="bar",
+                        help="exit checks at every bar open (live has an intra-bar exit loop) or gated cycles only")
+    parser.add_argument("--workers", type=int, default=None)
+    parser.add_argument("--checkpoint", default="optimizer_results.csv", help="resumable results file")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--top", type=int, default=10)
+    args = parser.parse_args()
+
+    from data.bar_store import get_store
+
+    bars = get_store(args.symbol, args.timeframe).frame(start=args.start, end=args.end)
+    if len(bars) <= args.warmup + 1:
+        print(f"❌ Only {len(bars)} stored bars; backfill the store first (data/bar_store.py)")
+        return
+
+    start = time.perf_counter()
+    optimizer = Optimizer(bars, warmup=args.warmup, refit_every=args.refit_every, workers=args.workers,
+                          checkpoint=args.checkpoint, stop_drawdown=args.stop_drawdown,
+                          use_ml=not args.no_ml, objective=args.objective, exit_cadence=args.exit_cadence)
+    if args.search == "grid":
+        results = optimizer.run(grid(DEFAULT_SPACE))
+    elif args.search == "random":
+        results = optimizer.run(random_configs(DEFAULT_SPACE, args.samples, args.seed))
+    else:
+        results = optimizer.halving(grid(DEFAULT_SPACE), eta=args.eta, min_fraction=args.min_fraction)
+
+    print(f"⏱️ Search done in {time.perf_counter() - start:.1f}s")
+    print(results.head(args.top).to_string())
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,86 @@
+"""
+Cost of the performance analytics as the closed-trade history grows: one
+O(1) book update, a book report, a vectorised group-by and seeding the
+book from the journal columns. Also checks group_stats against a pandas
+groupby on the same rows.
+
+    python -m benchmarks.bench_analytics [--rows 10000 1000000 5000000]
+
+Runs on synthetic columns in the "closed" journal schema; nothing is
+written to logs/journal.
+"""
+import argparse
+import time
+
+import numpy as np
+import pandas as pd
+
+from analysis.performance import PerformanceBook, group_stats
+from logs.journal import SCHEMAS
+
+STRATEGIES = ["RSI2 Only", "MACD+BB Only", "Structure Only", "Ensemble (RSI2 + MACD + Structure)"]
+
+
+def _columns(n, rng):
+    dtype = SCHEMAS["closed"]
+    open_time = np.sort(rng.integers(1_700_000_000, 1_760_000_000, size=n)) * 1000
+    columns = {name: np.zeros(n, dtype=dtype[name]) for name in dtype.names}
+    columns.update({
+        "open_time": open_time,
+        "timestamp": open_time + rng.integers(900, 90_000, size=n) * 1000,
+        "ticket": np.arange(1, n + 1),
+        "strategy": np.array([s.encode() for s in STRATEGIES], dtype=dtype["strategy"])[rng.integers(0, 4, size=n)],
+        "symbol": np.full(n, b"XAUUSDc", dtype=dtype["symbol"]),
+        "regime": rng.integers(0, 2, size=n).astype(np.int8),
+        "ml_decision": np.ones(n, dtype=np.int8),
+        "pnl": rng.normal(2.0, 30.0, size=n),
+        "mae": np.abs(rng.normal(0, 3, size=n)),
+        "mfe": np.abs(rng.normal(0, 4, size=n)),
+    })
+    return columns
+
+
+def _check(columns, by):
+    """group_stats against pandas on the same rows (counts, PnL, win rate, drawdown)."""
+    df = pd.DataFrame({"strategy": np.char.decode(columns["strategy"]), "regime": columns["regime"],
+                       "hour": (columns["open_time"] // 3_600_000) % 24, "pnl": columns["pnl"]})
+    ours = group_stats(columns, by)
+    grouped = df.groupby(by)["pnl"]
+    drawdown = grouped.apply(lambda p: (np.maximum(p.cumsum().cummax(), 0) - p.cumsum()).max())
+    assert (ours["trades"] == grouped.size()).all()
+    assert np.allclose(ours["pnl"], grouped.sum())
+    assert np.allclose(ours["win_rate"], grouped.apply(lambda p: (p > 0).mean()))
+    assert np.allclose(ours["max_drawdown"], drawdown)
+
+
+def _timed(fn, repeat):
+    start = time.perf_counter()
+    for _ in range(repeat):
+        out = fn()
+    return (time.perf_counter() - start) / repeat * 1000, out
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Performance analytics cost vs history length")
+    parser.add_argument("--rows", type=int, nargs="+", default=[10_000, 1_000_000, 5_000_000])
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(0)
+    _check(_columns(20_000, rng), ["strategy", "regime"])
+    print("✅ group_stats matches pandas groupby")
+
+    trade = {"pnl": 12.5, "mae": 1.2, "mfe": 3.4, "open_time": 1_750_000_000_000, "strategy": "RSI2 Only",
+             "regime": 1, "ml_decision": 1}
+    for n in args.rows:
+        columns = _columns(n, rng)
+        seed_ms, book = _timed(lambda: PerformanceBook.from_columns(columns), args.repeat)
+        add_us = _timed(lambda: book.add(trade), 10_000)[0] * 1000
+        report_ms = _timed(book.report, 100)[0]
+        scan_ms = _timed(lambda: group_stats(columns, ["strategy", "hour"]), args.repeat)[0]
+        print(f"{n:>10,} rows | add {add_us:6.1f} us | report {report_ms:6.2f} ms | "
+              f"group-by strategy×hour {scan_ms:8.1f} ms | seed book {seed_ms:8.1f} ms")
+
+
+if __name__ == "__main__":
+    main()
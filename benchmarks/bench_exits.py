@@ -0,0 +1,97 @@
+"""
+Per-cycle cost of the exit decisions as the number of open positions grows:
+the batched exit engine next to scoring the exit model once per position.
+
+    python -m benchmarks.bench_exits [--positions 1 10 100 500] [--repeat 30]
+
+Uses the promoted (or legacy) exit model when present, otherwise a
+logistic regression stand-in fitted on random data. Orders are built but
+not sent.
+"""
+import argparse
+import time
+from collections import namedtuple
+
+import numpy as np
+import pandas as pd
+from sklearn.linear_model import LogisticRegression
+
+from data.snapshot import MarketSnapshot
+from execution.exit_engine import exit_matrix, market_features, plan_exits
+from ml.inference import ModelRunner
+from ml.predict_exit_probability import exit_handle, load_model
+from utils.broker import mt5
+
+EXIT_FEATURES = ["rsi", "macd", "macd_signal", "body_ratio", "trend_strength"]
+
+Position = namedtuple("Position", "ticket time type magic volume price_open sl tp symbol")
+Tick = namedtuple("Tick", "time bid ask")
+
+
+def _ensure_model(rng):
+    try:
+        load_model()
+    except Exception:
+        X = pd.DataFrame(rng.normal(size=(2000, len(EXIT_FEATURES))), columns=EXIT_FEATURES)
+        model = LogisticRegression(max_iter=1000).fit(X, (X["rsi"] > 0).astype(int))
+        exit_handle._active = ({"version": "stand-in"}, ModelRunner(model, EXIT_FEATURES))
+
+
+def _snapshot(n_positions, rng):
+    times = pd.date_range("2024-01-01", periods=200, freq="15min")
+    close = 2000 + np.cumsum(rng.normal(scale=1.5, size=len(times)))
+    bars = pd.DataFrame({"time": times, "open": close + rng.normal(scale=0.5, size=len(times)),
+                         "high": close + 2, "low": close - 2, "close": close, "tick_volume": 100})
+    now = int(times[-1].timestamp())
+    tick = Tick(now, close[-1], close[-1] + 0.2)
+    positions = tuple(
+        Position(i + 1, now - int(rng.integers(900, 90000)), int(rng.integers(0, 2)), 234000, 0.1,
+                 close[-1] + rng.normal(scale=5), 0.0, close[-1] + 10, "XAUUSDc")
+        for i in range(n_positions)
+    )
+    return MarketSnapshot("XAUUSDc", "M15", pd.Timestamp(times[-1]), bars, tick, positions, None)
+
+
+def _per_position(snapshot):
+    """Old shape: one exit model call per position."""
+    market = market_features(snapshot.bars)
+    runner = load_model()
+    for pos in snapshot.positions:
+        direction = 1 if pos.type == mt5.ORDER_TYPE_BUY else -1
+        row = exit_matrix(market, [direction], np.array([pos.price_open]), snapshot.bid, [0.0])
+        runner.predict_proba({name: values[0] for name, values in row.items()})
+
+
+def _batched(snapshot):
+    plan = plan_exits(snapshot)
+    plan.close_requests()
+    plan.modify_requests()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Exit decision cost per cycle vs open positions")
+    parser.add_argument("--positions", type=int, nargs="+", default=[1, 10, 100, 500])
+    parser.add_argument("--repeat", type=int, default=30)
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(0)
+    _ensure_model(rng)
+    rows = []
+    for n in args.positions:
+        snapshot = _snapshot(n, rng)
+        for path, fn in (("per position", _per_position), ("batched", _batched)):
+            fn(snapshot)
+            samples = np.empty(args.repeat)
+            for k in range(args.repeat):
+                start = time.perf_counter()
+                fn(snapshot)
+                samples[k] = time.perf_counter() - start
+            rows.append({"positions": n, "path": path, "p50_ms": np.percentile(samples, 50) * 1e3,
+                         "p99_ms": np.percentile(samples, 99) * 1e3})
+
+    print("⏱️ Exit decisions per cycle")
+    print(pd.DataFrame(rows).round(2).to_string(index=False))
+
+
+if __name__ == "__main__":
+    main()
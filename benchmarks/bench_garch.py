@@ -0,0 +1,85 @@
+"""
+GarchForecaster against a full arch fit on the same window
+(forecast_garch_volatility), on synthetic GARCH(1,1) closes: forecast
+deviation and cost per bar.
+
+    python -m benchmarks.bench_garch [--seeds 4] [--bars 400] [--every 20] [--bound 0.01]
+
+Seeds the forecaster on 1000 closes, then feeds `--bars` more and compares
+every `--every` bars. Exits 1 when the worst deviation of the default
+configuration is above `--bound` (relative, 0.01 = 1%).
+"""
+import argparse
+import sys
+import time
+import warnings
+
+import numpy as np
+import pandas as pd
+
+from models.garch_model import GarchForecaster, forecast_garch_volatility
+
+WINDOW = 1000  # closes, i.e. the forecaster's 999 returns
+
+CONFIGS = {
+    "default": {},
+    "no steps": {"newton_steps": 0},
+}
+
+
+def _closes(n, seed, omega=0.02, alpha=0.08, beta=0.9):
+    rng = np.random.default_rng(seed)
+    sigma2 = omega / (1 - alpha - beta)
+    returns = np.empty(n)
+    for i in range(n):
+        returns[i] = rng.standard_normal() * np.sqrt(sigma2)
+        sigma2 = omega + alpha * returns[i] ** 2 + beta * sigma2
+    return 2000 * np.cumprod(1 + returns / 100)
+
+
+def _run(closes, every, **kwargs):
+    garch = GarchForecaster(**kwargs)
+    garch.seed(pd.DataFrame({"close": closes[:WINDOW]}))
+    deviations, elapsed = [], 0.0
+    for i in range(WINDOW, len(closes)):
+        start = time.perf_counter()
+        forecast = garch.update(closes[i])
+        elapsed += time.perf_counter() - start
+        if (i - WINDOW) % every == 0:
+            full = forecast_garch_volatility(pd.DataFrame({"close": closes[i - WINDOW + 1:i + 1]}))
+            deviations.append(abs(forecast / full - 1))
+    return np.array(deviations), elapsed / (len(closes) - WINDOW), garch.refits
+
+
+def main():
+    parser = argparse.ArgumentParser(description="GarchForecaster vs full GARCH refit")
+    parser.add_argument("--seeds", type=int, default=4)
+    parser.add_argument("--bars", type=int, default=400)
+    parser.add_argument("--every", type=int, default=20)
+    parser.add_argument("--bound", type=float, default=0.01)
+    args = parser.parse_args()
+    warnings.filterwarnings("ignore")  # arch's convergence / scaling chatter
+
+    rows, worst = [], {}
+    for name, kwargs in CONFIGS.items():
+        deviations, per_bar, refits = [], [], 0
+        for seed in range(args.seeds):
+            d, t, r = _run(_closes(WINDOW + args.bars, seed), args.every, **kwargs)
+            deviations.append(d)
+            per_bar.append(t)
+            refits += r
+        d = np.concatenate(deviations)
+        worst[name] = d.max()
+        rows.append({"config": name, "median_%": np.median(d) * 100, "p95_%": np.percentile(d, 95) * 100,
+                     "max_%": d.max() * 100, "ms_per_bar": np.mean(per_bar) * 1e3, "refits": refits})
+
+    print("⏱️ GARCH forecaster vs full refit")
+    print(pd.DataFrame(rows).round(3).to_string(index=False))
+    if worst["default"] > args.bound:
+        print(f"❌ Max deviation {worst['default']:.2%} above {args.bound:.2%}")
+        sys.exit(1)
+    print(f"✅ Max deviation {worst['default']:.2%} within {args.bound:.2%}")
+
+
+if __name__ == "__main__":
+    main()
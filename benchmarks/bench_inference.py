@@ -0,0 +1,102 @@
+"""
+Per-call latency of the ML inference paths: the old one-row DataFrame path
+next to the ndarray ModelRunner, for single rows and for a batch.
+
+    python -m benchmarks.bench_inference [--rows 500] [--repeat 300]
+
+Uses the trained models under ml/ when present, otherwise stand-ins of
+the same kind fitted on random data.
+"""
+import argparse
+import os
+import time
+import warnings
+
+import joblib
+import numpy as np
+import pandas as pd
+from sklearn.ensemble import RandomForestClassifier
+from sklearn.linear_model import LogisticRegression
+
+from ml.inference import ModelRunner
+
+ENTRY_FEATURES = ["rsi2", "rsi14", "macd_line", "macd_signal", "macd_hist", "bb_upper", "bb_lower",
+                  "bb_width", "obv", "atr", "volatility", "regime"]
+EXIT_FEATURES = ["rsi", "macd", "macd_signal", "body_ratio", "trend_strength"]
+
+
+def _stand_in(estimator, names, rng):
+    X = pd.DataFrame(rng.normal(size=(2000, len(names))), columns=names)
+    return estimator.fit(X, (X.iloc[:, 0] + rng.normal(size=len(X)) > 0).astype(int))
+
+
+def load_models(rng):
+    if os.path.exists("ml/models/rf_model.pkl"):
+        entry = joblib.load("ml/models/rf_model.pkl")
+        names = list(entry.feature_names_in_)
+    else:
+        names = ENTRY_FEATURES
+        entry = _stand_in(RandomForestClassifier(n_estimators=100, max_depth=8, random_state=0), names, rng)
+    if os.path.exists("ml/exit_model.pkl"):
+        exit_model, exit_names = joblib.load("ml/exit_model.pkl")
+    else:
+        exit_names = EXIT_FEATURES
+        exit_model = _stand_in(LogisticRegression(max_iter=1000), exit_names, rng)
+    return (entry, list(names)), (exit_model, list(exit_names))
+
+
+def _timed(fn, repeat):
+    """Per-call seconds over `repeat` calls (after one warm-up)."""
+    fn()
+    samples = np.empty(repeat)
+    for k in range(repeat):
+        start = time.perf_counter()
+        fn()
+        samples[k] = time.perf_counter() - start
+    return samples
+
+
+def main():
+    parser = argparse.ArgumentParser(description="ML inference latency: DataFrame path vs ndarray runner")
+    parser.add_argument("--rows", type=int, default=500, help="rows per batch call")
+    parser.add_argument("--repeat", type=int, default=300)
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(0)
+    rows = []
+    for label, (model, names) in zip(("entry", "exit"), load_models(rng)):
+        runner = ModelRunner(model, names)
+        one = dict(zip(names, rng.normal(size=len(names)).tolist()))
+        batch = pd.DataFrame(rng.normal(size=(args.rows, len(names))), columns=names)
+        dicts = batch.to_dict("records")
+        method = "predict_proba" if hasattr(model, "predict_proba") and label == "exit" else "predict"
+
+        def old_single():
+            return getattr(model, method)(pd.DataFrame([one])[names])
+
+        def new_single():
+            return getattr(runner, method)(one)
+
+        def old_batch():
+            return [getattr(model, method)(pd.DataFrame([row])[names]) for row in dicts]
+
+        def new_batch():
+            return getattr(runner, f"{method}_many")(batch)
+
+        with warnings.catch_warnings():
+            warnings.simplefilter("ignore")
+            cases = [("single, DataFrame", old_single, 1), ("single, ndarray", new_single, 1),
+                     (f"{args.rows} rows, DataFrame loop", old_batch, args.rows),
+                     (f"{args.rows} rows, batch ndarray", new_batch, args.rows)]
+            for case, fn, n in cases:
+                repeat = args.repeat if n == 1 else max(3, args.repeat // 50)
+                samples = _timed(fn, repeat) / n
+                rows.append({"model": f"{label} ({type(model).__name__})", "path": case,
+                             "p50_us": np.percentile(samples, 50) * 1e6, "p99_us": np.percentile(samples, 99) * 1e6})
+
+    print("⏱️ Per-row latency")
+    print(pd.DataFrame(rows).round(1).to_string(index=False))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,67 @@
+"""
+Where startup time goes: `python -X importtime` of an entry module,
+aggregated per top-level package, plus the cold cost of each warm-up step
+(heavy libraries and model unpickling) that main.py now runs in the
+background.
+
+    python -m benchmarks.bench_startup [--module main] [--top 15]
+"""
+import argparse
+import json
+import os
+import subprocess
+import sys
+import time
+from collections import defaultdict
+
+WARM_UP = (
+    "import json, sys; from utils.warmup import warm_up; "
+    "print(json.dumps(warm_up()), file=sys.stderr)"
+)
+
+
+def _run(code):
+    """(wall seconds, stderr) of a fresh interpreter running `code` from the repo root."""
+    start = time.perf_counter()
+    proc = subprocess.run([sys.executable, "-X", "importtime", "-c", code], capture_output=True, text=True,
+                          env={**os.environ, "PYTHONPATH": os.pathsep.join(filter(None, [os.getcwd(), os.environ.get("PYTHONPATH")]))})
+    elapsed = time.perf_counter() - start
+    if proc.returncode != 0:
+        raise RuntimeError(proc.stderr.strip().splitlines()[-1] if proc.stderr.strip() else "failed")
+    return elapsed, proc.stderr
+
+
+def import_profile(stderr):
+    """{top-level package: self seconds} from -X importtime output."""
+    totals = defaultdict(float)
+    for line in stderr.splitlines():
+        if not line.startswith("import time:") or "self [us]" in line:
+            continue
+        self_us, _, name = line[len("import time:"):].split("|")
+        totals[name.strip().split(".")[0]] += int(self_us) / 1e6
+    return dict(sorted(totals.items(), key=lambda item: -item[1]))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Startup / import-time breakdown")
+    parser.add_argument("--module", default="main", help="entry module to import (not run)")
+    parser.add_argument("--top", type=int, default=15)
+    parser.add_argument("--no-warm-up", action="store_true", help="skip timing the background warm-up steps")
+    args = parser.parse_args()
+
+    wall, stderr = _run(f"import {args.module}")
+    profile = import_profile(stderr)
+    print(f"🚀 import {args.module}: {wall:.2f}s wall, {sum(profile.values()):.2f}s in imports")
+    for name, seconds in list(profile.items())[:args.top]:
+        print(f"   {name:<24} {seconds * 1000:8.1f} ms")
+
+    if not args.no_warm_up:
+        _, stderr = _run(WARM_UP)
+        steps = json.loads(stderr.strip().splitlines()[-1])
+        print(f"🔥 Warm-up (background thread in main.py): {sum(steps.values()):.2f}s")
+        for name, seconds in steps.items():
+            print(f"   {name:<40} {seconds * 1000:8.1f} ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,230 @@
+import os
+import tempfile
+import threading
+from datetime import datetime, timedelta, timezone
+
+from utils.broker import mt5, BACKEND
+from utils.mt5_connector import mt5_call
+import numpy as np
+import pandas as pd
+
+# A replay must never read (or write) bars from the live store's future
+STORE_ROOT = tempfile.mkdtemp(prefix="bar_store_sim_") if BACKEND == "sim" else "data/store"
+
+# Column schema of MT5 rate arrays; `time` is epoch seconds (sorted, unique)
+COLUMNS = {
+    "time": np.dtype("<i8"),
+    "open": np.dtype("<f8"),
+    "high": np.dtype("<f8"),
+    "low": np.dtype("<f8"),
+    "close": np.dtype("<f8"),
+    "tick_volume": np.dtype("<i8"),
+    "spread": np.dtype("<i4"),
+    "real_volume": np.dtype("<i8"),
+}
+
+TIMEFRAMES = {
+    "M1": (mt5.TIMEFRAME_M1, 60),
+    "M5": (mt5.TIMEFRAME_M5, 300),
+    "M15": (mt5.TIMEFRAME_M15, 900),
+    "H1": (mt5.TIMEFRAME_H1, 3600),
+}
+
+
+def _to_epoch(ts):
+    if ts is None:
+        return None
+    if isinstance(ts, (int, np.integer)):
+        return int(ts)
+    return int(pd.Timestamp(ts).timestamp())
+
+
+class BarStore:
+    """
+    On-disk columnar OHLCV store for one symbol / timeframe.
+
+    Every column is a raw little-endian binary file under
+    data/store/<symbol>/<timeframe>/<column>.bin, so reads are np.memmap
+    views and appends are plain file appends. `time` is written last and is
+    the commit marker: a crash mid-append leaves the other columns longer,
+    and they are trimmed back on the next open.
+
+    Range queries binary-search the sorted time column and return memmap
+    slices (no copy). MT5 is only contacted for bars newer than the last
+    stored one (`sync`) or for explicit chunked backfills (`backfill`).
+    The last stored bar may be the still-forming one; the next sync
+    re-fetches and overwrites it.
+    """
+
+    def __init__(self, symbol="XAUUSDc", timeframe="M15", root=STORE_ROOT):
+        self.symbol = symbol
+        self.timeframe = timeframe.upper()
+        self.mt5_timeframe, self.tf_seconds = TIMEFRAMES.get(self.timeframe, TIMEFRAMES["M15"])
+        self.path = os.path.join(root, symbol, self.timeframe)
+        self._lock = threading.Lock()
+        os.makedirs(self.path, exist_ok=True)
+        self._repair()
+
+    def _file(self, column):
+        return os.path.join(self.path, f"{column}.bin")
+
+    def _rows(self, column="time"):
+        path = self._file(column)
+        return os.path.getsize(path) // COLUMNS[column].itemsize if os.path.exists(path) else 0
+
+    def _repair(self):
+        rows = self._rows("time")
+        for col, dtype in COLUMNS.items():
+            path = self._file(col)
+            if not os.path.exists(path):
+                open(path, "wb").close()
+            if os.path.getsize(path) != rows * dtype.itemsize:
+                os.truncate(path, rows * dtype.itemsize)
+
+    def __len__(self):
+        return self._rows("time")
+
+    # === Reads (zero-copy) ===
+    def _column(self, column, rows):
+        if rows == 0:
+            return np.empty(0, dtype=COLUMNS[column])
+        return np.memmap(self._file(column), dtype=COLUMNS[column], mode="r", shape=(rows,))
+
+    def times(self):
+        return self._column("time", len(self))
+
+    def last_time(self):
+        times = self.times()
+        return int(times[-1]) if len(times) else None
+
+    def first_time(self):
+        times = self.times()
+        return int(times[0]) if len(times) else None
+
+    def slice_bounds(self, start=None, end=None, count=None):
+        """Row bounds for [start, end) (timestamps or epoch seconds), optionally limited to `count` rows."""
+        times = self.times()
+        lo = 0 if start is None else int(np.searchsorted(times, _to_epoch(start), side="left"))
+        hi = len(times) if end is None else int(np.searchsorted(times, _to_epoch(end), side="left"))
+        if count is not None:
+            if start is not None and end is None:
+                hi = min(hi, lo + count)
+            else:
+                lo = max(lo, hi - count)
+        return lo, hi
+
+    def columns(self, start=None, end=None, count=None, columns=None):
+        """Dict of memmap views for the requested range, e.g. columns(end=ts, count=1500)."""
+        rows = len(self)
+        lo, hi = self.slice_bounds(start, end, count)
+        return {col: self._column(col, rows)[lo:hi] for col in (columns or COLUMNS)}
+
+    def frame(self, start=None, end=None, count=None):
+        """DataFrame in the shape get_ohlcv returns (time as datetime64)."""
+        df = pd.DataFrame(self.columns(start, end, count))
+        df["time"] = pd.to_datetime(df["time"], unit="s")
+        return df
+
+    # === Writes ===
+    def write(self, rates):
+        """
+        Merge MT5 rates (structured array or dict of columns) into the store.
+        A batch reaching the end of the history replaces stored bars from its
+        first time onwards (the sync case); anything else is merged with a
+        full rewrite of the column files.
+        """
+        if rates is None or len(rates) == 0:
+            return 0
+        new = {col: np.asarray(rates[col], dtype=dtype) for col, dtype in COLUMNS.items()}
+        order = np.argsort(new["time"], kind="stable")
+        _, keep = np.unique(new["time"][order][::-1], return_index=True)  # last duplicate wins
+        idx = order[::-1][keep]
+        new = {col: values[idx] for col, values in new.items()}
+
+        with self._lock:
+            times = self.times()
+            first_new = new["time"][0]
+            if len(times) and (first_new < times[0] or new["time"][-1] < times[-1]):
+                return self._rewrite(new)
+
+            keep_rows = int(np.searchsorted(times, first_new, side="left"))
+            total = keep_rows + len(new["time"])
+            # Overwrite in place from keep_rows (never shrinks the file under live
+            # memmaps in the usual sync case); `time` last as the commit marker
+            for col in list(COLUMNS)[1:] + ["time"]:
+                itemsize = COLUMNS[col].itemsize
+                with open(self._file(col), "r+b") as f:
+                    f.seek(keep_rows * itemsize)
+                    f.write(new[col].tobytes())
+                    if f.tell() < os.path.getsize(self._file(col)):
+                        f.truncate(total * itemsize)
+        return len(new["time"])
+
+    def _rewrite(self, new):
+        old = {col: np.array(self._column(col, len(self))) for col in COLUMNS}
+        merged_time = np.concatenate([old["time"], new["time"]])
+        # Incoming bars win over stored ones with the same timestamp
+        _, idx = np.unique(merged_time[::-1], return_index=True)
+        idx = len(merged_time) - 1 - idx
+        for col in list(COLUMNS)[1:] + ["time"]:
+            merged = np.concatenate([old[col], new[col]])[idx]
+            tmp = self._file(col) + ".tmp"
+            with open(tmp, "wb") as f:
+                f.write(merged.tobytes())
+            os.replace(tmp, self._file(col))
+        self._repair()
+        return len(new["time"])
+
+    # === MT5 sync ===
+    def sync(self, count=1000):
+        """
+        Fetch only bars from the last stored bar onwards (it may have been
+        the forming bar). A store holding fewer than `count` bars is topped up
+        with the latest `count` bars. Goes through the shared MT5 session.
+        """
+        last = self.last_time()
+        if last is None or len(self) < count:
+            rates = mt5_call("copy_rates_from_pos", self.symbol, self.mt5_timeframe, 0, count)
+        else:
+            date_from = datetime.fromtimestamp(last, tz=timezone.utc)
+            date_to = datetime.now(timezone.utc) + timedelta(days=1)  # covers server-time offsets
+            rates = mt5_call("copy_rates_range", self.symbol, self.mt5_timeframe, date_from, date_to)
+        if rates is None:
+            return 0
+        return self.write(rates)
+
+    def backfill(self, start, end=None, chunk_days=30):
+        """
+        Chunked copy_rates_range over [start, end) merged into the store. The
+        chunks are requested one after another: the MT5 API is not thread-safe,
+        so every call goes through the session lock of mt5_call.
+        """
+        start = pd.Timestamp(start, tz="UTC") if pd.Timestamp(start).tzinfo is None else pd.Timestamp(start)
+        end = pd.Timestamp.now(tz="UTC") if end is None else pd.Timestamp(end)
+        if end.tzinfo is None:
+            end = end.tz_localize("UTC")
+
+        edges = list(pd.date_range(start, end, freq=f"{chunk_days}D")) + [end]
+        chunks = [(a.to_pydatetime(), b.to_pydatetime()) for a, b in zip(edges[:-1], edges[1:]) if a < b]
+
+        parts = []
+        for chunk in chunks:
+            rates = mt5_call("copy_rates_range", self.symbol, self.mt5_timeframe, *chunk)
+            if rates is not None and len(rates):
+                parts.append(rates)
+        if not parts:
+            return 0
+        return self.write(np.concatenate(parts))
+
+
+_stores = {}
+_stores_lock = threading.Lock()
+
+
+def get_store(symbol="XAUUSDc", timeframe="M15", root=STORE_ROOT):
+    """Process-wide BarStore per (symbol, timeframe)."""
+    key = (root, symbol, timeframe.upper())
+    with _stores_lock:
+        if key not in _stores:
+            _stores[key] = BarStore(symbol, timeframe, root)
+        return _stores[key]
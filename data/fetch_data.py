@@ -1,24 +1,38 @@
-import MetaTrader5 as mt5
 import pandas as pd
 
+from data.bar_store import get_store
+from utils.mt5_connector import ensure_connected
+
 def get_ohlcv(symbol="XAUUSDc", timeframe="M15", count=1000):
-    tf_map = {
-        "M1": mt5.TIMEFRAME_M1,
-        "M5": mt5.TIMEFRAME_M5,
-        "M15": mt5.TIMEFRAME_M15,
-        "H1": mt5.TIMEFRAME_H1
-    }
-
-    if not mt5.initialize():
+    """
+    Latest `count` bars (last row may be the forming bar), served from the
+    local bar store. MT5 is only asked for bars newer than the stored ones.
+    """
+    store = get_store(symbol, timeframe)
+
+    if not ensure_connected():
         raise RuntimeError("❌ MT5 Initialization failed")
 
-    tf = tf_map.get(timeframe.upper(), mt5.TIMEFRAME_M15)
-    rates = mt5.copy_rates_from_pos(symbol, tf, 0, count)
-    mt5.shutdown()
+    store.sync(count=count)
 
-    if rates is None:
+    if len(store) == 0:
         raise ValueError("❌ No OHLCV data returned from MT5")
 
-    df = pd.DataFrame(rates)
-    df["time"] = pd.to_datetime(df["time"], unit="s")
-    return df
+    return store.frame(count=count)
+
+
+def load_history(symbol="XAUUSDc", timeframe="M15", start=None, end=None):
+    """
+    Make sure the bar store covers [start, end) and return it.
+    Research scripts call this once and then slice the store per trade.
+    """
+    store = get_store(symbol, timeframe)
+
+    if not ensure_connected():
+        raise RuntimeError("❌ MT5 Initialization failed")
+
+    first = store.first_time()
+    if start is not None and (first is None or pd.Timestamp(start).timestamp() < first):
+        store.backfill(start, end)
+    store.sync()
+    return store
@@ -0,0 +1,61 @@
+from dataclasses import dataclass
+
+import pandas as pd
+
+from data.bar_store import get_store
+from utils.mt5_connector import ensure_connected, mt5_call
+
+
+@dataclass(frozen=True)
+class MarketSnapshot:
+    """
+    Everything one cycle needs from the broker, fetched once.
+
+    Strategies, trade_manager and exit_manager all read from the same
+    snapshot, so broker round-trips per cycle stay constant (bar delta,
+    tick, positions, account) whatever the number of open positions.
+    Treat `bars` as read-only.
+    """
+    symbol: str
+    timeframe: str
+    taken_at: pd.Timestamp
+    bars: pd.DataFrame  # last row is the forming bar
+    tick: object
+    positions: tuple
+    account: object
+
+    @property
+    def closed_bars(self):
+        return self.bars.iloc[:-1]
+
+    @property
+    def bid(self):
+        return self.tick.bid if self.tick else None
+
+    @property
+    def ask(self):
+        return self.tick.ask if self.tick else None
+
+    def positions_for(self, symbol=None):
+        symbol = symbol or self.symbol
+        return tuple(p for p in self.positions if p.symbol == symbol)
+
+
+def take_snapshot(symbol="XAUUSDc", timeframe="M15", count=1000):
+    """Build this cycle's MarketSnapshot on the shared MT5 session."""
+    if not ensure_connected():
+        raise RuntimeError("❌ MT5 Initialization failed")
+
+    store = get_store(symbol, timeframe)
+    store.sync(count=count)  # only bars newer than the stored ones
+
+    positions = mt5_call("positions_get")
+    return MarketSnapshot(
+        symbol=symbol,
+        timeframe=timeframe,
+        taken_at=pd.Timestamp.now(),
+        bars=store.frame(count=count),
+        tick=mt5_call("symbol_info_tick", symbol),
+        positions=tuple(positions) if positions else (),
+        account=mt5_call("account_info"),
+    )
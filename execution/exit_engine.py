@@ -0,0 +1,202 @@
+from dataclasses import dataclass
+
+import numpy as np
+
+from utils.broker import mt5
+from indicators.macd import calculate_macd
+from indicators.rsi import calculate_rsi
+from indicators.trailing_stop import trailing_stop_array
+from execution.order_executor import get_executor, wait
+from ml.predict_exit_probability import predict_exit_probabilities
+from strategies.ensemble import should_exit_array
+from utils.notifier import send_alert
+
+# Bars the exit indicators read (snapshot.bars.tail(100))
+EXIT_WINDOW = 100
+
+
+# === Features: market part once per cycle, position part as arrays ===
+def market_features(bars):
+    """Exit model inputs shared by every position, from the last EXIT_WINDOW bars of the snapshot."""
+    df = bars.tail(EXIT_WINDOW).reset_index(drop=True)
+    close = df["close"]
+    rsi = calculate_rsi(close, period=14).iloc[-1]
+    macd_line, macd_signal, macd_hist = calculate_macd(close)
+    return {
+        "rsi": rsi,
+        "rsi14": rsi,
+        "macd": macd_line.iloc[-1],
+        "macd_line": macd_line.iloc[-1],
+        "macd_signal": macd_signal.iloc[-1],
+        "macd_hist": macd_hist.iloc[-1],
+        "body_ratio": abs(close.iloc[-1] - df["open"].iloc[-1]) / (df["high"].iloc[-1] - df["low"].iloc[-1] + 1e-6),
+        "trend_strength": (close.iloc[-1] - close.iloc[-10]) / 10,
+    }
+
+
+def position_arrays(positions):
+    """Column arrays of MT5 positions (one entry per position, in order)."""
+    return {
+        "ticket": np.array([p.ticket for p in positions], dtype=np.int64),
+        "direction": np.array([1 if p.type == mt5.ORDER_TYPE_BUY else -1 for p in positions], dtype=np.int64),
+        "entry": np.array([p.price_open for p in positions], dtype=np.float64),
+        "sl": np.array([p.sl or 0 for p in positions], dtype=np.float64),
+        "tp": np.array([p.tp for p in positions], dtype=np.float64),
+        "volume": np.array([p.volume for p in positions], dtype=np.float64),
+        "magic": np.array([p.magic for p in positions], dtype=np.int64),
+        "open_time": np.array([p.time for p in positions], dtype=np.int64),
+    }
+
+
+def exit_matrix(market, direction, entry, price, elapsed_minutes):
+    """
+    Exit model input for n positions as a dict of columns: the market
+    features broadcast, plus direction, entry, elapsed time and unrealized
+    PnL (%) per position. The model's runner picks the columns it was trained on.
+    """
+    n = len(direction)
+    columns = {name: np.full(n, value, dtype=np.float64) for name, value in market.items()}
+    columns["direction"] = np.asarray(direction, dtype=np.float64)
+    columns["entry_price"] = np.asarray(entry, dtype=np.float64)
+    columns["elapsed_time"] = np.asarray(elapsed_minutes, dtype=np.float64)
+    columns["unrealized_pnl"] = (price - entry) / entry * 100 * direction
+    return columns
+
+
+def score(columns):
+    """P(win) per row from one exit model call; NaN for every row if the model fails."""
+    try:
+        return np.asarray(predict_exit_probabilities(columns), dtype=np.float64)
+    except Exception as e:
+        print(f"⚠️ ML exit model failed: {e}")
+        return np.full(len(columns["direction"]), np.nan)
+
+
+# === Plan ===
+@dataclass
+class ExitPlan:
+    """Per-position exit decisions of one cycle (arrays aligned with `positions`)."""
+    symbol: str
+    positions: dict     # position_arrays()
+    price: float        # bid the trailing stop and closes use
+    p_win: np.ndarray
+    new_sl: np.ndarray  # NaN = keep the current SL
+    close: np.ndarray   # bool
+
+    def __len__(self):
+        return len(self.positions["ticket"])
+
+    def modify_requests(self):
+        """SL updates for positions that stay open."""
+        pos = self.positions
+        rows = np.flatnonzero(~np.isnan(self.new_sl) & ~self.close)
+        return [
+            {
+                "action": mt5.TRADE_ACTION_SLTP,
+                "position": int(pos["ticket"][i]),
+                "sl": round(float(self.new_sl[i]), 2),
+                "tp": float(pos["tp"][i]),
+            }
+            for i in rows
+        ]
+
+    def close_requests(self):
+        pos = self.positions
+        return [
+            {
+                "action": mt5.TRADE_ACTION_DEAL,
+                "symbol": self.symbol,
+                "volume": round(float(pos["volume"][i]), 2),
+                "type": mt5.ORDER_TYPE_SELL if pos["direction"][i] == 1 else mt5.ORDER_TYPE_BUY,
+                "position": int(pos["ticket"][i]),
+                "price": self.price,
+                "deviation": 10,
+                "magic": int(pos["magic"][i]),
+                "comment": "Exit via ML/Indicators",
+                "type_time": mt5.ORDER_TIME_GTC,
+                "type_filling": mt5.ORDER_FILLING_IOC
+            }
+            for i in np.flatnonzero(self.close)
+        ]
+
+
+def plan_exits(snapshot, symbol=None, trailing_distance=100, magic=None):
+    """
+    Trailing-stop and ML/indicator exit decisions for every open position of
+    `symbol` (opened with `magic`, if given) at once: one feature matrix from
+    the snapshot, one model call. None when there is nothing to evaluate.
+    """
+    symbol = symbol or snapshot.symbol
+    positions = snapshot.positions_for(symbol)
+    if magic is not None:
+        positions = tuple(p for p in positions if p.magic == magic)
+    if not positions or not snapshot.tick or snapshot.bars is None or len(snapshot.bars) == 0:
+        return None
+
+    pos = position_arrays(positions)
+    price = snapshot.tick.bid
+    market = market_features(snapshot.bars)
+
+    # === Trailing stop: only ever tightens ===
+    new_sl = trailing_stop_array(pos["entry"], price, pos["direction"], distance=trailing_distance)
+    tightens = np.where(pos["direction"] == 1, new_sl > pos["sl"], new_sl < pos["sl"]) | (pos["sl"] == 0)
+    new_sl = np.where(tightens, new_sl, np.nan)
+
+    # === ML / indicator exit ===
+    elapsed = (snapshot.tick.time - pos["open_time"]) / 60
+    p_win = score(exit_matrix(market, pos["direction"], pos["entry"], price, elapsed))
+    close = should_exit_array(pos["direction"], p_win, market["rsi"], market["macd"], market["macd_signal"])
+    close &= ~np.isnan(p_win)  # a failed model call never closes
+
+    return ExitPlan(symbol, pos, price, p_win, new_sl, close)
+
+
+# === Execution ===
+def _done(result):
+    return result is not None and result.retcode == mt5.TRADE_RETCODE_DONE
+
+
+def execute(plan, signal_at=None):
+    """
+    Submit the plan's closes and SL updates to the order executor together,
+    wait for them and report them in one alert. Returns (close_results, modify_results).
+    """
+    closes, modifies = plan.close_requests(), plan.modify_requests()
+    executor = get_executor()
+    futures = executor.submit_many("close", closes, signal_at) + executor.submit_many("modify", modifies, signal_at)
+    results = [order.result for order in wait(futures)]
+    close_results, modify_results = results[:len(closes)], results[len(closes):]
+
+    side = {1: "BUY", -1: "SELL"}
+    lines = []
+    for request, result in zip(closes, close_results):
+        direction = -1 if request["type"] == mt5.ORDER_TYPE_BUY else 1
+        if _done(result):
+            lines.append(f"✅ Trade Closed: {plan.symbol} {side[direction]} @ {plan.price:.2f}")
+        elif result:
+            print(f"❌ Close failed: {result.retcode} → {result.comment}")
+        else:
+            print(f"❌ Close failed: {mt5.last_error()}")
+    for request, result in zip(modifies, modify_results):
+        if _done(result):
+            lines.append(f"🔒 SL Updated: ticket {request['position']} → {request['sl']:.2f}")
+        else:
+            print(f"❌ Failed SL update: {result.retcode if result else mt5.last_error()}")
+
+    if lines:
+        msg = "\n".join(lines)
+        print(msg)
+        send_alert(msg)
+    return close_results, modify_results
+
+
+def run_exits(snapshot, symbol=None, trailing_distance=100, magic=None):
+    """plan_exits + execute for one cycle. Returns the plan (None without positions)."""
+    plan = plan_exits(snapshot, symbol, trailing_distance, magic)
+    if plan is None:
+        return None
+    p_win = plan.p_win[~np.isnan(plan.p_win)]
+    if len(p_win):
+        print(f"🧠 P(win) {p_win.min():.2f}–{p_win.max():.2f} over {len(plan)} positions")
+    execute(plan)
+    return plan
@@ -1,8 +1,11 @@
-import MetaTrader5 as mt5
+from utils.broker import mt5
+import numpy as np
 import pandas as pd
+from data.snapshot import take_snapshot
+from execution.exit_engine import exit_matrix, market_features, score
+from execution.order_executor import get_executor, wait
 from utils.notifier import send_alert
 from logs.logger import log_exit
-from ml.exit_predictor import predict_exit_probability
 
 open_positions = {}
 
@@ -17,94 +20,69 @@ def track_trade(ticket, symbol, direction, entry_price, sl, tp, lot=0.1):
         "open_time": pd.Timestamp.now()
     }
 
-def get_rsi14(symbol):
-    bars = mt5.copy_rates_from_pos(symbol, mt5.TIMEFRAME_M15, 0, 100)
-    df = pd.DataFrame(bars)
-    from indicators.rsi import calculate_rsi
-    df["rsi"] = calculate_rsi(df["close"], 14)
-    return df["rsi"].iloc[-1]
-
-def get_macd_hist(symbol):
-    bars = mt5.copy_rates_from_pos(symbol, mt5.TIMEFRAME_M15, 0, 100)
-    df = pd.DataFrame(bars)
-    from indicators.macd import calculate_macd
-    _, _, hist = calculate_macd(df["close"])
-    return hist.iloc[-1]
+def _close_request(ticket, data):
+    return {
+        "action": mt5.TRADE_ACTION_DEAL,
+        "symbol": data["symbol"],
+        "volume": data["lot"],
+        "type": mt5.ORDER_TYPE_SELL if data["direction"] == 1 else mt5.ORDER_TYPE_BUY,
+        "position": ticket,
+        "magic": 123456,
+        "deviation": 10,
+    }
 
-def manage_exits():
-    positions = mt5.positions_get()
-    if positions is None:
+def manage_exits(snapshot=None, symbol="XAUUSDc"):
+    """SL/TP and ML exits for every tracked position at once: one model call, closes sent as one batch."""
+    snapshot = snapshot or take_snapshot(symbol)
+    if not snapshot.positions or not snapshot.tick:
         return
 
-    for pos in positions:
-        ticket = pos.ticket
-        if ticket not in open_positions:
-            continue
-
-        data = open_positions[ticket]
-        price = mt5.symbol_info_tick(data["symbol"]).bid if data["direction"] == 1 else mt5.symbol_info_tick(data["symbol"]).ask
-        hit = None
-
-        # Check SL/TP hits
-        if data["direction"] == 1:
-            if price <= data["sl"]:
-                hit = "SL"
-            elif price >= data["tp"]:
-                hit = "TP"
-        else:
-            if price >= data["sl"]:
-                hit = "SL"
-            elif price <= data["tp"]:
-                hit = "TP"
-
-        if hit:
-            pnl = (price - data["entry"]) * data["lot"] * 100 if data["direction"] == 1 else (data["entry"] - price) * data["lot"] * 100
-            msg = (
-                f"💰 Exit {hit} | {data['symbol']} {('BUY' if data['direction'] == 1 else 'SELL')}\n"
-                f"Entry: {data['entry']:.2f} | Exit: {price:.2f} | PnL: ${pnl:.2f}"
-            )
-            send_alert(msg)
-            log_exit(ticket, data['symbol'], data['direction'], data['entry'], price, hit, pnl)
-
-            mt5.order_send(mt5.OrderSendRequest(
-                action=mt5.TRADE_ACTION_DEAL,
-                symbol=data["symbol"],
-                volume=data["lot"],
-                type=mt5.ORDER_TYPE_SELL if data["direction"] == 1 else mt5.ORDER_TYPE_BUY,
-                position=ticket,
-                magic=123456,
-                deviation=10
-            ))
-            del open_positions[ticket]
-            continue
+    tickets = [pos.ticket for pos in snapshot.positions_for() if pos.ticket in open_positions]
+    if not tickets:
+        return
+    tracked = [open_positions[ticket] for ticket in tickets]
 
-        # === ML-Based Dynamic Exit Logic ===
-        elapsed_minutes = (pd.Timestamp.now() - data["open_time"]).total_seconds() / 60
-        pnl_pct = (price - data["entry"]) / data["entry"] * 100 * data["direction"]
+    direction = np.array([data["direction"] for data in tracked])
+    entry = np.array([data["entry"] for data in tracked], dtype=float)
+    sl = np.array([data["sl"] for data in tracked], dtype=float)
+    tp = np.array([data["tp"] for data in tracked], dtype=float)
+    lot = np.array([data["lot"] for data in tracked], dtype=float)
+    buy = direction == 1
+    price = np.where(buy, snapshot.bid, snapshot.ask)
 
-        snapshot = {
-            "elapsed_time": elapsed_minutes,
-            "unrealized_pnl": pnl_pct,
-            "direction": data["direction"],
-            "rsi14": get_rsi14(data["symbol"]),
-            "macd_hist": get_macd_hist(data["symbol"])
-        }
+    # Check SL/TP hits
+    sl_hit = np.where(buy, price <= sl, price >= sl)
+    tp_hit = ~sl_hit & np.where(buy, price >= tp, price <= tp)
+    reason = np.full(len(tickets), "", dtype=object)
+    reason[sl_hit], reason[tp_hit] = "SL", "TP"
 
-        p_win = predict_exit_probability(snapshot)
+    # === ML-Based Dynamic Exit Logic (positions without a hit, one model call) ===
+    live = reason == ""
+    p_win = np.full(len(tickets), np.nan)
+    if live.any():
+        now = pd.Timestamp.now()
+        elapsed = np.array([(now - data["open_time"]).total_seconds() / 60 for data in tracked])
+        market = market_features(snapshot.bars)
+        p_win[live] = score(exit_matrix(market, direction[live], entry[live], price[live], elapsed[live]))
+    reason[live & (p_win < 0.35)] = "ML_EXIT"
 
-        if p_win < 0.35:
-            pnl = pnl_pct * data["lot"]
-            msg = f"⚠️ ML Exit: P(win)={p_win:.2f} | {data['symbol']} {'BUY' if data['direction']==1 else 'SELL'}"
-            send_alert(msg)
-            log_exit(ticket, data['symbol'], data['direction'], data['entry'], price, "ML_EXIT", pnl)
+    rows = np.flatnonzero(reason != "")
+    if not len(rows):
+        return
+    wait(get_executor().submit_many("close", [_close_request(tickets[i], tracked[i]) for i in rows]))
 
-            mt5.order_send(mt5.OrderSendRequest(
-                action=mt5.TRADE_ACTION_DEAL,
-                symbol=data["symbol"],
-                volume=data["lot"],
-                type=mt5.ORDER_TYPE_SELL if data["direction"] == 1 else mt5.ORDER_TYPE_BUY,
-                position=ticket,
-                magic=123456,
-                deviation=10
-            ))
-            del open_positions[ticket]
+    lines = []
+    for i in rows:
+        data, side = tracked[i], "BUY" if direction[i] == 1 else "SELL"
+        if reason[i] == "ML_EXIT":
+            pnl = (price[i] - entry[i]) / entry[i] * 100 * direction[i] * lot[i]
+            lines.append(f"⚠️ ML Exit: P(win)={p_win[i]:.2f} | {data['symbol']} {side}")
+        else:
+            pnl = (price[i] - entry[i]) * direction[i] * lot[i] * 100
+            lines.append(
+                f"💰 Exit {reason[i]} | {data['symbol']} {side}\n"
+                f"Entry: {entry[i]:.2f} | Exit: {price[i]:.2f} | PnL: ${pnl:.2f}"
+            )
+        log_exit(tickets[i], data['symbol'], data['direction'], data['entry'], float(price[i]), str(reason[i]), float(pnl))
+        del open_positions[tickets[i]]
+    send_alert("\n".join(lines))
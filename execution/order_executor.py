@@ -0,0 +1,242 @@
+import itertools
+import queue
+import threading
+import time
+from concurrent.futures import Future, wait as wait_futures
+from dataclasses import dataclass, field
+
+from utils.broker import mt5
+from utils.latency import Histogram
+from utils.metrics import register
+from utils.mt5_connector import mt5_call
+
+WORKERS = 4        # order_send calls in flight at once
+MAX_QUEUE = 256    # submissions waiting for a worker; submit() blocks beyond this
+RETRIES = 3
+BACKOFF = 0.1      # seconds before the first retry, doubled per attempt
+
+# The server rejected the request without executing it: resend at a fresh price
+RETRY_RETCODES = {
+    10004,  # REQUOTE
+    10020,  # PRICE_CHANGED
+    10021,  # PRICE_OFF
+    10024,  # TOO_MANY_REQUESTS
+    10031,  # CONNECTION
+}
+# Outcome unknown (no reply / timed out): check the book before resending
+UNKNOWN_RETCODES = {10012}  # TIMEOUT
+
+KINDS = ("entry", "modify", "close")
+
+
+@dataclass
+class Order:
+    """One submitted request and its life cycle (wall-clock seconds)."""
+    kind: str
+    request: dict
+    id: int
+    signal_at: float
+    submitted_at: float = None  # first order_send
+    filled_at: float = None     # TRADE_RETCODE_DONE (or found executed)
+    attempts: int = 0
+    result: object = None
+    future: Future = field(default_factory=Future, repr=False)
+
+    @property
+    def done(self):
+        return self.result is not None and self.result.retcode == mt5.TRADE_RETCODE_DONE
+
+
+class OrderExecutor:
+    """
+    Submission queue drained by a bounded pool of worker threads.
+
+    `submit` returns a Future of the Order at once. Workers send it through
+    mt5_call and retry transient rejections (requote, price off, ...) at a
+    fresh price. A lost reply is only resent once the positions show the
+    order did not execute, so a retry never doubles an entry or a close.
+
+    Latency histograms per kind: queue (signal -> first send), round_trip
+    (last send -> reply) and signal_to_fill.
+    """
+
+    def __init__(self, workers=WORKERS, max_queue=MAX_QUEUE, retries=RETRIES, backoff=BACKOFF, call=mt5_call):
+        self.retries = retries
+        self.backoff = backoff
+        self.call = call
+        self._queue = queue.Queue(maxsize=max_queue)
+        self._ids = itertools.count(1)
+        self._claimed = set()  # entry tickets already matched to an order by the idempotency check
+        self._lock = threading.Lock()
+        self._in_flight = 0
+        self._idle = threading.Condition(self._lock)
+        self.histograms = {(kind, stage): Histogram() for kind in KINDS
+                           for stage in ("queue", "round_trip", "signal_to_fill")}
+        self.stats = {"submitted": 0, "filled": 0, "rejected": 0, "retries": 0, "recovered": 0, "unknown": 0}
+        self._workers = [threading.Thread(target=self._run, name=f"order-worker-{i}", daemon=True)
+                         for i in range(workers)]
+        for worker in self._workers:
+            worker.start()
+
+    # === Submission ===
+    def submit(self, kind, request, signal_at=None):
+        """Queue one order_send request ("entry", "modify" or "close"); returns a Future of its Order."""
+        if kind not in KINDS:
+            raise ValueError(f"Unknown order kind {kind!r}, expected one of {KINDS}")
+        order = Order(kind, dict(request), next(self._ids), signal_at or time.time())
+        with self._lock:
+            self._in_flight += 1
+            self.stats["submitted"] += 1
+        self._queue.put(order)
+        return order.future
+
+    def submit_many(self, kind, requests, signal_at=None):
+        signal_at = signal_at or time.time()
+        return [self.submit(kind, request, signal_at) for request in requests]
+
+    def wait_idle(self, timeout=None):
+        """Block until every submitted order has completed. True if idle."""
+        with self._idle:
+            return self._idle.wait_for(lambda: self._in_flight == 0, timeout)
+
+    def latency(self):
+        """{"kind/stage": histogram summary} of the stages with observations."""
+        return {f"{kind}/{stage}": h.summary() for (kind, stage), h in self.histograms.items() if h.count}
+
+    def samples(self):
+        """Metrics export (utils/metrics.py): counts, orders in flight and the latency histograms."""
+        out = [("order_events_total", "counter", (("event", k),), v) for k, v in self.stats.items()]
+        out.append(("orders_in_flight", "gauge", (), self._in_flight))
+        out += [("order_seconds", "histogram", (("kind", kind), ("stage", stage)), h)
+                for (kind, stage), h in self.histograms.items()]
+        return out
+
+    # === Workers ===
+    def _run(self):
+        while True:
+            order = self._queue.get()
+            try:
+                self._execute(order)
+            except Exception as e:
+                print(f"❌ Order {order.id} ({order.kind}) failed: {e}")
+            finally:
+                with self._idle:
+                    self._in_flight -= 1
+                    self._idle.notify_all()
+                if not order.future.done():
+                    order.future.set_result(order)
+
+    def _execute(self, order):
+        delay = self.backoff
+        before = self._entry_tickets(order) if order.kind == "entry" else None
+        for attempt in range(self.retries + 1):
+            order.attempts += 1
+            sent_at = time.time()
+            if order.submitted_at is None:
+                order.submitted_at = sent_at
+                self.histograms[(order.kind, "queue")].observe((sent_at - order.signal_at) * 1000)
+            order.result = self.call("order_send", order.request)
+            self.histograms[(order.kind, "round_trip")].observe((time.time() - sent_at) * 1000)
+
+            retcode = order.result.retcode if order.result is not None else None
+            if order.done:
+                break
+            if retcode is None or retcode in UNKNOWN_RETCODES:
+                executed = self._executed(order, before)
+                if executed:
+                    self.stats["recovered"] += 1
+                    break
+                if executed is None:
+                    self.stats["unknown"] += 1
+                    print(f"⚠️ Order {order.id} ({order.kind}): outcome unknown, not resent - check the terminal")
+                    break  # cannot tell: never risk a second fill
+            elif retcode not in RETRY_RETCODES:
+                break  # a definite rejection: invalid stops, no money, market closed, ...
+            if attempt == self.retries:
+                break
+            self.stats["retries"] += 1
+            time.sleep(delay)
+            delay *= 2
+            self._reprice(order.request)
+
+        if order.done:
+            order.filled_at = time.time()
+            self.histograms[(order.kind, "signal_to_fill")].observe((order.filled_at - order.signal_at) * 1000)
+            self.stats["filled"] += 1
+        else:
+            self.stats["rejected"] += 1
+        order.future.set_result(order)
+
+    # === Idempotency ===
+    def _entry_tickets(self, order):
+        positions = self.call("positions_get", symbol=order.request.get("symbol"))
+        return None if positions is None else {p.ticket for p in positions}
+
+    def _executed(self, order, before):
+        """Did an order whose reply was lost go through? Checked against the open positions (None: cannot tell)."""
+        request = order.request
+        if order.kind == "modify":
+            return False  # setting the same SL/TP again is harmless
+        if order.kind == "close":
+            still_open = self.call("positions_get", ticket=request["position"])
+            if still_open is None:  # no answer is not "still open": ask once more
+                still_open = self.call("positions_get", ticket=request["position"])
+            if still_open is None:
+                return None
+            if len(still_open):
+                return False
+            order.result = _Recovered(request)
+            return True
+
+        positions = self.call("positions_get", symbol=request.get("symbol"))
+        if positions is None or before is None:
+            return None
+        with self._lock:
+            for p in positions or ():
+                if p.ticket not in before and p.ticket not in self._claimed and p.magic == request.get("magic") \
+                        and p.type == request.get("type") and abs(p.volume - request["volume"]) < 1e-9:
+                    self._claimed.add(p.ticket)
+                    order.result = _Recovered(request, p.ticket, p.price_open)
+                    return True
+        return False
+
+    def _reprice(self, request):
+        """Market orders are resent at the current quote."""
+        if request.get("action") != mt5.TRADE_ACTION_DEAL or "price" not in request:
+            return
+        tick = self.call("symbol_info_tick", request["symbol"])
+        if tick:
+            request["price"] = tick.ask if request.get("type") == mt5.ORDER_TYPE_BUY else tick.bid
+
+
+class _Recovered:
+    """Stand-in result for an order found executed after its reply was lost."""
+
+    def __init__(self, request, order=0, price=0.0):
+        self.retcode = mt5.TRADE_RETCODE_DONE
+        self.order = order or request.get("position", 0)
+        self.price = price or request.get("price", 0.0)
+        self.volume = request.get("volume", 0.0)
+        self.comment = "Executed (reply lost)"
+        self.request = request
+
+
+def wait(futures, timeout=None):
+    """Orders of `futures`, in order, once all have completed."""
+    wait_futures(futures, timeout=timeout)
+    return [f.result() for f in futures]
+
+
+_executor = None
+_executor_lock = threading.Lock()
+
+
+def get_executor():
+    """Process-wide OrderExecutor (workers started on first use)."""
+    global _executor
+    if _executor is None:
+        with _executor_lock:
+            if _executor is None:
+                _executor = OrderExecutor()
+                register(_executor.samples)
+    return _executor
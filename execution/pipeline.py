@@ -0,0 +1,216 @@
+import time
+
+from indicators.streaming import IndicatorEngine
+# from strategies.atr_breakout import apply_atr_breakout
+
+from models.garch_model import GarchForecaster
+from models.hmm_model import RegimeModel
+from ml.predictor import predict_trade
+from ml.model_registry import poll_models
+from strategies.ensemble import combine_signals, entry_features
+
+from data.snapshot import take_snapshot
+from execution.order_executor import wait
+from execution.position_tracker import PositionTracker
+from execution.trade_manager import open_trade, manage_open_positions
+from logs.logger import log_trade
+from utils.metrics import cycle, timer
+from utils.mt5_connector import mt5_call
+from utils.notifier import send_alert
+from utils.scheduler import BarScheduler
+from sim.signal_tracker import record_signal
+
+DATA_RETRY = 60.0  # seconds before the bar cycle retries when the terminal has too few bars
+
+
+class Pipeline:
+    """
+    The bot's cycle for one (symbol, timeframe): its own streaming
+    indicators, GARCH and HMM state and bar scheduler; ML models, the MT5
+    session and the order executor are shared with the other pipelines.
+    Positions are told apart by `magic`; their closes are recorded by a
+    PositionTracker.
+
+    `compute` (a concurrent.futures executor, set by the runner) runs the
+    GARCH, HMM and indicator updates of a bar side by side; without one
+    they run in turn.
+    """
+
+    def __init__(self, symbol="XAUUSDc", timeframe="M15", magic=234000, sl_points=150, tp_points=300,
+                 trade=True, settle=2.0, exit_every=60.0, compute=None):
+        self.symbol = symbol
+        self.timeframe = timeframe.upper()
+        self.magic = magic
+        self.sl_points = sl_points
+        self.tp_points = tp_points
+        self.trade = trade
+        self.compute = compute
+        self.name = f"{symbol}:{self.timeframe}"
+
+        # === Streaming Indicators (seeded on the first cycle, O(1) per new bar) ===
+        self.engine = IndicatorEngine()
+
+        # === GARCH(1,1) kept warm between cycles, refit on schedule / drift ===
+        self.garch = GarchForecaster(refit_every=96)
+
+        # === HMM regime: persisted per pipeline, refit daily, forward-filtered every bar ===
+        self.regime_model = RegimeModel(refit_every=96, path=f"models/hmm_regime_{symbol}_{self.timeframe}.pkl")
+
+        # === Wake at each bar close (+ settle), exits every `exit_every` seconds in between ===
+        self.scheduler = BarScheduler(self.timeframe, settle=settle, exit_every=exit_every)
+        self.last_bar = None
+
+        # === Closed positions -> "closed" journal + performance book ===
+        self.tracker = PositionTracker(symbol, self.timeframe, magic)
+
+    def __repr__(self):
+        return f"Pipeline({self.name}, magic={self.magic})"
+
+    def _timed(self, stage, job, *args):
+        with timer(stage, self.name):
+            return job(*args)
+
+    def _models(self, closed):
+        """GARCH volatility, HMM probabilities and the indicator row (with the three strategy signals) of the new bar."""
+        jobs = (("garch", self.garch.sync), ("hmm", self.regime_model.sync), ("indicators", self.engine.sync))
+        if self.compute is None:
+            return [self._timed(stage, job, closed) for stage, job in jobs]
+        futures = [self.compute.submit(self._timed, stage, job, closed) for stage, job in jobs]
+        return [f.result() for f in futures]
+
+    def on_bar(self):
+        """
+        Signal cycle on the bar that just closed; False if it is not there
+        yet, DATA_RETRY (seconds) when too few bars came back.
+        """
+        with cycle(self.name, "bar"):
+            return self._bar()
+
+    def _bar(self):
+        symbol = self.symbol
+        print(f"\n🔁 Starting new cycle ({self.name})...")
+
+        # === Newly promoted models swap in here, between cycles (loaded in the background) ===
+        poll_models()
+
+        # === Market Snapshot (bars delta, tick, positions, account — once per cycle) ===
+        with timer("fetch", self.name):
+            snapshot = take_snapshot(symbol, self.timeframe)
+        with timer("closed_positions", self.name):
+            self.tracker.sync(snapshot.positions)
+        df = snapshot.bars
+        if df is None or len(df) < 30:
+            print(f"⚠️ Insufficient data ({self.name}), retrying in {DATA_RETRY:.0f}s.")
+            return DATA_RETRY
+
+        # Last row is the still-forming bar; stateful models only consume closed bars
+        closed = snapshot.closed_bars
+
+        # === Woken before the broker has the new bar: nothing to recompute, retry shortly ===
+        if closed["time"].iloc[-1] == self.last_bar:
+            print(f"⏸️ No new closed bar yet ({self.name}).")
+            return False
+        self.last_bar = closed["time"].iloc[-1]
+
+        vol, regime_probs, last = self._models(closed)
+
+        # === GARCH Volatility Filter ===
+        print(f"📉 Forecasted Volatility: {vol:.2f}%")
+        if vol > 2.0:
+            send_alert(f"⚠️ High volatility on {symbol} — skipping trade.")
+            return
+
+        # === HMM Market Regime Detection ===
+        regime, dominant = self.regime_model.current()
+        print(f"📊 Market Regime: {regime}, Dominant: {dominant}, P(regime): {regime_probs}")
+        if regime != dominant:
+            send_alert(f"📉 Non-trending regime on {symbol} — no trades.")
+            return
+
+        regime_id = int(regime)
+
+        # === Apply Strategies ===
+        rsi2_signal = last["signal"]
+        rsi_val = last["rsi2"]
+        macd_signal = last["signal_macd_bb"]
+        structure_signal = last["signal_structure"]
+
+        # === (Optional) ATR breakout ===
+        # df = apply_atr_breakout(df)
+        # atr_signal = df.iloc[-1]["signal_atr"]
+
+        # === Ensemble Signal Logic ===
+        with timer("ensemble", self.name):
+            signal, strategy_used = combine_signals(rsi2_signal, macd_signal, structure_signal)
+
+        signal_at = time.time()  # order latency is measured from here
+
+        # === ML Prediction Filter (rejected signals are journaled too) ===
+        if signal != 0:
+            with timer("ml_filter", self.name):
+                ml_decision = predict_trade(entry_features(last, vol, regime))
+            if ml_decision == 0:
+                print("🤖 ML rejected trade.")
+                log_trade(signal, last["close"], rsi_val, sl=self.sl_points, tp=self.tp_points, symbol=symbol,
+                          strategy=strategy_used, magic=self.magic, regime=regime_id, ml_decision=0)
+                signal = 0
+
+        # === Execute Trade ===
+        entry = None
+        if signal != 0:
+            direction = "BUY" if signal == 1 else "SELL"
+            price = last["close"]
+            sl, tp = self.sl_points, self.tp_points
+
+            print(f"🚨 Signal: {direction} from {strategy_used} @ {price:.2f}")
+            send_alert(f"🚨 {strategy_used} → {direction} on {symbol} @ {price:.2f}")
+
+            if self.trade:
+                with timer("open_trade", self.name):
+                    entry = open_trade(
+                        symbol=symbol,
+                        direction=signal,
+                        sl=sl,
+                        tp=tp,
+                        strategy=strategy_used,
+                        magic=self.magic,
+                        risk_percent=1.0,
+                        snapshot=snapshot,
+                        signal_at=signal_at
+                    )
+                if entry is not None:
+                    self.tracker.expect(entry, strategy_used, regime=regime_id)
+
+            log_trade(signal, price, rsi_val, sl=sl, tp=tp, symbol=symbol, strategy=strategy_used,
+                      magic=self.magic, regime=regime_id)
+
+            record_signal(
+                timestamp=last["time"],
+                symbol=symbol,
+                direction=signal,
+                entry_price=price,
+                sl=price - sl * 0.01 if signal == 1 else price + sl * 0.01,
+                tp=price + tp * 0.01 if signal == 1 else price - tp * 0.01
+            )
+        else:
+            print(f"ℹ️ No valid signal this cycle ({self.name}).")
+
+        # === Manage Open Positions ===
+        with timer("manage_positions", self.name):
+            manage_open_positions(symbol, snapshot, magic=self.magic)
+
+        # === This cycle's entry settles before the clock moves on (other pipelines' orders don't hold it up) ===
+        if entry is not None:
+            with timer("entry_fill", self.name):
+                wait([entry])
+
+    def on_exit(self):
+        """Intra-bar exit check: trailing stops and ML exits only, no signal work."""
+        with cycle(self.name, "exit"):
+            positions = mt5_call("positions_get", symbol=self.symbol)
+            with timer("closed_positions", self.name):
+                self.tracker.sync(positions)
+            if not positions or not any(p.magic == self.magic for p in positions):
+                return
+            with timer("manage_positions", self.name):
+                manage_open_positions(self.symbol, take_snapshot(self.symbol, self.timeframe), magic=self.magic)
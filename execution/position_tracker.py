@@ -0,0 +1,128 @@
+import threading
+
+import numpy as np
+
+from analysis.performance import get_book
+from data.bar_store import get_store
+from logs.logger import log_closed
+from utils.broker import mt5
+from utils.mt5_connector import mt5_call
+
+# A closed position whose deals are not in the history yet is looked up again this many times
+LOOKUPS = 5
+
+
+class PositionTracker:
+    """
+    Notices when the pipeline's positions (symbol + magic) close, however
+    they closed (exit engine, SL/TP at the broker, by hand), and records
+    each one once: exit price and PnL from the deal history, MAE/MFE from
+    the stored bars it was open over, and the context of its entry. The
+    record goes to the "closed" journal and the performance book.
+    """
+
+    def __init__(self, symbol, timeframe="M15", magic=234000):
+        self.symbol = symbol
+        self.timeframe = timeframe
+        self.magic = magic
+        self.open = {}       # ticket -> position seen open
+        self.context = {}    # ticket -> strategy / regime / ml_decision of its entry
+        self.pending = {}    # ticket -> lookups left for a closed position
+        self._lock = threading.Lock()
+
+    def expect(self, future, strategy, regime=-1, ml_decision=1):
+        """Entry context for the position an entry order (Future of an Order) opens."""
+        def remember(f):
+            order = f.result()
+            if order.done and order.result.order:
+                with self._lock:
+                    self.context[order.result.order] = {"strategy": strategy, "regime": regime,
+                                                        "ml_decision": ml_decision}
+        future.add_done_callback(remember)
+
+    def sync(self, positions):
+        """Compare with the positions open now (positions_get / snapshot); returns the trades recorded."""
+        if positions is None:
+            return []  # the broker did not answer: nothing can be told
+        current = {p.ticket: p for p in positions if p.symbol == self.symbol and p.magic == self.magic}
+        with self._lock:
+            for ticket, p in current.items():
+                self.open[ticket] = p
+                self.pending.pop(ticket, None)  # a snapshot older than the fill had missed it
+            # Gone since the last sync, or filled and closed in between (known only by its context)
+            for ticket in (self.open.keys() | self.context.keys()) - current.keys() - self.pending.keys():
+                self.pending[ticket] = LOOKUPS
+            closing = list(self.pending)
+        return [trade for trade in map(self._record, closing) if trade is not None]
+
+    def _record(self, ticket):
+        deals = mt5_call("history_deals_get", position=ticket) or ()
+        entries = [d for d in deals if d.entry == mt5.DEAL_ENTRY_IN]
+        exits = [d for d in deals if d.entry == mt5.DEAL_ENTRY_OUT]
+        with self._lock:
+            if not exits:
+                self.pending[ticket] -= 1
+                if self.pending[ticket] <= 0:
+                    if ticket in self.open:
+                        print(f"⚠️ No deal history for closed position {ticket}; not recorded")
+                    self._forget(ticket)
+                return None
+            position = self.open.get(ticket)
+            context = self.context.get(ticket) or {}
+            self._forget(ticket)
+        if not entries and position is None:
+            return None
+
+        # Entry side from the deals, else from the position as last seen
+        if entries:
+            direction = 1 if entries[0].type == mt5.DEAL_TYPE_BUY else -1
+            volume = sum(d.volume for d in entries)
+            entry_price = sum(d.price * d.volume for d in entries) / volume
+            opened_at, comment = min(d.time for d in entries), entries[0].comment
+        else:
+            direction = 1 if position.type == mt5.ORDER_TYPE_BUY else -1
+            volume, entry_price = position.volume, position.price_open
+            opened_at, comment = position.time, position.comment
+        closed_volume = sum(d.volume for d in exits)
+        exit_price = sum(d.price * d.volume for d in exits) / closed_volume if closed_volume else exits[-1].price
+        closed_at = max(d.time for d in exits)
+        pnl = sum(d.profit + d.commission + d.swap for d in exits)
+        mae, mfe = self._excursions(opened_at, closed_at, direction, entry_price, exit_price)
+
+        trade = {
+            "timestamp": int(closed_at) * 1000,
+            "open_time": int(opened_at) * 1000,
+            "ticket": ticket,
+            "magic": self.magic,
+            "symbol": self.symbol,
+            "strategy": context.get("strategy") or comment.removeprefix("Entry via ").strip(),
+            "regime": context.get("regime", -1),
+            "ml_decision": context.get("ml_decision", 1),
+            "direction": direction,
+            "volume": volume,
+            "entry_price": entry_price,
+            "exit_price": exit_price,
+            "pnl": pnl,
+            "mae": mae,
+            "mfe": mfe,
+            "reason": exits[-1].comment,
+        }
+        log_closed(**trade)
+        get_book().add(trade)
+        print(f"📒 Closed {self.symbol} #{ticket}: PnL {pnl:.2f} (MAE {mae:.2f} / MFE {mfe:.2f})")
+        return trade
+
+    def _forget(self, ticket):
+        self.open.pop(ticket, None)
+        self.context.pop(ticket, None)
+        self.pending.pop(ticket, None)
+
+    def _excursions(self, opened_at, closed_at, direction, entry, exit_price):
+        """Worst adverse / best favourable move (price distance) over the stored bars wholly inside the trade."""
+        store = get_store(self.symbol, self.timeframe)
+        bars = store.columns(start=opened_at, end=closed_at - store.tf_seconds + 1, columns=["high", "low"])
+        high = max(float(np.max(bars["high"])) if len(bars["high"]) else exit_price, entry, exit_price)
+        low = min(float(np.min(bars["low"])) if len(bars["low"]) else exit_price, entry, exit_price)
+        if direction == 1:
+            return entry - low, high - entry
+        return high - entry, entry - low
@@ -0,0 +1,124 @@
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor, wait as wait_futures
+
+from utils.broker import BACKEND, ReplayFinished, now, sleep
+from utils.metrics import register
+from utils.notifier import send_alert
+
+# Threads for the per-bar GARCH / HMM / indicator updates of all pipelines
+# (numpy, scipy and arch release the GIL in their heavy loops)
+COMPUTE_WORKERS = min(8, os.cpu_count() or 2)
+MAX_IDLE = 1.0  # live: longest wait between due checks
+
+
+class Runner:
+    """
+    Drives several Pipelines (execution/pipeline.py) in one process.
+
+    Each pipeline cycle runs on its own slot of a thread pool, so a slow
+    symbol only delays itself: a pipeline still busy when its next deadline
+    comes is picked up once it finishes (its scheduler reports the missed
+    deadline / skipped bars). A pipeline that raises is reported and runs
+    again at its next deadline; the other pipelines are not affected.
+
+    `lockstep` (default for the replay broker) waits for every running
+    cycle before the clock is moved on, so a replay is deterministic.
+    """
+
+    def __init__(self, pipelines, compute_workers=COMPUTE_WORKERS, lockstep=None):
+        if not pipelines:
+            raise ValueError("Runner needs at least one pipeline")
+        self.pipelines = list(pipelines)
+        self.compute = ThreadPoolExecutor(compute_workers, thread_name_prefix="compute")
+        self.cycles = ThreadPoolExecutor(len(self.pipelines), thread_name_prefix="pipeline")
+        for pipeline in self.pipelines:
+            pipeline.compute = self.compute
+        self.lockstep = BACKEND == "sim" if lockstep is None else lockstep
+        self.stats = {"cycles": 0, "errors": 0, "busy": 0}
+        self._running = {}  # pipeline -> Future of its current cycle
+        self._behind = set()  # due while still busy with the previous cycle
+        self._wake = threading.Event()
+        register(self.samples)
+
+    # === Cycles ===
+    def _submit(self, pipeline, fn, *args):
+        future = self.cycles.submit(fn, *args)
+        future.add_done_callback(lambda _: self._wake.set())
+        self._running[pipeline] = future
+
+    def _reap(self):
+        """Collect finished cycles; errors are reported per pipeline, the end of a replay stops the runner."""
+        for pipeline, future in list(self._running.items()):
+            if not future.done():
+                continue
+            del self._running[pipeline]
+            self.stats["cycles"] += 1
+            error = future.exception()
+            if isinstance(error, (ReplayFinished, KeyboardInterrupt)):
+                raise error
+            if error is not None:
+                self.stats["errors"] += 1
+                print(f"❌ {pipeline.name} cycle failed: {error}")
+                send_alert(f"❌ Bot error on {pipeline.name}: {error}")
+                pipeline.scheduler.start(now())  # the failed deadline is dropped, next close as usual
+
+    def run(self):
+        """Loop forever (until the broker or a KeyboardInterrupt stops it)."""
+        try:
+            for pipeline in self.pipelines:
+                self._submit(pipeline, pipeline.scheduler.begin, pipeline.on_bar)
+
+            while True:
+                self._wake.clear()
+                self._reap()
+                t = now()
+                for pipeline in self.pipelines:
+                    scheduler = pipeline.scheduler
+                    kind = scheduler.due(t)
+                    if kind is None:
+                        continue
+                    if pipeline in self._running:
+                        if pipeline not in self._behind:
+                            self._behind.add(pipeline)
+                            self.stats["busy"] += 1  # picked up once the current cycle is done
+                        continue
+                    self._behind.discard(pipeline)
+                    self._submit(pipeline, scheduler.fire, kind,
+                                 pipeline.on_bar if kind == "bar" else pipeline.on_exit)
+
+                if self.lockstep:
+                    if self._running:
+                        wait_futures(list(self._running.values()))
+                        continue
+                    wait = min(p.scheduler.next_due() for p in self.pipelines) - now()
+                    if wait > 0:
+                        sleep(wait)
+                    continue
+
+                next_due = min((p.scheduler.next_due() for p in self.pipelines if p not in self._running),
+                               default=float("inf"))
+                self._wake.wait(min(max(next_due - now(), 0), MAX_IDLE))
+        finally:
+            self.cycles.shutdown(wait=False, cancel_futures=True)
+            self.compute.shutdown(wait=False, cancel_futures=True)
+
+    def samples(self):
+        """Metrics export (utils/metrics.py): runner counts and each scheduler's counts, budgets and lateness."""
+        out = [("runner_events_total", "counter", (("event", k),), v) for k, v in self.stats.items()]
+        for pipeline in self.pipelines:
+            scheduler = pipeline.scheduler
+            out += [("scheduler_events_total", "counter", (("pipeline", pipeline.name), ("event", k)), v)
+                    for k, v in scheduler.stats.items()]
+            for kind, budget in scheduler.budgets.items():
+                labels = (("pipeline", pipeline.name), ("kind", kind))
+                out.append(("cycle_budget_seconds", "gauge", labels, float(budget)))
+                out.append(("cycle_lateness_seconds", "histogram", labels, scheduler.lateness[kind]))
+        return out
+
+    def report(self):
+        """Runner counts, then each pipeline's scheduler report."""
+        lines = [", ".join(f"{k}={v}" for k, v in self.stats.items())]
+        for pipeline in self.pipelines:
+            lines.append(f"[{pipeline.name}] " + pipeline.scheduler.report().replace("\n", f"\n[{pipeline.name}] "))
+        return "\n".join(lines)
@@ -1,15 +1,16 @@
-import MetaTrader5 as mt5
-import pandas as pd
+from utils.broker import mt5
 
+from data.snapshot import take_snapshot
+from utils.mt5_connector import mt5_call
 from utils.notifier import send_alert
 from utils.risk import calculate_lot_size
-from indicators.trailing_stop import calculate_trailing_stop
-from indicators.rsi import calculate_rsi
-from indicators.macd import calculate_macd
-from ml.predict_exit_probability import predict_exit_probability  # << ML model
+from execution.exit_engine import run_exits
+from execution.order_executor import get_executor
 
-def open_trade(symbol="XAUUSDc", direction=1, sl=150, tp=300, strategy="Unknown", magic=234000, risk_percent=1.0):
-    account = mt5.account_info()
+def open_trade(symbol="XAUUSDc", direction=1, sl=150, tp=300, strategy="Unknown", magic=234000, risk_percent=1.0, snapshot=None,
+               signal_at=None):
+    """Submit a market entry; returns a Future of its executed Order (None if no order was sent)."""
+    account = snapshot.account if snapshot else mt5_call("account_info")
     if account is None:
         print("❌ Account info not available.")
         return
@@ -20,7 +21,7 @@ def open_trade(symbol="XAUUSDc", direction=1, sl=150, tp=300, strategy="Unknown"
         print("⚠️ Invalid lot size.")
         return
 
-    tick = mt5.symbol_info_tick(symbol)
+    tick = snapshot.tick if snapshot else mt5_call("symbol_info_tick", symbol)
     if not tick:
         print("❌ Failed to get tick data.")
         return
@@ -44,122 +45,42 @@ def open_trade(symbol="XAUUSDc", direction=1, sl=150, tp=300, strategy="Unknown"
         "type_filling": mt5.ORDER_FILLING_IOC
     }
 
-    result = mt5.order_send(request)
-    if result.retcode == mt5.TRADE_RETCODE_DONE:
-        msg = f"✅ Trade Opened: {symbol} {'BUY' if direction==1 else 'SELL'} @ {price:.2f} | SL: {sl_price:.2f} | TP: {tp_price:.2f}"
-        print(msg)
-        send_alert(msg)
-    else:
-        msg = f"❌ Trade Failed: {result.retcode} → {result.comment}"
-        print(msg)
-        send_alert(msg)
-
-
-def manage_open_positions(symbol="XAUUSDc"):
-    positions = mt5.positions_get(symbol=symbol)
-    if not positions:
+    def report(future):
+        result = future.result().result
+        if result is None:
+            print(f"❌ Trade Failed: order_send returned None → {mt5.last_error()}")
+            return
+        if result.retcode == mt5.TRADE_RETCODE_DONE:
+            msg = f"✅ Trade Opened: {symbol} {'BUY' if direction==1 else 'SELL'} @ {price:.2f} | SL: {sl_price:.2f} | TP: {tp_price:.2f}"
+            print(msg)
+            send_alert(msg)
+        else:
+            msg = f"❌ Trade Failed: {result.retcode} → {result.comment}"
+            print(msg)
+            send_alert(msg)
+
+    # Sent by the order executor's workers; the cycle carries on meanwhile
+    future = get_executor().submit("entry", request, signal_at)
+    future.add_done_callback(report)
+    return future
+
+
+def manage_open_positions(symbol="XAUUSDc", snapshot=None, magic=None):
+    """
+    Trail SLs and run the ML/indicator exit for `symbol` (only positions
+    opened with `magic`, if given), batched over all positions (execution/exit_engine.py).
+    """
+    snapshot = snapshot or take_snapshot(symbol)
+    if not [p for p in snapshot.positions_for(symbol) if magic is None or p.magic == magic]:
         print("📭 No open positions.")
         return
 
-    tick = mt5.symbol_info_tick(symbol)
-    if not tick:
+    if not snapshot.tick:
         print("❌ Failed to get current price tick.")
         return
 
-    last_price = tick.bid
-
-    bars = mt5.copy_rates_from_pos(symbol, mt5.TIMEFRAME_M15, 0, 100)
-    if bars is None or len(bars) == 0:
+    if snapshot.bars is None or len(snapshot.bars) == 0:
         print("❌ Failed to fetch OHLCV.")
         return
 
-    df = pd.DataFrame(bars)
-    df["rsi"] = calculate_rsi(df["close"], period=14)
-    macd_line, macd_signal, _ = calculate_macd(df["close"])
-    df["macd"] = macd_line
-    df["macd_signal"] = macd_signal
-
-    rsi_now = df["rsi"].iloc[-1]
-    macd_now = df["macd"].iloc[-1]
-    signal_now = df["macd_signal"].iloc[-1]
-
-    for pos in positions:
-        ticket = pos.ticket
-        direction = 1 if pos.type == mt5.ORDER_TYPE_BUY else -1
-        entry = pos.price_open
-        tp = pos.tp
-        current_sl = pos.sl or 0
-        current_magic = pos.magic
-
-        # === Trailing Stop ===
-        new_sl = calculate_trailing_stop(entry, last_price, direction, distance=100)
-
-        if new_sl:
-            should_update_sl = (
-                (direction == 1 and (current_sl == 0 or new_sl > current_sl)) or
-                (direction == -1 and (current_sl == 0 or new_sl < current_sl))
-            )
-
-            if should_update_sl:
-                sl_request = {
-                    "action": mt5.TRADE_ACTION_SLTP,
-                    "position": ticket,
-                    "sl": round(new_sl, 2),
-                    "tp": tp,
-                }
-
-                sl_result = mt5.order_send(sl_request)
-                if sl_result.retcode == mt5.TRADE_RETCODE_DONE:
-                    msg = f"🔒 SL Updated: ticket {ticket} → {new_sl:.2f}"
-                    print(msg)
-                    send_alert(msg)
-                else:
-                    print(f"❌ Failed SL update: {sl_result.retcode}")
-
-        # === ML Exit Logic ===
-        try:
-            body_ratio = abs(df["close"].iloc[-1] - df["open"].iloc[-1]) / (df["high"].iloc[-1] - df["low"].iloc[-1] + 1e-6)
-            trend_strength = (df["close"].iloc[-1] - df["close"].iloc[-10]) / 10
-
-            features = {
-                "rsi": rsi_now,
-                "macd": macd_now,
-                "macd_signal": signal_now,
-                "body_ratio": body_ratio,
-                "trend_strength": trend_strength
-            }
-
-            p_win = predict_exit_probability(features)
-            print(f"🧠 P(win) = {p_win:.2f} | Ticket {ticket}")
-
-            should_exit = p_win < 0.4 or (
-                (direction == 1 and macd_now < signal_now and rsi_now > 70) or
-                (direction == -1 and macd_now > signal_now and rsi_now < 30)
-            )
-        except Exception as e:
-            print(f"⚠️ ML exit model failed: {e}")
-            should_exit = False
-
-        # === Close if Needed ===
-        if should_exit:
-            close_request = {
-                "action": mt5.TRADE_ACTION_DEAL,
-                "symbol": symbol,
-                "volume": round(pos.volume, 2),
-                "type": mt5.ORDER_TYPE_SELL if direction == 1 else mt5.ORDER_TYPE_BUY,
-                "position": ticket,
-                "price": last_price,
-                "deviation": 10,
-                "magic": current_magic,
-                "comment": "Exit via ML/Indicators",
-                "type_time": mt5.ORDER_TIME_GTC,
-                "type_filling": mt5.ORDER_FILLING_IOC
-            }
-
-            close_result = mt5.order_send(close_request)
-            if close_result.retcode == mt5.TRADE_RETCODE_DONE:
-                msg = f"✅ Trade Closed: {symbol} {'BUY' if direction==1 else 'SELL'} @ {last_price:.2f}"
-                print(msg)
-                send_alert(msg)
-            else:
-                print(f"❌ Close failed: {close_result.retcode} → {close_result.comment}")
+    return run_exits(snapshot, symbol, magic=magic)
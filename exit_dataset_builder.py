@@ -1,120 +1,72 @@
 import pandas as pd
-import MetaTrader5 as mt5
-from datetime import datetime, timedelta
-import numpy as np
 import os
 
+from data.bar_store import TIMEFRAMES
+from features.dataset_builder import bar_index, load_bars, model_paths
+from features.labeling import label_trades, trade_direction
+from logs.journal import load as load_journal
+
 from indicators.rsi import calculate_rsi
 from indicators.macd import calculate_macd
 from indicators.atr import calculate_atr
-from models.garch_model import forecast_garch_volatility
-from models.hmm_model import detect_market_regime
 
 # === CONFIG ===
 SYMBOL = "XAUUSDc"
-TIMEFRAME = mt5.TIMEFRAME_M15
-LOOKBACK = 100  # bars before and after entry to analyze
-
-# === Init MT5 ===
-if not mt5.initialize():
-    raise RuntimeError("MT5 initialization failed")
-
-# === Load Cleaned Trade Log ===
-df = pd.read_csv("logs/cleaned_trade_log.csv")
-df["timestamp"] = pd.to_datetime(df["timestamp"])
-
-exit_data = []
-
-for i, row in df.iterrows():
-    entry_time = row["timestamp"]
-    signal = str(row["signal"]).upper()
-    direction = 1 if signal == "BUY" else -1
-    entry_price = float(row["entry_price"])
-    sl = float(row["sl"])
-    tp = float(row["tp"])
-
-    # Fetch candles from before to after the entry
-    candles = mt5.copy_rates_from(SYMBOL, TIMEFRAME, entry_time - timedelta(minutes=LOOKBACK * 15), LOOKBACK * 2)
-    if candles is None or len(candles) < LOOKBACK:
-        print(f"⛔ Skipping trade {i} — not enough data")
-        continue
-
-    df_candles = pd.DataFrame(candles)
-    df_candles["timestamp"] = pd.to_datetime(df_candles["time"], unit="s")
-
-    # Find entry index
-    entry_idx = df_candles[df_candles["timestamp"] >= entry_time].index.min()
-    if entry_idx is None or entry_idx + 1 >= len(df_candles):
-        continue
-
-    hit = None
-    exit_idx = None
-
-    for j in range(entry_idx + 1, len(df_candles)):
-        high = df_candles.at[j, "high"]
-        low = df_candles.at[j, "low"]
-
-        if direction == 1:
-            if high >= tp:
-                hit = 1
-                exit_idx = j
-                break
-            elif low <= sl:
-                hit = 0
-                exit_idx = j
-                break
-        else:
-            if low <= tp:
-                hit = 1
-                exit_idx = j
-                break
-            elif high >= sl:
-                hit = 0
-                exit_idx = j
-                break
-
-    # If neither TP nor SL hit → skip or mark as undecided
-    if hit is None:
-        continue  # Or set hit = -1 for decay
-
-    exit_candle = df_candles.iloc[exit_idx]
-    since_entry = (exit_idx - entry_idx)  # in candles
-
-    df_candles["rsi"] = calculate_rsi(df_candles["close"])
-    macd_line, macd_signal, _ = calculate_macd(df_candles["close"])
-    df_candles["macd_line"] = macd_line
-    df_candles["macd_signal"] = macd_signal
-    df_candles["atr"] = calculate_atr(df_candles)
-
-    snapshot = df_candles.iloc[entry_idx]
-
-    # Volatility & regime
-    numeric = df_candles[["open", "high", "low", "close", "tick_volume"]].select_dtypes(include="number")
-    try:
-        vol = forecast_garch_volatility(numeric)
-        regime, _ = detect_market_regime(numeric)
-    except:
-        vol, regime = 0, 1
-
-    exit_data.append({
-        "direction": direction,
-        "entry_price": entry_price,
-        "time_elapsed": since_entry,
-        "rsi": snapshot["rsi"],
-        "macd_line": snapshot["macd_line"],
-        "macd_signal": snapshot["macd_signal"],
-        "atr": snapshot["atr"],
-        "volatility": vol,
-        "regime": regime,
-        "label": hit  # 1 = TP, 0 = SL
-    })
-
-    print(f"✅ Trade {i} processed — {'TP' if hit==1 else 'SL'} after {since_entry} candles.")
+TIMEFRAME = "M15"
+HORIZON = 100     # bars after entry before the time barrier
+WARMUP = 1000     # bars of history before the first trade (GARCH/HMM walk-forward seed)
+TIES = "path"     # bar touching TP and SL: "sl", "tp", "path" (backtest intrabar path) or "skip"
+TIMEOUT = "drop"  # trades hitting the time barrier: "drop" or "sign" (1 if in profit)
+POINT = 0.01      # price per point (100 points = $1.00 on gold), as the pipeline's record_signal
+
+# === Load the Trade Journal (the cleaned legacy CSV log if there is no journal yet) ===
+df = load_journal("trades")
+if not df.empty:
+    # The journal also holds signals the ML filter rejected, and keeps SL / TP in points
+    df = df[df["ml_decision"] == 1].reset_index(drop=True)
+    direction = trade_direction(df["signal"])
+    entry = df["entry_price"].astype(float)
+    df["sl"] = entry - direction * df["sl"] * POINT
+    df["tp"] = entry + direction * df["tp"] * POINT
+else:
+    # The cleaned CSV already has SL / TP as price levels
+    df = pd.read_csv("logs/cleaned_trade_log.csv")
+    df["timestamp"] = pd.to_datetime(df["timestamp"])
+
+# === Load the bar history once (warm-up before, horizon after) ===
+bars = load_bars(SYMBOL, TIMEFRAME, df["timestamp"], WARMUP, after=HORIZON + 1).reset_index(drop=True)
+
+# === First touch of TP / SL / time limit for every trade at once ===
+labels = label_trades(bars, df, horizon=HORIZON, ties=TIES, timeout=TIMEOUT)
+
+# === Entry snapshot: indicators at the last bar closed before the entry ===
+close = bars["close"]
+bars["rsi"] = calculate_rsi(close)
+bars["macd_line"], bars["macd_signal"], _ = calculate_macd(close)
+bars["atr"] = calculate_atr(bars)
+bars["volatility"], bars["regime"] = model_paths(close.to_numpy(), WARMUP)
+
+snapshot = bar_index(bars["time"], df["timestamp"], TIMEFRAMES[TIMEFRAME][1])
+usable = (snapshot >= 0) & labels["label"].notna().to_numpy()
+snap = bars.iloc[snapshot[usable]].reset_index(drop=True)
+
+df_exit = pd.DataFrame({
+    "direction": trade_direction(df["signal"])[usable],
+    "entry_price": df["entry_price"].astype(float).to_numpy()[usable],
+    "time_elapsed": labels["bars_held"].to_numpy()[usable],
+    "rsi": snap["rsi"],
+    "macd_line": snap["macd_line"],
+    "macd_signal": snap["macd_signal"],
+    "atr": snap["atr"],
+    "volatility": snap["volatility"],
+    "regime": snap["regime"],
+    "label": labels["label"].to_numpy()[usable].astype(int),  # 1 = TP, 0 = SL
+})
+
+counts = labels["barrier"].value_counts().to_dict()
+print(f"✅ {len(df_exit)} of {len(df)} trades labelled — {', '.join(f'{k}: {v}' for k, v in counts.items())}")
 
 # === Save Dataset ===
-df_exit = pd.DataFrame(exit_data)
 os.makedirs("data", exist_ok=True)
 df_exit.to_csv("data/exit_dataset.csv", index=False)
 print("🎯 Exit dataset saved to data/exit_dataset.csv")
-
-mt5.shutdown()
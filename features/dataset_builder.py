@@ -0,0 +1,100 @@
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+import pandas as pd
+
+from data.bar_store import TIMEFRAMES
+from data.fetch_data import load_history
+from features.extract_features import extract_features
+from features.feature_store import alpha_store
+from models.garch_model import garch_path
+from models.hmm_model import regime_path
+
+
+def model_paths(closes, warmup=1000, refit_every=96, workers=2):
+    """Walk-forward GARCH vol and HMM regime per bar, the two streams in parallel processes."""
+    closes = np.asarray(closes, dtype=float)
+    if workers > 1:
+        with ProcessPoolExecutor(max_workers=2) as pool:
+            vol = pool.submit(garch_path, closes, warmup, refit_every)
+            regime = pool.submit(regime_path, closes, warmup, refit_every)
+            return vol.result(), regime.result()[0]
+    return garch_path(closes, warmup, refit_every), regime_path(closes, warmup, refit_every)[0]
+
+
+def bar_index(bar_times, trade_times, tf_seconds):
+    """
+    Row of the last bar that had closed at or before each trade time (-1 if
+    none). `bar_times` are bar open times, sorted; a bar closes tf_seconds later.
+    """
+    opens = pd.to_datetime(pd.Series(bar_times)).to_numpy("datetime64[s]").astype(np.int64)
+    trades = pd.to_datetime(pd.Series(trade_times)).to_numpy("datetime64[s]").astype(np.int64)
+    return np.searchsorted(opens + tf_seconds, trades, side="right") - 1
+
+
+def load_bars(symbol, timeframe, trade_times, warmup=1000, after=1):
+    """
+    Sync the store once and return every bar from `warmup` bars before the
+    first trade to `after` bars past the last one.
+    """
+    tf_seconds = TIMEFRAMES.get(timeframe.upper(), TIMEFRAMES["M15"])[1]
+    trade_times = pd.to_datetime(pd.Series(trade_times))
+    start = trade_times.min() - pd.Timedelta(seconds=tf_seconds * (warmup + 1))
+    end = trade_times.max() + pd.Timedelta(seconds=tf_seconds * after)
+    store = load_history(symbol, timeframe, start=start)
+    return store.frame(start=start, end=end)
+
+
+def build_dataset(trades, symbol="XAUUSDc", timeframe="M15", time_col="timestamp", label_col="label",
+                  warmup=1000, refit_every=96, workers=2, bars=None, store=None):
+    """
+    extract_features rows for every trade in one pass over the history.
+
+    The full bar history is loaded once, extract_features runs once over it
+    (dropna=False keeps it aligned with the bars) with walk-forward GARCH /
+    regime columns, and each trade is mapped with searchsorted to the last
+    bar closed at its timestamp, so every row only sees data from before
+    the trade. Trades without enough history are dropped.
+
+    Feature columns come from the symbol's feature store (only bars not
+    stored yet are computed) unless `bars` is passed without a `store`.
+    """
+    trades = trades.reset_index(drop=True)
+    trade_times = pd.to_datetime(trades[time_col])
+    if bars is None:
+        bars = load_bars(symbol, timeframe, trade_times, warmup)
+        store = store or alpha_store(symbol, timeframe)
+    bars = bars.reset_index(drop=True)
+
+    vol, regime = model_paths(bars["close"].to_numpy(), warmup, refit_every, workers)
+    bars["timestamp"] = bars["time"]
+    bars["garch_vol"] = vol
+    bars["regime"] = regime
+    if store is not None:
+        features = pd.concat([bars, store.features(bars)], axis=1)
+    else:
+        features = extract_features(bars, dropna=False)
+
+    tf_seconds = TIMEFRAMES.get(timeframe.upper(), TIMEFRAMES["M15"])[1]
+    idx = bar_index(bars["time"], trade_times, tf_seconds)
+    found = idx >= 0
+
+    rows = features.iloc[idx[found]].reset_index(drop=True)
+    rows["timestamp"] = trade_times[found].to_numpy()
+    rows["label"] = trades.loc[found, label_col].to_numpy()
+
+    complete = rows.drop(columns=["timestamp", "label"]).notna().all(axis=1).to_numpy()
+    skipped = len(trades) - int(complete.sum())
+    if skipped:
+        print(f"⚠️ Skipped {skipped} trades without enough history")
+    return rows[complete].reset_index(drop=True)
+
+
+def build_datasets(trades, timeframe="M15", time_col="timestamp", label_col="label", symbol_col="symbol",
+                   default_symbol="XAUUSDc", **kwargs):
+    """build_dataset per symbol (one history load each), concatenated."""
+    if symbol_col not in trades:
+        return build_dataset(trades, default_symbol, timeframe, time_col, label_col, **kwargs)
+    parts = [build_dataset(group, symbol, timeframe, time_col, label_col, **kwargs)
+             for symbol, group in trades.groupby(symbol_col)]
+    return pd.concat(parts, ignore_index=True) if parts else pd.DataFrame()
@@ -0,0 +1,226 @@
+import argparse
+import hashlib
+import inspect
+import json
+import os
+import threading
+from importlib import metadata
+
+import numpy as np
+import pandas as pd
+
+from data.bar_store import COLUMNS as BAR_COLUMNS, STORE_ROOT, get_store
+from features import extract_features as alpha_module, registry
+
+# Bars of history fed in front of the first missing row: EMA / Wilder terms
+# (spans <= 26) have decayed below float precision long before this
+CONTEXT = 500
+
+# Not features: bar columns, and inputs the consumers add from their own models
+EXCLUDE = set(BAR_COLUMNS) | {"timestamp", "garch_vol", "regime"}
+
+
+def feature_version(*objects, packages=(), **params):
+    """Short hash of the source of `objects`, installed `packages` versions and `params`."""
+    digest = hashlib.sha1()
+    for obj in objects:
+        digest.update(inspect.getsource(obj).encode())
+    for package in packages:
+        try:
+            digest.update(f"{package}=={metadata.version(package)}".encode())
+        except metadata.PackageNotFoundError:
+            digest.update(f"{package}==?".encode())
+    digest.update(json.dumps(params, sort_keys=True, default=str).encode())
+    return digest.hexdigest()[:12]
+
+
+def _epochs(times):
+    times = pd.Series(times)
+    if np.issubdtype(times.dtype, np.integer):
+        return times.to_numpy(dtype=np.int64)
+    return pd.to_datetime(times).to_numpy("datetime64[s]").astype(np.int64)
+
+
+class FeatureStore:
+    """
+    Persisted feature columns for one symbol / timeframe / feature set.
+
+    Lives next to the bars (<store>/<symbol>/<timeframe>/features/<name>/)
+    with the same layout as BarStore: one float64 .bin per column plus a
+    sorted epoch `time` column written last as the commit marker. meta.json
+    records the definition version; opening the store with a different
+    version drops every stored column, so a changed indicator is never read.
+
+    `features(bars)` returns the feature rows for `bars`, computing only the
+    bars that are not stored yet (with CONTEXT bars of history in front).
+    Rows are only persisted when `bars` holds CONTEXT bars before them, and
+    the last bar of a call never is, as it may still be forming.
+    """
+
+    def __init__(self, name, compute, version, symbol="XAUUSDc", timeframe="M15", context=CONTEXT, root=STORE_ROOT):
+        self.name = name
+        self.compute = compute
+        self.version = version
+        self.context = context
+        self.path = os.path.join(root, symbol, timeframe.upper(), "features", name)
+        self._lock = threading.Lock()
+        os.makedirs(self.path, exist_ok=True)
+        self.columns = self._open()
+
+    def _file(self, column):
+        return os.path.join(self.path, f"{column}.bin")
+
+    def _open(self):
+        meta_path = os.path.join(self.path, "meta.json")
+        meta = {}
+        if os.path.exists(meta_path):
+            with open(meta_path) as f:
+                meta = json.load(f)
+        if meta.get("version") != self.version:
+            self.invalidate()
+            return []
+        rows = self._rows()
+        for col in meta["columns"]:
+            if not os.path.exists(self._file(col)) or os.path.getsize(self._file(col)) < rows * 8:
+                self.invalidate()
+                return []
+            os.truncate(self._file(col), rows * 8)  # columns written past the last committed time
+        return meta["columns"]
+
+    def invalidate(self):
+        """Drop every stored column (definition changed)."""
+        for entry in os.listdir(self.path):
+            if entry.endswith(".bin") or entry == "meta.json":
+                os.remove(os.path.join(self.path, entry))
+        self.columns = []
+
+    def _rows(self):
+        path = self._file("time")
+        return os.path.getsize(path) // 8 if os.path.exists(path) else 0
+
+    def __len__(self):
+        return self._rows()
+
+    # === Reads ===
+    def _column(self, column, rows):
+        if rows == 0:
+            return np.empty(0, dtype=np.int64 if column == "time" else np.float64)
+        dtype = np.int64 if column == "time" else np.float64
+        return np.memmap(self._file(column), dtype=dtype, mode="r", shape=(rows,))
+
+    def times(self):
+        return self._column("time", len(self))
+
+    def read(self, times):
+        """Stored rows for `times` (epoch seconds or datetimes), NaN where absent."""
+        epochs = _epochs(times)
+        stored = self.times()
+        pos = np.searchsorted(stored, epochs)
+        found = pos < len(stored)
+        found[found] = stored[pos[found]] == epochs[found]
+        out = {}
+        rows = len(stored)
+        for col in self.columns:
+            values = np.full(len(epochs), np.nan)
+            values[found] = self._column(col, rows)[pos[found]]
+            out[col] = values
+        return pd.DataFrame(out, columns=self.columns, index=pd.RangeIndex(len(epochs)))
+
+    # === Writes ===
+    def _write(self, epochs, frame):
+        with self._lock:
+            if not self.columns:
+                self.columns = list(frame.columns)
+                with open(os.path.join(self.path, "meta.json"), "w") as f:
+                    json.dump({"version": self.version, "columns": self.columns}, f)
+            new = {col: frame[col].to_numpy(dtype=np.float64) for col in self.columns}
+            times = self.times()
+
+            if len(times) and epochs[0] <= times[-1]:
+                # Out-of-order rows: merge with a full rewrite, new rows win
+                rows = len(times)
+                merged_time = np.concatenate([np.array(times), epochs])
+                _, idx = np.unique(merged_time[::-1], return_index=True)
+                idx = len(merged_time) - 1 - idx
+                for col in self.columns + ["time"]:
+                    old = np.array(self._column(col, rows))
+                    values = np.concatenate([old, epochs if col == "time" else new[col]])[idx]
+                    tmp = self._file(col) + ".tmp"
+                    with open(tmp, "wb") as f:
+                        f.write(values.tobytes())
+                    os.replace(tmp, self._file(col))
+                return
+
+            # Tail append; `time` last as the commit marker
+            for col in self.columns + ["time"]:
+                with open(self._file(col), "ab") as f:
+                    f.write((epochs if col == "time" else new[col]).tobytes())
+
+    def _sync(self, bars):
+        """(feature rows aligned with `bars`, rows persisted)."""
+        bars = bars.reset_index(drop=True)
+        epochs = _epochs(bars["time"])
+        out = self.read(epochs)
+        missing = np.flatnonzero(out.isna().all(axis=1).to_numpy()) if self.columns else np.arange(len(bars))
+        if not len(missing):
+            return out, 0
+
+        lo = max(0, int(missing[0]) - self.context)
+        computed = self.compute(bars.iloc[lo:]).reset_index(drop=True)
+        if not self.columns:
+            out = pd.DataFrame(np.nan, index=out.index, columns=list(computed.columns), dtype=float)
+        out.iloc[missing] = computed.iloc[missing - lo][out.columns].to_numpy(dtype=float)
+
+        # Only rows with a full context behind them, and never the (maybe forming) last bar
+        persist = missing[(missing >= self.context) & (missing < len(bars) - 1)]
+        if len(persist):
+            self._write(epochs[persist], out.iloc[persist])
+        return out, len(persist)
+
+    def update(self, bars):
+        """Compute and persist rows of `bars` (oldest first) that are not stored yet. Returns the count."""
+        return self._sync(bars)[1]
+
+    def features(self, bars):
+        """Feature rows aligned with `bars` (oldest first), filling the store on the way."""
+        return self._sync(bars)[0]
+
+
+# === extract_features as a stored feature set ===
+def _alpha_compute(bars):
+    df = bars.copy()
+    if np.issubdtype(df["time"].dtype, np.integer):
+        df["time"] = pd.to_datetime(df["time"], unit="s")
+    df["timestamp"] = df["time"]
+    out = alpha_module.extract_features(df, dropna=False)
+    return out.drop(columns=[col for col in out.columns if col in EXCLUDE])
+
+
+ALPHA_VERSION = feature_version(alpha_module, registry, packages=("pandas",), context=CONTEXT)
+
+_stores = {}
+
+
+def alpha_store(symbol="XAUUSDc", timeframe="M15", root=STORE_ROOT):
+    """Process-wide FeatureStore of extract_features columns per (symbol, timeframe)."""
+    key = (root, symbol, timeframe.upper())
+    if key not in _stores:
+        _stores[key] = FeatureStore("alpha", _alpha_compute, ALPHA_VERSION, symbol, timeframe, root=root)
+    return _stores[key]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Fill the feature store from the local bar store")
+    parser.add_argument("--symbol", default="XAUUSDc")
+    parser.add_argument("--timeframe", default="M15")
+    parser.add_argument("--start", default=None)
+    args = parser.parse_args()
+
+    bars = get_store(args.symbol, args.timeframe).frame(start=args.start)
+    store = alpha_store(args.symbol, args.timeframe)
+    added = store.update(bars)
+    print(f"✅ {added} new rows ({len(store)} stored, version {store.version}) → {store.path}")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,118 +1,70 @@
-import pandas as pd
-import numpy as np
-import MetaTrader5 as mt5
-from datetime import datetime
 import os
 
+import numpy as np
+import pandas as pd
+
+from features.dataset_builder import bar_index, load_bars, model_paths
+from data.bar_store import TIMEFRAMES
 from indicators.rsi import calculate_rsi
 from indicators.macd import calculate_macd
 from indicators.atr import calculate_atr
 from indicators.obv import calculate_obv
 from indicators.bollinger import calculate_bollinger_bands
-from models.garch_model import forecast_garch_volatility
-from models.hmm_model import detect_market_regime
+from indicators.rolling import rolling_slope
 
 # === Config ===
 SYMBOL = "XAUUSDc"
-TIMEFRAME = mt5.TIMEFRAME_M15
-BARS = 100
-
-# === Init MT5 ===
-if not mt5.initialize():
-    print("❌ MT5 init failed")
-    exit()
+TIMEFRAME = "M15"
+WARMUP = 1000        # bars of history before the first trade (GARCH/HMM walk-forward seed)
+REFIT_EVERY = 96     # GARCH/HMM refit interval in bars
 
 # === Load labeled trades ===
 df = pd.read_csv("labeled_trades.csv")
 df["timestamp"] = pd.to_datetime(df["timestamp"])
 
-features = []
-
-for idx, row in df.iterrows():
-    timestamp = row["timestamp"]
-    direction = 1 if str(row["signal"]).upper() == "BUY" else -1
-    label = row["label"]
-
-    rates = mt5.copy_rates_from(SYMBOL, TIMEFRAME, timestamp, BARS)
-    if rates is None or len(rates) < 50:
-        print(f"⚠️ Not enough data for trade {idx}")
-        continue
-
-    hist_df = pd.DataFrame(rates)
-    hist_df["time"] = pd.to_datetime(hist_df["time"], unit="s")
-
-    # === Compute indicators ===
-    hist_df["rsi_2"] = calculate_rsi(hist_df["close"], period=2)
-    hist_df["rsi_14"] = calculate_rsi(hist_df["close"], period=14)
-
-    macd_line, macd_signal, macd_hist = calculate_macd(hist_df["close"])
-    hist_df["macd_line"] = macd_line
-    hist_df["macd_signal"] = macd_signal
-    hist_df["macd_hist"] = macd_hist
-
-    hist_df["atr"] = calculate_atr(hist_df)
-    hist_df["obv"] = calculate_obv(hist_df)
-    hist_df = calculate_bollinger_bands(hist_df)
-
-    # === Compute custom features ===
-    last = hist_df.iloc[-1]
-    prev_close = hist_df["close"].iloc[-2]
-    body = abs(last["close"] - last["open"])
-    range_ = last["high"] - last["low"] + 1e-6
-
-    # === Rolling volatility ===
-    hist_df["rolling_std_5"] = hist_df["close"].rolling(5).std()
-    bb_width = last["bb_upper"] - last["bb_lower"]
-
-    # === Optional: Volatility + Regime Detection ===
-    numeric_df = hist_df.select_dtypes(include="number")
-    try:
-        garch_vol = forecast_garch_volatility(numeric_df)
-        regime, _ = detect_market_regime(numeric_df)
-    except:
-        garch_vol, regime = 0.0, 1
-
-    # === Add to features ===
-    features.append({
-        "timestamp": timestamp,
-        "direction": direction,
-        "label": label,
-
-        # Indicators
-        "rsi_2": last["rsi_2"],
-        "rsi_14": last["rsi_14"],
-        "macd_line": last["macd_line"],
-        "macd_signal": last["macd_signal"],
-        "macd_hist": last["macd_hist"],
-        "atr": last["atr"],
-        "obv": last["obv"],
-        "bb_upper": last["bb_upper"],
-        "bb_middle": last["bb_middle"],
-        "bb_lower": last["bb_lower"],
-        "bb_width": bb_width,
-        "bb_distance": (last["close"] - last["bb_lower"]) / (bb_width + 1e-6),
-        "rolling_std_5": last["rolling_std_5"],
-
-        # Price action
-        "body_ratio": body / range_,
-        "return_pct": (last["close"] - prev_close) / prev_close * 100,
-        "trend_slope": np.polyfit(np.arange(10), hist_df["close"].tail(10).values, 1)[0],
-
-        # Market context
-        "garch_vol": garch_vol,
-        "regime": regime,
-
-        # Time
-        "hour": timestamp.hour,
-        "weekday": timestamp.weekday()
-    })
-
-    print(f"✅ Trade {idx} processed.")
+# === Load the bar history once ===
+bars = load_bars(SYMBOL, TIMEFRAME, df["timestamp"], WARMUP).reset_index(drop=True)
+close = bars["close"]
+
+# === Compute indicators over the whole series ===
+bars["rsi_2"] = calculate_rsi(close, period=2)
+bars["rsi_14"] = calculate_rsi(close, period=14)
+bars["macd_line"], bars["macd_signal"], bars["macd_hist"] = calculate_macd(close)
+bars["atr"] = calculate_atr(bars)
+bars["obv"] = calculate_obv(bars)
+bars["bb_upper"], bars["bb_middle"], bars["bb_lower"] = calculate_bollinger_bands(close)
+
+# === Custom features ===
+bars["bb_width"] = bars["bb_upper"] - bars["bb_lower"]
+bars["bb_distance"] = (close - bars["bb_lower"]) / (bars["bb_width"] + 1e-6)
+bars["rolling_std_5"] = close.rolling(5).std()
+bars["body_ratio"] = (close - bars["open"]).abs() / (bars["high"] - bars["low"] + 1e-6)
+bars["return_pct"] = close.pct_change() * 100
+bars["trend_slope"] = rolling_slope(close.to_numpy(), 10)
+
+# === Volatility + Regime Detection (walk-forward, no lookahead) ===
+bars["garch_vol"], bars["regime"] = model_paths(close.to_numpy(), WARMUP, REFIT_EVERY)
+
+# === Map each trade to the last bar closed before it ===
+idx = bar_index(bars["time"], df["timestamp"], TIMEFRAMES[TIMEFRAME][1])
+found = idx >= 0
+columns = ["rsi_2", "rsi_14", "macd_line", "macd_signal", "macd_hist", "atr", "obv",
+           "bb_upper", "bb_middle", "bb_lower", "bb_width", "bb_distance", "rolling_std_5",
+           "body_ratio", "return_pct", "trend_slope", "garch_vol", "regime"]
+
+trades = df[found].reset_index(drop=True)
+features_df = pd.concat([
+    pd.DataFrame({
+        "timestamp": trades["timestamp"],
+        "direction": np.where(trades["signal"].astype(str).str.upper() == "BUY", 1, -1),
+        "label": trades["label"],
+    }),
+    bars[columns].iloc[idx[found]].reset_index(drop=True),
+    pd.DataFrame({"hour": trades["timestamp"].dt.hour, "weekday": trades["timestamp"].dt.weekday}),
+], axis=1).dropna()
+print(f"✅ {len(features_df)} of {len(df)} trades processed.")
 
 # === Save final dataset ===
-features_df = pd.DataFrame(features)
 os.makedirs("features", exist_ok=True)
 features_df.to_csv("features/dataset.csv", index=False)
 print("🎯 Saved to features/dataset.csv")
-
-mt5.shutdown()
@@ -0,0 +1,134 @@
+import numpy as np
+import pandas as pd
+
+TIES = ("sl", "tp", "path", "skip")
+TIMEOUTS = ("drop", "sign")
+LABELS = {"tp": 1.0, "sl": 0.0}
+
+
+def entry_bars(bar_times, entry_times):
+    """Row of the first bar opening at or after each entry (len(bar_times) if none)."""
+    opens = pd.to_datetime(pd.Series(bar_times)).to_numpy("datetime64[s]").astype(np.int64)
+    entries = pd.to_datetime(pd.Series(entry_times)).to_numpy("datetime64[s]").astype(np.int64)
+    return np.searchsorted(opens, entries, side="left")
+
+
+def _first(hit, horizon):
+    """Column of the first True per row, `horizon` where there is none."""
+    return np.where(hit.any(axis=1), hit.argmax(axis=1), horizon)
+
+
+def _touch_chunk(o, h, l, c, start, direction, entry, tp, sl, horizon, ties):
+    """First-touch resolution for one block of trades (trade x horizon matrices)."""
+    rows = np.arange(len(start))
+    idx = start[:, None] + np.arange(horizon)
+    in_data = idx < len(c)
+    idx = np.minimum(idx, len(c) - 1)
+
+    # Sells are mirrored (-low is their high), so one comparison serves both sides
+    buy = direction == 1
+    d = direction[:, None]
+    favourable = np.maximum.accumulate(np.where(buy[:, None], h[idx], -l[idx]), axis=1)
+    adverse = np.minimum.accumulate(np.where(buy[:, None], l[idx], -h[idx]), axis=1)
+
+    tp_col = _first((favourable >= tp[:, None] * d) & in_data, horizon)
+    sl_col = _first((adverse <= sl[:, None] * d) & in_data, horizon)
+    touched = np.minimum(tp_col, sl_col) < horizon
+    both = touched & (tp_col == sl_col)
+
+    # Vertical barrier: the horizon ended inside the data without a touch
+    available = in_data.sum(axis=1)
+    timed_out = ~touched & (available == horizon)
+    col = np.where(touched, np.minimum(tp_col, sl_col), np.maximum(available, 1) - 1)
+    k = idx[rows, col]
+
+    # === Bars that touch both barriers ===
+    tp_wins = tp_col < sl_col
+    if ties == "tp":
+        tp_wins |= both
+    elif ties == "path":
+        # Gap through a level at the open decides; otherwise the backtest's path:
+        # the bid runs O -> L -> H -> C on up bars and O -> H -> L -> C otherwise
+        open_fav = o[k] * direction
+        gap_sl = open_fav <= sl * direction
+        gap_tp = open_fav >= tp * direction
+        low_first = c[k] >= o[k]
+        tp_wins |= both & ~gap_sl & (gap_tp | (low_first != buy))
+
+    barrier = np.select(
+        [touched & tp_wins, both & (ties == "skip"), touched, timed_out],
+        ["tp", "both", "sl", "time"],
+        "open",
+    )
+    closed = touched | timed_out
+    exit_price = np.select([barrier == "tp", barrier == "sl", barrier == "time"], [tp, sl, c[k]], np.nan)
+
+    return {
+        "exit_bar": np.where(closed, k, -1),
+        "bars_held": np.where(closed, col + 1, -1),
+        "barrier": barrier,
+        "exit_price": exit_price,
+        "mfe": np.where(closed, favourable[rows, col] - entry * direction, np.nan),
+        "mae": np.where(closed, entry * direction - adverse[rows, col], np.nan),
+    }
+
+
+def first_touch(bars, start, direction, entry, tp, sl, horizon=100, ties="sl", timeout="drop", chunk_mb=64):
+    """
+    Triple-barrier labels (TP, SL, `horizon` bars) for many trades at once.
+
+    Each trade is scanned from bar `start` (its first bar after entry) for
+    `horizon` bars. Running max/min of the favourable/adverse extremes over
+    a trade x horizon matrix and an argmax give the first bar touching each
+    barrier, in chunks of ~`chunk_mb` per matrix.
+
+    ties: bar touching TP and SL -> "sl" (pessimistic), "tp", "path" (the
+    backtest's intrabar path) or "skip" (barrier "both", no label).
+    timeout: trades reaching the time limit -> "drop" (no label) or "sign"
+    (1 if closed in profit). Trades running off the data are "open".
+
+    Returns a DataFrame aligned with the inputs: exit_bar, bars_held,
+    barrier, exit_price, mfe / mae (excursions up to the exit bar, in price)
+    and label (1 = TP, 0 = SL, NaN = unlabelled).
+    """
+    if ties not in TIES:
+        raise ValueError(f"Unknown ties {ties!r}, expected one of {TIES}")
+    if timeout not in TIMEOUTS:
+        raise ValueError(f"Unknown timeout {timeout!r}, expected one of {TIMEOUTS}")
+
+    o, h, l, c = (np.asarray(bars[col], dtype=float) for col in ("open", "high", "low", "close"))
+    start = np.asarray(start, dtype=np.int64)
+    direction = np.asarray(direction, dtype=np.int64)
+    entry, tp, sl = (np.broadcast_to(np.asarray(x, dtype=float), start.shape) for x in (entry, tp, sl))
+
+    chunk = max(1, int(chunk_mb * 2**20 // (horizon * 8)))
+    parts = [
+        _touch_chunk(o, h, l, c, start[lo:lo + chunk], direction[lo:lo + chunk], entry[lo:lo + chunk],
+                     tp[lo:lo + chunk], sl[lo:lo + chunk], horizon, ties)
+        for lo in range(0, len(start), chunk)
+    ]
+    out = pd.DataFrame({key: np.concatenate([p[key] for p in parts]) for key in parts[0]}) if parts else \
+        pd.DataFrame(columns=["exit_bar", "bars_held", "barrier", "exit_price", "mfe", "mae"])
+
+    out["label"] = out["barrier"].map(LABELS)
+    if timeout == "sign":
+        won = (out["exit_price"] - entry) * direction > 0
+        out.loc[out["barrier"] == "time", "label"] = won[out["barrier"] == "time"].astype(float)
+    return out
+
+
+def trade_direction(signal):
+    """1 / -1 per trade from a signal column: the journal's 1 / -1 or the old CSV's "BUY" / "SELL"."""
+    if pd.api.types.is_numeric_dtype(signal):
+        return np.where(np.asarray(signal) > 0, 1, -1)
+    return np.where(signal.astype(str).str.upper().isin(["BUY", "1"]), 1, -1)
+
+
+def label_trades(bars, trades, horizon=100, ties="sl", timeout="drop", time_col="timestamp"):
+    """first_touch for a trade log (timestamp, signal, entry_price, sl, tp) against its bars."""
+    direction = trade_direction(trades["signal"])
+    start = entry_bars(bars["time"], trades[time_col])
+    out = first_touch(bars, start, direction, trades["entry_price"], trades["tp"], trades["sl"],
+                      horizon=horizon, ties=ties, timeout=timeout)
+    out.index = trades.index
+    return out
@@ -0,0 +1,309 @@
+import numpy as np
+import pandas as pd
+from numpy.lib.stride_tricks import sliding_window_view
+
+# name -> (dependencies, function of the dependency Series)
+FEATURES = {}
+
+# Raw columns; `volume` is optional (None when absent), garch_vol / regime default like extract_features
+INPUTS = ("open", "high", "low", "close", "volume", "timestamp", "garch_vol", "regime")
+DEFAULTS = {"garch_vol": 0.0, "regime": 1}
+
+
+def feature(name, *deps):
+    """Register `fn(*deps)` as the definition of `name`."""
+    def register(fn):
+        FEATURES[name] = (deps, fn)
+        return fn
+    return register
+
+
+def resolve(names):
+    """Every node needed for `names`, dependencies first, each once."""
+    order, seen = [], set()
+
+    def visit(name, path=()):
+        if name in seen or name in INPUTS:
+            return
+        if name not in FEATURES:
+            raise KeyError(f"Unknown feature {name!r}")
+        if name in path:
+            raise ValueError(f"Feature cycle: {' -> '.join(path + (name,))}")
+        for dep in FEATURES[name][0]:
+            visit(dep, path + (name,))
+        seen.add(name)
+        order.append(name)
+
+    for name in names:
+        visit(name)
+    return order
+
+
+def definitions(names):
+    """Functions behind `names` and everything they depend on (for version hashes)."""
+    return [FEATURES[name][1] for name in resolve(names)]
+
+
+def compute(df, names):
+    """
+    {name: Series} for the requested features only. Shared intermediates
+    (close diff, rolling extremes, EMAs, ...) are computed once per call.
+    """
+    values = {}
+    for name in INPUTS:
+        if name in df.columns:
+            values[name] = df[name]
+        elif name in DEFAULTS:
+            values[name] = pd.Series(DEFAULTS[name], index=df.index)
+        else:
+            values[name] = None
+    for name in resolve(names):
+        deps, fn = FEATURES[name]
+        values[name] = fn(*(values[dep] for dep in deps))
+    return {name: values[name] for name in names}
+
+
+def model_features(model):
+    """Feature names a model was trained on: sklearn's feature_names_in_ or a saved (model, names) tuple."""
+    if isinstance(model, (tuple, list)) and len(model) == 2:
+        return list(model[1])
+    names = getattr(model, "feature_names_in_", None)
+    if names is None:
+        raise ValueError(f"{type(model).__name__} carries no feature names")
+    return list(names)
+
+
+def _ema(series, span):
+    return series.ewm(span=span, min_periods=span, adjust=False).mean()
+
+
+def _wilder(series, window):
+    return series.ewm(alpha=1 / window, min_periods=window, adjust=False).mean()
+
+
+def _rsi(up, down, window):
+    up, down = _wilder(up, window), _wilder(down, window)
+    return pd.Series(np.where(down == 0, 100, 100 - (100 / (1 + up / down))), index=up.index)
+
+
+def _no_volume(close):
+    return pd.Series(0, index=close.index)
+
+
+# === Shared intermediates ===
+@feature("close_diff", "close")
+def close_diff(close):
+    return close.diff()
+
+
+@feature("gain", "close_diff")
+def gain(diff):
+    return diff.where(diff > 0, 0.0)
+
+
+@feature("loss", "close_diff")
+def loss(diff):
+    return -diff.where(diff < 0, 0.0)
+
+
+@feature("typical_price", "high", "low", "close")
+def typical_price(high, low, close):
+    return (high + low + close) / 3.0
+
+
+@feature("high_14", "high")
+def high_14(high):
+    return high.rolling(14, min_periods=14).max()
+
+
+@feature("low_14", "low")
+def low_14(low):
+    return low.rolling(14, min_periods=14).min()
+
+
+@feature("ema_12", "close")
+def ema_12(close):
+    return _ema(close, 12)
+
+
+@feature("ema_26", "close")
+def ema_26(close):
+    return _ema(close, 26)
+
+
+@feature("bb_mid", "close")
+def bb_mid(close):
+    return close.rolling(21, min_periods=21).mean()
+
+
+@feature("bb_std", "close")
+def bb_std(close):
+    return close.rolling(21, min_periods=21).std(ddof=0)
+
+
+# === Price Action ===
+@feature("return_pct", "close")
+def return_pct(close):
+    return close.pct_change() * 100
+
+
+@feature("body", "open", "close")
+def body(open_, close):
+    return close - open_
+
+
+@feature("range", "high", "low")
+def range_(high, low):
+    return high - low + 1e-6
+
+
+@feature("body_ratio", "body", "range")
+def body_ratio(body_, range_):
+    return abs(body_) / range_
+
+
+@feature("wick_ratio", "open", "high", "close", "range")
+def wick_ratio(open_, high, close, range_):
+    return (high - np.maximum(open_, close)) / range_
+
+
+@feature("engulfing", "body")
+def engulfing(body_):
+    prev = body_.shift(1)
+    return ((prev < 0) & (body_ > abs(prev))).astype(int)
+
+
+@feature("trend_slope", "close_diff")
+def trend_slope(diff):
+    return diff.rolling(window=5).mean()
+
+
+# === Momentum ===
+@feature("rsi_2", "gain", "loss")
+def rsi_2(up, down):
+    return _rsi(up, down, 2)
+
+
+@feature("rsi_14", "gain", "loss")
+def rsi_14(up, down):
+    return _rsi(up, down, 14)
+
+
+@feature("roc", "close")
+def roc(close):
+    prev = close.shift(5)
+    return (close - prev) / prev * 100
+
+
+@feature("cci", "typical_price")
+def cci(tp):
+    mean = tp.rolling(14, min_periods=14).mean()
+    mad = np.full(len(tp), np.nan)
+    if len(tp) >= 14:
+        windows = sliding_window_view(tp.to_numpy(dtype=float), 14)
+        mad[13:] = np.abs(windows - windows.mean(axis=1, keepdims=True)).mean(axis=1)
+    return (tp - mean) / (0.015 * mad)
+
+
+@feature("stoch", "close", "high_14", "low_14")
+def stoch(close, highest, lowest):
+    return 100 * (close - lowest) / (highest - lowest)
+
+
+@feature("williams_r", "close", "high_14", "low_14")
+def williams_r(close, highest, lowest):
+    return -100 * (highest - close) / (highest - lowest)
+
+
+# === MACD ===
+@feature("macd_line", "ema_12", "ema_26")
+def macd_line(fast, slow):
+    return fast - slow
+
+
+@feature("macd_signal", "macd_line")
+def macd_signal(line):
+    return _ema(line, 9)
+
+
+@feature("macd_hist", "macd_line", "macd_signal")
+def macd_hist(line, signal):
+    return line - signal
+
+
+# === Bollinger Bands ===
+@feature("bb_upper", "bb_mid", "bb_std")
+def bb_upper(mid, std):
+    return mid + 2 * std
+
+
+@feature("bb_lower", "bb_mid", "bb_std")
+def bb_lower(mid, std):
+    return mid - 2 * std
+
+
+@feature("bb_distance", "close", "bb_upper", "bb_lower")
+def bb_distance(close, upper, lower):
+    return (close - lower) / (upper - lower + 1e-6)
+
+
+@feature("bb_bandwidth", "bb_upper", "bb_lower")
+def bb_bandwidth(upper, lower):
+    return upper - lower
+
+
+@feature("rolling_std_5", "close")
+def rolling_std_5(close):
+    return close.rolling(5).std()
+
+
+# === Trend Indicators ===
+@feature("sma_20", "close")
+def sma_20(close):
+    return close.rolling(window=20, min_periods=20).mean()
+
+
+@feature("ema_20", "close")
+def ema_20(close):
+    return _ema(close, 20)
+
+
+# === VWAP / Volume (0 without a `volume` column) ===
+@feature("vwap", "typical_price", "volume", "close")
+def vwap(tp, volume, close):
+    if volume is None:
+        return _no_volume(close)
+    return (tp * volume).rolling(14, min_periods=14).sum() / volume.rolling(14, min_periods=14).sum()
+
+
+@feature("obv", "close", "volume")
+def obv(close, volume):
+    if volume is None:
+        return _no_volume(close)
+    return pd.Series(np.where(close < close.shift(1), -volume, volume), index=close.index).cumsum()
+
+
+@feature("accum_dist", "high", "low", "close", "volume")
+def accum_dist(high, low, close, volume):
+    if volume is None:
+        return _no_volume(close)
+    clv = (((close - low) - (high - close)) / (high - low)).fillna(0.0)
+    return (clv * volume).cumsum()
+
+
+@feature("volume_delta", "volume", "close")
+def volume_delta(volume, close):
+    if volume is None:
+        return _no_volume(close)
+    return volume.diff()
+
+
+# === Time ===
+@feature("hour", "timestamp")
+def hour(timestamp):
+    return timestamp.dt.hour
+
+
+@feature("weekday", "timestamp")
+def weekday(timestamp):
+    return timestamp.dt.weekday
@@ -1,10 +1,22 @@
+import numpy as np
 import pandas as pd
 
+from indicators.rolling import as_float_array, rolling_mean
+
+
+def true_range_array(high, low, close):
+    high, low, close = as_float_array(high), as_float_array(low), as_float_array(close)
+    tr = high - low
+    prev_close = close[:-1]
+    tr[1:] = np.maximum(tr[1:], np.maximum(np.abs(high[1:] - prev_close), np.abs(low[1:] - prev_close)))
+    return tr
+
+
+def atr_array(high, low, close, period=14):
+    """ATR (simple mean of true range) on ndarrays, time on axis 0."""
+    return rolling_mean(true_range_array(high, low, close), period)
+
+
 def calculate_atr(df, period=14):
-    df = df.copy()
-    df['H-L'] = df['high'] - df['low']
-    df['H-PC'] = abs(df['high'] - df['close'].shift(1))
-    df['L-PC'] = abs(df['low'] - df['close'].shift(1))
-    df['TR'] = df[['H-L', 'H-PC', 'L-PC']].max(axis=1)
-    df['ATR'] = df['TR'].rolling(window=period).mean()
-    return df['ATR']
+    atr = atr_array(df['high'].to_numpy(), df['low'].to_numpy(), df['close'].to_numpy(), period)
+    return pd.Series(atr, index=df.index, name='ATR')
@@ -1,5 +1,21 @@
 import pandas as pd
 
+from indicators.rolling import rolling_mean, rolling_std
+
+
+def bollinger_array(close, period=21, std_dev=2, ddof=1):
+    """
+    Bollinger Bands on ndarrays (time on axis 0, 2-D = one column per series).
+    Identical to the pandas version: the rolling mean / std are pandas' own.
+
+    Returns:
+        tuple of ndarrays: upper_band, middle_band (SMA), lower_band
+    """
+    middle_band = rolling_mean(close, period)
+    std = rolling_std(close, period, ddof=ddof)
+    return middle_band + std_dev * std, middle_band, middle_band - std_dev * std
+
+
 def calculate_bollinger_bands(series, period=21, std_dev=2):
     """
     Calculate Bollinger Bands for a price series.
@@ -12,10 +28,10 @@ def calculate_bollinger_bands(series, period=21, std_dev=2):
     Returns:
         tuple: upper_band, middle_band (SMA), lower_band
     """
-    middle_band = series.rolling(window=period).mean()
-    std = series.rolling(window=period).std()
-
-    upper_band = middle_band + std_dev * std
-    lower_band = middle_band - std_dev * std
-
-    return upper_band, middle_band, lower_band
+    upper_band, middle_band, lower_band = bollinger_array(series.to_numpy(), period, std_dev)
+    index = series.index
+    return (
+        pd.Series(upper_band, index=index, name=series.name),
+        pd.Series(middle_band, index=index, name=series.name),
+        pd.Series(lower_band, index=index, name=series.name),
+    )
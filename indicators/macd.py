@@ -1,7 +1,19 @@
+import pandas as pd
+
+from indicators.rolling import ema
+
+
+def macd_array(close, fast=12, slow=26, signal_period=9):
+    """MACD line, signal and histogram on ndarrays (time on axis 0)."""
+    macd_line = ema(close, fast) - ema(close, slow)
+    signal_line = ema(macd_line, signal_period)
+    return macd_line, signal_line, macd_line - signal_line
+
+
 def calculate_macd(series, fast=12, slow=26, signal_period=9):
-    ema_fast = series.ewm(span=fast, adjust=False).mean()
-    ema_slow = series.ewm(span=slow, adjust=False).mean()
-    macd_line = ema_fast - ema_slow
-    signal_line = macd_line.ewm(span=signal_period, adjust=False).mean()
-    histogram = macd_line - signal_line
-    return macd_line, signal_line, histogram
+    macd_line, signal_line, histogram = macd_array(series.to_numpy(), fast, slow, signal_period)
+    return (
+        pd.Series(macd_line, index=series.index, name=series.name),
+        pd.Series(signal_line, index=series.index, name=series.name),
+        pd.Series(histogram, index=series.index, name=series.name),
+    )
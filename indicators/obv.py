@@ -1,12 +1,19 @@
+import numpy as np
 import pandas as pd
 
+
+def obv_array(close, volume):
+    """
+    Vectorised OBV for ndarrays (time on axis 0, 2-D = one column per series).
+    Starts at 0 and keeps the dtype of `volume` like the loop version did.
+    """
+    close = np.asarray(close, dtype=np.float64)
+    volume = np.asarray(volume)
+    direction = np.zeros(close.shape, dtype=np.int8)
+    direction[1:] = np.sign(close[1:] - close[:-1])
+    return np.cumsum(direction * volume, axis=0, dtype=np.result_type(volume, np.int8))
+
+
 def calculate_obv(df):
-    obv = [0]
-    for i in range(1, len(df)):
-        if df["close"].iloc[i] > df["close"].iloc[i - 1]:
-            obv.append(obv[-1] + df["tick_volume"].iloc[i])
-        elif df["close"].iloc[i] < df["close"].iloc[i - 1]:
-            obv.append(obv[-1] - df["tick_volume"].iloc[i])
-        else:
-            obv.append(obv[-1])
+    obv = obv_array(df["close"].to_numpy(), df["tick_volume"].to_numpy())
     return pd.Series(obv, index=df.index)
@@ -0,0 +1,74 @@
+import numpy as np
+import pandas as pd
+from numpy.lib.stride_tricks import sliding_window_view
+
+
+def as_float_array(values):
+    """Return a float64 ndarray view of a Series / list / ndarray (time on axis 0)."""
+    return np.asarray(values, dtype=np.float64)
+
+
+def _pad_front(values, period):
+    out = np.full((values.shape[0] + period - 1,) + values.shape[1:], np.nan)
+    out[period - 1:] = values
+    return out
+
+
+def _rolling(x, period, method, **kwargs):
+    """pandas' rolling `method` along axis 0 of a 1-D / 2-D ndarray (one column per series)."""
+    x = as_float_array(x)
+    frame = pd.DataFrame(x.reshape(x.shape[0], -1))
+    return getattr(frame.rolling(period), method)(**kwargs).to_numpy().reshape(x.shape)
+
+
+def rolling_mean(x, period):
+    """Trailing rolling mean along axis 0, NaN for the first `period - 1` rows (= `rolling().mean()`)."""
+    return _rolling(x, period, "mean")
+
+
+def rolling_std(x, period, ddof=1):
+    """Trailing rolling standard deviation along axis 0 (= `rolling().std(ddof=ddof)`, same algorithm)."""
+    return _rolling(x, period, "std", ddof=ddof)
+
+
+def ema(x, span):
+    """
+    EMA along axis 0 matching `ewm(span=span, adjust=False).mean()`.
+
+    Runs as a single IIR filter (y[t] = a*x[t] + (1-a)*y[t-1], y[0] = x[0]),
+    so there is no Python loop over bars. The filter would carry a NaN into
+    every later row, so input with NaNs goes through pandas instead (which
+    skips them).
+    """
+    x = as_float_array(x)
+    if x.shape[0] == 0:
+        return x.copy()
+    if np.isnan(x).any():
+        return pd.DataFrame(x.reshape(x.shape[0], -1)).ewm(span=span, adjust=False).mean().to_numpy().reshape(x.shape)
+    from scipy.signal import lfilter  # lazy: scipy.signal pulls in scipy.stats (~1 s)
+
+    alpha = 2.0 / (span + 1)
+    zi = (1 - alpha) * x[:1]
+    y, _ = lfilter([alpha], [1.0, alpha - 1.0], x, axis=0, zi=zi)
+    return y
+
+
+def shift(x, periods=1):
+    """Shift along axis 0 filling with NaN (like pd.Series.shift)."""
+    x = as_float_array(x)
+    if periods == 0:
+        return x.copy()
+    out = np.full(x.shape, np.nan)
+    if periods < x.shape[0]:
+        out[periods:] = x[:-periods]
+    return out
+
+
+def rolling_slope(x, period):
+    """Trailing least-squares slope per step along axis 0 (np.polyfit deg 1 over each window)."""
+    x = as_float_array(x)
+    if x.shape[0] < period:
+        return np.full(x.shape, np.nan)
+    t = np.arange(period) - (period - 1) / 2
+    windows = sliding_window_view(x, period, axis=0)
+    return _pad_front(windows @ t / (t @ t), period)
@@ -1,13 +1,21 @@
+import numpy as np
 import pandas as pd
 
-def calculate_rsi(series, period=14):
-    delta = series.diff()
-    gain = delta.where(delta > 0, 0)
-    loss = -delta.where(delta < 0, 0)
+from indicators.rolling import as_float_array, rolling_mean
+
+
+def rsi_array(close, period=14):
+    """RSI with simple rolling means on ndarrays (time on axis 0), NaN -> 0."""
+    close = as_float_array(close)
+    delta = np.zeros(close.shape)
+    delta[1:] = close[1:] - close[:-1]
+    avg_gain = rolling_mean(np.where(delta > 0, delta, 0.0), period)
+    avg_loss = rolling_mean(np.where(delta < 0, -delta, 0.0), period)
 
-    avg_gain = gain.rolling(window=period).mean()
-    avg_loss = loss.rolling(window=period).mean()
+    with np.errstate(divide="ignore", invalid="ignore"):
+        rsi = 100 - (100 / (1 + avg_gain / avg_loss))
+    return np.where(np.isnan(rsi), 0.0, rsi)
 
-    rs = avg_gain / avg_loss
-    rsi = 100 - (100 / (1 + rs))
-    return rsi.fillna(0)
+
+def calculate_rsi(series, period=14):
+    return pd.Series(rsi_array(series.to_numpy(), period), index=series.index, name=series.name)
@@ -0,0 +1,308 @@
+from collections import deque
+import math
+
+import pandas as pd
+
+from strategies.momentum import rsi2_signal
+from strategies.macd_bollinger import macd_bb_signal
+from strategies.structure_breakout import structure_signal
+
+NAN = float("nan")
+
+
+class RollingSum:
+    """
+    Fixed-size window with running sum / sum of squares.
+
+    Sums are kept relative to a shift (the window mean at the last rebuild) to
+    avoid cancellation on price-level data, and are rebuilt from the window
+    every `maxlen` pushes so drift stays bounded while updates remain O(1).
+    """
+
+    def __init__(self, maxlen):
+        self.maxlen = maxlen
+        self.window = deque(maxlen=maxlen)
+        self.shift = None
+        self.sum = 0.0
+        self.sumsq = 0.0
+        self._pushes = 0
+        self._run = 0  # consecutive equal values, a flat window is exactly flat
+
+    def push(self, value):
+        if self.shift is None:
+            self.shift = value
+        self._run = self._run + 1 if self.window and self.window[-1] == value else 1
+        if len(self.window) == self.maxlen:
+            old = self.window[0] - self.shift
+            self.sum -= old
+            self.sumsq -= old * old
+        self.window.append(value)
+        d = value - self.shift
+        self.sum += d
+        self.sumsq += d * d
+
+        self._pushes += 1
+        if self._pushes >= self.maxlen:
+            self._pushes = 0
+            self.shift = math.fsum(self.window) / len(self.window)
+            self.sum = math.fsum(v - self.shift for v in self.window)
+            self.sumsq = math.fsum((v - self.shift) ** 2 for v in self.window)
+
+    @property
+    def full(self):
+        return len(self.window) == self.maxlen
+
+    def mean(self):
+        if not self.full:
+            return NAN
+        if self._run >= self.maxlen:
+            return self.window[-1]
+        return self.shift + self.sum / self.maxlen
+
+    def std(self, ddof=0):
+        if not self.full:
+            return NAN
+        if self._run >= self.maxlen:
+            return 0.0
+        n = self.maxlen
+        var = (self.sumsq - self.sum * self.sum / n) / (n - ddof)
+        return math.sqrt(max(var, 0.0))
+
+
+class RollingExtreme:
+    """Rolling max/min over the last `maxlen` values using monotonic deques."""
+
+    def __init__(self, maxlen):
+        self.maxlen = maxlen
+        self._count = 0
+        self._max = deque()  # (index, value), values decreasing
+        self._min = deque()  # (index, value), values increasing
+
+    def push(self, high, low):
+        i = self._count
+        self._count += 1
+
+        while self._max and self._max[-1][1] <= high:
+            self._max.pop()
+        self._max.append((i, high))
+        while self._min and self._min[-1][1] >= low:
+            self._min.pop()
+        self._min.append((i, low))
+
+        start = i - self.maxlen + 1
+        if self._max[0][0] < start:
+            self._max.popleft()
+        if self._min[0][0] < start:
+            self._min.popleft()
+
+    def max(self):
+        return self._max[0][1] if self._count >= self.maxlen else NAN
+
+    def min(self):
+        return self._min[0][1] if self._count >= self.maxlen else NAN
+
+
+class StreamingEMA:
+    """EMA matching `series.ewm(span, min_periods, adjust=False).mean()`."""
+
+    def __init__(self, span, min_periods=0):
+        self.alpha = 2.0 / (span + 1)
+        self.min_periods = min_periods
+        self.value = NAN
+        self.count = 0
+
+    def update(self, x):
+        if x != x:  # NaN input: pandas carries the previous value forward
+            return self.current()
+        if self.count == 0:
+            self.value = x
+        else:
+            self.value = (1 - self.alpha) * self.value + self.alpha * x
+        self.count += 1
+        return self.current()
+
+    def current(self):
+        return self.value if self.count >= max(self.min_periods, 1) else NAN
+
+
+class StreamingRSI:
+    """RSI matching indicators.rsi.calculate_rsi (simple rolling means, NaN -> 0)."""
+
+    def __init__(self, period=14):
+        self.gains = RollingSum(period)
+        self.losses = RollingSum(period)
+        self.prev_close = None
+        self.value = 0.0
+
+    def update(self, close):
+        delta = 0.0 if self.prev_close is None else close - self.prev_close
+        self.prev_close = close
+        self.gains.push(delta if delta > 0 else 0.0)
+        self.losses.push(-delta if delta < 0 else 0.0)
+
+        avg_gain = self.gains.mean()
+        avg_loss = self.losses.mean()
+        if avg_gain != avg_gain or (avg_loss <= 0 and avg_gain <= 0):
+            self.value = 0.0
+        elif avg_loss <= 0:
+            self.value = 100.0
+        else:
+            self.value = 100 - 100 / (1 + avg_gain / avg_loss)
+        return self.value
+
+
+class StreamingMACD:
+    """MACD matching ta.trend.MACD (the variant used by apply_macd_bollinger)."""
+
+    def __init__(self, fast=12, slow=26, signal_period=9):
+        self.ema_fast = StreamingEMA(fast, min_periods=fast)
+        self.ema_slow = StreamingEMA(slow, min_periods=slow)
+        self.ema_signal = StreamingEMA(signal_period, min_periods=signal_period)
+        self.macd_line = self.macd_signal = self.macd_hist = NAN
+
+    def update(self, close):
+        self.macd_line = self.ema_fast.update(close) - self.ema_slow.update(close)
+        self.macd_signal = self.ema_signal.update(self.macd_line)
+        self.macd_hist = self.macd_line - self.macd_signal
+        return self.macd_line, self.macd_signal, self.macd_hist
+
+
+class StreamingBollinger:
+    """Bollinger Bands matching ta.volatility.BollingerBands (population std)."""
+
+    def __init__(self, period=21, std_dev=2, ddof=0):
+        self.window = RollingSum(period)
+        self.std_dev = std_dev
+        self.ddof = ddof
+        self.upper = self.middle = self.lower = NAN
+
+    def update(self, close):
+        self.window.push(close)
+        self.middle = self.window.mean()
+        std = self.window.std(self.ddof)
+        self.upper = self.middle + self.std_dev * std
+        self.lower = self.middle - self.std_dev * std
+        return self.upper, self.middle, self.lower
+
+
+class StreamingATR:
+    """ATR matching indicators.atr.calculate_atr (SMA of true range)."""
+
+    def __init__(self, period=14):
+        self.tr = RollingSum(period)
+        self.prev_close = None
+        self.value = NAN
+
+    def update(self, high, low, close):
+        tr = high - low
+        if self.prev_close is not None:
+            tr = max(tr, abs(high - self.prev_close), abs(low - self.prev_close))
+        self.prev_close = close
+        self.tr.push(tr)
+        self.value = self.tr.mean()
+        return self.value
+
+
+class StreamingOBV:
+    """OBV accumulator matching indicators.obv.calculate_obv."""
+
+    def __init__(self):
+        self.prev_close = None
+        self.value = 0.0
+
+    def update(self, close, volume):
+        if self.prev_close is not None:
+            if close > self.prev_close:
+                self.value += volume
+            elif close < self.prev_close:
+                self.value -= volume
+        self.prev_close = close
+        return self.value
+
+
+class IndicatorEngine:
+    """
+    Stateful indicator set for the live loop.
+
+    Seed it once from history, then feed each newly closed bar with `update`.
+    Every update is O(1), so per-cycle cost no longer grows with bar count.
+    `values` mirrors the last-row columns the pandas strategies produce
+    (rsi2, rsi14, macd_*, bb_*, atr, obv and the three strategy signals).
+    """
+
+    def __init__(self, rsi_fast=2, rsi_slow=14, bb_period=21, bb_std=2, atr_period=14, lookback=20,
+                 rsi_low=10, rsi_high=90):
+        self._params = dict(
+            rsi_fast=rsi_fast, rsi_slow=rsi_slow, bb_period=bb_period,
+            bb_std=bb_std, atr_period=atr_period, lookback=lookback,
+            rsi_low=rsi_low, rsi_high=rsi_high,
+        )
+        self.rsi_low = rsi_low
+        self.rsi_high = rsi_high
+        self.rsi_fast = StreamingRSI(rsi_fast)
+        self.rsi_slow = StreamingRSI(rsi_slow)
+        self.macd = StreamingMACD()
+        self.bollinger = StreamingBollinger(bb_period, bb_std)
+        self.atr = StreamingATR(atr_period)
+        self.obv = StreamingOBV()
+        self.structure = RollingExtreme(lookback)
+        self.last_time = None
+        self.bars = 0
+        self.values = {}
+
+    def update(self, time, open_, high, low, close, volume=0.0):
+        """Consume one closed bar and return the refreshed indicator values."""
+        # Breakout levels come from the previous `lookback` bars (shift(1))
+        prev_high = self.structure.max()
+        prev_low = self.structure.min()
+        self.structure.push(high, low)
+
+        rsi2 = self.rsi_fast.update(close)
+        rsi14 = self.rsi_slow.update(close)
+        macd_line, macd_signal, macd_hist = self.macd.update(close)
+        bb_upper, bb_middle, bb_lower = self.bollinger.update(close)
+
+        self.values = {
+            "time": time,
+            "open": open_,
+            "high": high,
+            "low": low,
+            "close": close,
+            "rsi2": rsi2,
+            "rsi14": rsi14,
+            "macd_line": macd_line,
+            "macd_signal": macd_signal,
+            "macd_hist": macd_hist,
+            "bb_upper": bb_upper,
+            "bb_middle": bb_middle,
+            "bb_lower": bb_lower,
+            "atr": self.atr.update(high, low, close),
+            "obv": self.obv.update(close, volume),
+            "recent_high": prev_high,
+            "recent_low": prev_low,
+            "signal": rsi2_signal(rsi2, self.rsi_low, self.rsi_high),
+            "signal_macd_bb": macd_bb_signal(close, bb_upper, bb_lower, macd_hist),
+            "signal_structure": structure_signal(close, prev_high, prev_low),
+        }
+        self.last_time = time
+        self.bars += 1
+        return self.values
+
+    def seed(self, df: pd.DataFrame):
+        """Replay a block of closed bars (oldest first) to build up state."""
+        volume = df["tick_volume"] if "tick_volume" in df.columns else pd.Series(0.0, index=df.index)
+        for row in zip(df["time"], df["open"], df["high"], df["low"], df["close"], volume):
+            self.update(*row)
+        return self.values
+
+    def sync(self, df: pd.DataFrame):
+        """
+        Feed only the bars of `df` newer than the last consumed bar.
+
+        If `df` does not overlap the engine state (first run, or the bot was
+        down longer than the fetched history) the engine is rebuilt from `df`.
+        """
+        if self.last_time is None or df["time"].iloc[0] > self.last_time:
+            self.__init__(**self._params)
+            return self.seed(df)
+        return self.seed(df[df["time"] > self.last_time])
@@ -1,3 +1,6 @@
+import numpy as np
+
+
 def calculate_trailing_stop(entry_price, current_price, direction, distance=100):
     if direction == 1:  # Buy
         new_sl = current_price - distance * 0.01
@@ -5,3 +8,17 @@ def calculate_trailing_stop(entry_price, current_price, direction, distance=100)
     else:  # Sell
         new_sl = current_price + distance * 0.01
         return round(new_sl, 2) if new_sl < entry_price else None
+
+
+def trailing_stop_array(entry_price, current_price, direction, distance=100):
+    """
+    Vectorised calculate_trailing_stop for many positions at once.
+    Returns the new SL per position, NaN where the stop would not move past entry.
+    """
+    entry_price = np.asarray(entry_price, dtype=np.float64)
+    current_price = np.asarray(current_price, dtype=np.float64)
+    direction = np.asarray(direction)
+
+    new_sl = np.where(direction == 1, current_price - distance * 0.01, current_price + distance * 0.01)
+    moves = np.where(direction == 1, new_sl > entry_price, new_sl < entry_price)
+    return np.where(moves, np.round(new_sl, 2), np.nan)
@@ -0,0 +1,387 @@
+"""
+Append-only binary trade / exit journals.
+
+    python -m logs.journal trades             # last rows
+    python -m logs.journal closed --csv out.csv
+
+Each journal has a fixed record schema (numpy dtype). `append` checks a
+record against it and buffers it in memory; a background thread writes
+the buffer to the tail file (fixed-size records, one open handle) every
+FLUSH_EVERY seconds or FLUSH_ROWS records. Once it holds SEGMENT_ROWS
+records the tail is rolled into a compressed columnar segment (.npz, one
+array per column). Layout under logs/journal/<name>/:
+
+    schema.json                    field -> dtype of the tail
+    seg_<first row>_<rows>.npz     sealed segments
+    tail_<first row>.bin           records not sealed yet
+
+A crash can only tear the last tail record, which is trimmed on the next
+open; a segment is written (atomically) before its tail is removed, so a
+tail whose segment exists is already sealed. A schema change seals the
+old tail first; readers fill columns an older segment lacks.
+"""
+import argparse
+import atexit
+import glob
+import json
+import os
+import threading
+
+import numpy as np
+
+from utils.metrics import register
+import pandas as pd
+
+JOURNAL_ROOT = "logs/journal"
+FLUSH_EVERY = 1.0     # seconds a record may wait in memory
+FLUSH_ROWS = 256      # ... or this many records
+SEGMENT_ROWS = 4096   # tail records per sealed segment
+
+# === Schemas: timestamps are epoch milliseconds (UTC), strings UTF-8, cut to width ===
+SCHEMAS = {
+    "trades": np.dtype([
+        ("timestamp", "<i8"),
+        ("symbol", "S16"),
+        ("strategy", "S48"),
+        ("signal", "i1"),         # 1 buy, -1 sell
+        ("entry_price", "<f8"),
+        ("indicator", "<f8"),     # RSI(2) at the signal
+        ("sl", "<f8"),            # points
+        ("tp", "<f8"),
+        ("magic", "<i8"),
+        ("regime", "i1"),         # HMM state at the signal, -1 unknown
+        ("ml_decision", "i1"),    # 1 taken, 0 rejected by the ML filter
+    ]),
+    "exits": np.dtype([
+        ("timestamp", "<i8"),
+        ("ticket", "<i8"),
+        ("symbol", "S16"),
+        ("direction", "i1"),
+        ("entry_price", "<f8"),
+        ("exit_price", "<f8"),
+        ("reason", "S32"),
+        ("pnl", "<f8"),
+    ]),
+    # Positions as closed at the broker, with the context of their entry
+    "closed": np.dtype([
+        ("timestamp", "<i8"),     # exit (broker time)
+        ("open_time", "<i8"),
+        ("ticket", "<i8"),
+        ("magic", "<i8"),
+        ("symbol", "S16"),
+        ("strategy", "S48"),
+        ("regime", "i1"),
+        ("ml_decision", "i1"),
+        ("direction", "i1"),
+        ("volume", "<f8"),
+        ("entry_price", "<f8"),
+        ("exit_price", "<f8"),
+        ("pnl", "<f8"),           # account currency, after commission and swap
+        ("mae", "<f8"),           # worst adverse excursion (price distance, >= 0)
+        ("mfe", "<f8"),           # best favourable excursion
+        ("reason", "S32"),
+    ]),
+}
+
+# Value of a field an older segment lacks, when it is not NaN / 0 (the logger's defaults)
+FILL = {"regime": -1, "ml_decision": 1}
+
+
+def _schema_json(dtype):
+    return [[name, dtype.fields[name][0].str] for name in dtype.names]
+
+
+def _from_json(fields):
+    return np.dtype([(name, code) for name, code in fields])
+
+
+def _fill(name, dtype, n):
+    """Column of n defaults for a field an older segment lacks."""
+    if name in FILL:
+        return np.full(n, FILL[name], dtype=dtype)
+    if dtype.kind == "f":
+        return np.full(n, np.nan, dtype=dtype)
+    return np.zeros(n, dtype=dtype)
+
+
+# === Reading (also from other processes while the bot writes) ===
+def _segments(path):
+    out = []
+    for file in glob.glob(os.path.join(path, "seg_*.npz")):
+        _, first, rows = os.path.basename(file)[:-4].split("_")
+        out.append((int(first), int(rows), file))
+    return sorted(out)
+
+
+def _tails(path):
+    return sorted((int(os.path.basename(f)[5:-4]), f) for f in glob.glob(os.path.join(path, "tail_*.bin")))
+
+
+def read_columns(name, root=JOURNAL_ROOT, columns=None, dtype=None):
+    """
+    {column: array} of every record on disk, in append order. Columns
+    follow `dtype` (default: SCHEMAS, else the journal's schema.json).
+    """
+    path = os.path.join(root, name)
+    schema = np.dtype(dtype) if dtype is not None else SCHEMAS.get(name)
+    if os.path.exists(os.path.join(path, "schema.json")):
+        with open(os.path.join(path, "schema.json")) as f:
+            tail_dtype = _from_json(json.load(f))
+        schema = schema if schema is not None else tail_dtype
+    elif schema is None:
+        raise KeyError(f"No journal {name!r} under {root}")
+    else:
+        tail_dtype = schema
+    names = list(columns or schema.names)
+
+    parts = []
+    for _ in range(3):  # a roll-over between listing and reading: list again
+        try:
+            parts = []
+            sealed = set()
+            for first, rows, file in _segments(path):
+                sealed.add(first)
+                with np.load(file) as seg:
+                    parts.append({c: seg[c] if c in seg.files else _fill(c, schema[c], rows) for c in names})
+            for first, file in _tails(path):
+                if first in sealed:
+                    continue
+                raw = np.fromfile(file, dtype=np.uint8)
+                records = raw[:len(raw) - len(raw) % tail_dtype.itemsize].view(tail_dtype)
+                parts.append({c: records[c] if c in tail_dtype.names else _fill(c, schema[c], len(records))
+                              for c in names})
+            break
+        except FileNotFoundError:
+            continue
+    if not parts:
+        return {c: np.empty(0, dtype=schema[c]) for c in names}
+    return {c: np.concatenate([p[c].astype(schema[c], copy=False) for p in parts]) for c in names}
+
+
+def to_frame(columns):
+    """DataFrame of journal columns: strings decoded, timestamp as datetime (UTC)."""
+    df = pd.DataFrame({
+        c: np.char.decode(v, "utf-8", "ignore") if v.dtype.kind == "S" else v
+        for c, v in columns.items()
+    })
+    if "timestamp" in df:
+        df["timestamp"] = pd.to_datetime(df["timestamp"], unit="ms")
+    return df
+
+
+def load(name, root=JOURNAL_ROOT, columns=None):
+    return to_frame(read_columns(name, root, columns))
+
+
+# === Writing ===
+class Journal:
+    """Buffered writer of one journal (see module docstring). Thread-safe."""
+
+    def __init__(self, name, dtype=None, root=JOURNAL_ROOT, flush_every=FLUSH_EVERY, flush_rows=FLUSH_ROWS,
+                 segment_rows=SEGMENT_ROWS):
+        self.name = name
+        self.dtype = np.dtype(dtype if dtype is not None else SCHEMAS[name])
+        self.path = os.path.join(root, name)
+        self.flush_every = flush_every
+        self.flush_rows = flush_rows
+        self.segment_rows = segment_rows
+        self.stats = {"appended": 0, "written": 0, "segments": 0, "trimmed_bytes": 0}
+        self._fields = set(self.dtype.names)
+        self._casts = [(n, self._cast(self.dtype.fields[n][0])) for n in self.dtype.names]
+        self._buffer = []
+        self._cond = threading.Condition()
+        self._io = threading.Lock()
+        self._closed = False
+        self._open()
+        self._thread = threading.Thread(target=self._run, name=f"journal-{name}", daemon=True)
+        self._thread.start()
+
+    # === Schema ===
+    @staticmethod
+    def _cast(dtype):
+        if dtype.kind == "S":
+            width = dtype.itemsize
+            return lambda v: str(v).encode("utf-8")[:width]
+        if dtype.kind in "iu":
+            return int
+        return float
+
+    def record(self, fields):
+        """Record tuple of a field dict; ValueError on missing, unknown or mistyped fields."""
+        if fields.keys() != self._fields:
+            missing, unknown = self._fields - fields.keys(), fields.keys() - self._fields
+            raise ValueError(f"{self.name} journal: missing {sorted(missing)}, unknown {sorted(unknown)}")
+        try:
+            return tuple([cast(fields[n]) for n, cast in self._casts])
+        except (TypeError, ValueError) as e:
+            raise ValueError(f"{self.name} journal: {e}") from None
+
+    # === Files ===
+    def _open(self):
+        os.makedirs(self.path, exist_ok=True)
+        schema_file = os.path.join(self.path, "schema.json")
+        old = None
+        if os.path.exists(schema_file):
+            with open(schema_file) as f:
+                old = _from_json(json.load(f))
+
+        segments = _segments(self.path)
+        sealed = {first for first, _, _ in segments}
+        self._first = max((first + rows for first, rows, _ in segments), default=0)
+        for first, file in _tails(self.path):
+            if first in sealed:
+                os.remove(file)  # crashed after writing its segment
+                continue
+            dtype = old if old is not None else self.dtype
+            size = os.path.getsize(file)
+            if size % dtype.itemsize:
+                self.stats["trimmed_bytes"] += size % dtype.itemsize
+                print(f"🩹 {self.name} journal: trimmed a torn record ({size % dtype.itemsize} bytes)")
+                os.truncate(file, size - size % dtype.itemsize)
+            if old is not None and old != self.dtype:
+                self._seal(file, first, dtype)  # schema changed: the old records become a segment
+            else:
+                self._first = first
+
+        if old != self.dtype:
+            tmp = schema_file + ".tmp"
+            with open(tmp, "w") as f:
+                json.dump(_schema_json(self.dtype), f)
+            os.replace(tmp, schema_file)
+
+        self._tail_path = os.path.join(self.path, f"tail_{self._first}.bin")
+        self._tail = open(self._tail_path, "ab")
+        self._rows = os.path.getsize(self._tail_path) // self.dtype.itemsize
+
+    def _seal(self, file, first, dtype):
+        """Tail file -> compressed segment (written before the tail goes away)."""
+        records = np.fromfile(file, dtype=dtype)
+        if len(records):
+            seg = os.path.join(self.path, f"seg_{first}_{len(records)}.npz")
+            tmp = os.path.join(self.path, f".seg_{first}.tmp.npz")  # not matched by readers
+            np.savez_compressed(tmp, **{n: records[n] for n in dtype.names})
+            os.replace(tmp, seg)
+            self.stats["segments"] += 1
+        os.remove(file)
+        self._first = first + len(records)
+
+    def _write(self, rows):
+        records = np.array(rows, dtype=self.dtype)
+        with self._io:
+            self._tail.write(records.tobytes())
+            self._tail.flush()
+            os.fsync(self._tail.fileno())
+            self._rows += len(records)
+            self.stats["written"] += len(records)
+            if self._rows >= self.segment_rows:
+                self._tail.close()
+                self._seal(self._tail_path, self._first, self.dtype)
+                self._tail_path = os.path.join(self.path, f"tail_{self._first}.bin")
+                self._tail = open(self._tail_path, "ab")
+                self._rows = 0
+
+    # === Buffer ===
+    def append(self, **fields):
+        """Buffer one record (checked against the schema now, written by the flusher)."""
+        row = self.record(fields)
+        with self._cond:
+            if self._closed:
+                raise RuntimeError(f"{self.name} journal is closed")
+            self._buffer.append(row)
+            self.stats["appended"] += 1
+            if len(self._buffer) >= self.flush_rows:
+                self._cond.notify()
+
+    def _take(self):
+        with self._cond:
+            rows, self._buffer = self._buffer, []
+        return rows
+
+    def _run(self):
+        while True:
+            with self._cond:
+                self._cond.wait_for(lambda: self._closed or len(self._buffer) >= self.flush_rows, self.flush_every)
+                closed = self._closed
+            rows = self._take()
+            if rows:
+                try:
+                    self._write(rows)
+                except Exception as e:
+                    print(f"❌ {self.name} journal write failed: {e}")
+                    with self._cond:
+                        self._buffer[:0] = rows  # kept for the next flush
+            if closed:
+                return
+
+    def flush(self):
+        """Write everything buffered so far (from the calling thread)."""
+        rows = self._take()
+        if rows:
+            self._write(rows)
+
+    def columns(self, columns=None):
+        """Flush, then read_columns of this journal."""
+        self.flush()
+        with self._io:
+            return read_columns(self.name, os.path.dirname(self.path), columns, self.dtype)
+
+    def close(self):
+        with self._cond:
+            if self._closed:
+                return
+            self._closed = True
+            self._cond.notify()
+        self._thread.join(timeout=5)
+        self.flush()
+        with self._io:
+            self._tail.close()
+
+    def samples(self):
+        """Metrics export (utils/metrics.py): rows appended / written, segments sealed."""
+        return [("journal_events_total", "counter", (("journal", self.name), ("event", k)), v)
+                for k, v in self.stats.items()]
+
+
+_journals = {}
+_journals_lock = threading.Lock()
+
+
+def get_journal(name, root=JOURNAL_ROOT):
+    """Process-wide Journal per (root, name); flushed and closed at exit."""
+    key = (root, name)
+    with _journals_lock:
+        if key not in _journals:
+            if not _journals:
+                atexit.register(close_all)
+            _journals[key] = Journal(name, root=root)
+            register(_journals[key].samples)
+        return _journals[key]
+
+
+def close_all():
+    with _journals_lock:
+        journals = list(_journals.values())
+        _journals.clear()
+    for journal in journals:
+        journal.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Show or export a trade / exit journal")
+    parser.add_argument("name", choices=sorted(SCHEMAS))
+    parser.add_argument("--root", default=JOURNAL_ROOT)
+    parser.add_argument("--csv", help="write every record to this CSV file")
+    parser.add_argument("--tail", type=int, default=20, help="rows to print")
+    args = parser.parse_args()
+
+    df = load(args.name, args.root)
+    if args.csv:
+        df.to_csv(args.csv, index=False)
+        print(f"✅ {len(df)} {args.name} records written to {args.csv}")
+    else:
+        print(f"📒 {len(df)} {args.name} records")
+        print(df.tail(args.tail).to_string(index=False))
+
+
+if __name__ == "__main__":
+    main()
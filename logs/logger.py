@@ -1,48 +1,48 @@
-import csv
-from datetime import datetime
-import os
+from logs.journal import get_journal
+from utils.broker import now
 
-def log_trade(signal, price, rsi_value, sl, tp, symbol="XAUUSD", strategy="Unknown"):
+# Trades and exits go to the binary journals (logs/journal.py): buffered,
+# schema-checked, written by a background thread. Read them back with
+# logs.journal.load("trades") / load("exits"), or export with
+# `python -m logs.journal trades --csv out.csv`.
+# Rows are stamped in ms on the broker clock (utils.broker.now), so replayed
+# signals line up with the replayed bars.
+
+
+def log_trade(signal, price, rsi_value, sl, tp, symbol="XAUUSD", strategy="Unknown", magic=0, regime=-1,
+              ml_decision=1):
     """
-    Logs a trade with full schema: timestamp,symbol,strategy,signal,entry_price,indicator,sl,tp
+    Logs a signal with full schema: timestamp,symbol,strategy,signal,entry_price,indicator,sl,tp,
+    magic,regime,ml_decision (0 = rejected by the ML filter, not traded)
     """
-    log_path = "logs/trade_log.csv"
-    file_exists = os.path.isfile(log_path)
-
-    with open(log_path, mode="a", newline="") as f:
-        writer = csv.writer(f)
-        if not file_exists:
-            writer.writerow(["timestamp", "symbol", "strategy", "signal", "entry_price", "indicator", "sl", "tp"])
-        writer.writerow([
-            datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
-            symbol,
-            strategy,
-            "BUY" if signal == 1 else "SELL",
-            round(price, 2),
-            round(rsi_value, 2),
-            sl,
-            tp
-        ])
+    get_journal("trades").append(
+        timestamp=int(now() * 1000),
+        symbol=symbol,
+        strategy=strategy,
+        signal=1 if signal == 1 else -1,
+        entry_price=price,
+        indicator=rsi_value,
+        sl=sl,
+        tp=tp,
+        magic=magic,
+        regime=regime,
+        ml_decision=ml_decision,
+    )
 
 # === EXIT Logger ===
 def log_exit(ticket, symbol, direction, entry_price, exit_price, reason, pnl):
-    filename = "logs/exit_log.csv"
-    file_exists = os.path.isfile(filename)
+    get_journal("exits").append(
+        timestamp=int(now() * 1000),
+        ticket=ticket,
+        symbol=symbol,
+        direction=1 if direction == 1 else -1,
+        entry_price=entry_price,
+        exit_price=exit_price,
+        reason=reason,
+        pnl=pnl,
+    )
+
 
-    with open(filename, mode='a', newline='') as f:
-        writer = csv.writer(f)
-        if not file_exists:
-            writer.writerow([
-                "timestamp", "ticket", "symbol", "direction",
-                "entry_price", "exit_price", "reason", "PnL"
-            ])
-        writer.writerow([
-            datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
-            ticket,
-            symbol,
-            "BUY" if direction == 1 else "SELL",
-            round(entry_price, 2),
-            round(exit_price, 2),
-            reason,
-            round(pnl, 2)
-        ])
+# === Closed Position Logger (execution/position_tracker.py) ===
+def log_closed(**trade):
+    get_journal("closed").append(**trade)
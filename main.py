@@ -1,23 +1,15 @@
-import time
 import os
-import sys
 from dotenv import load_dotenv
 
-from strategies.momentum import apply_rsi2
-from strategies.macd_bollinger import apply_macd_bollinger
-from strategies.structure_breakout import detect_hh_ll_breakout
-# from strategies.atr_breakout import apply_atr_breakout
-
-from models.garch_model import forecast_garch_volatility
-from models.hmm_model import detect_market_regime
-from ml.predictor import predict_trade
-
-from data.fetch_data import get_ohlcv
-from execution.trade_manager import open_trade, manage_open_positions
-from logs.logger import log_trade
+from analysis.performance import get_book
+from execution.order_executor import get_executor
+from execution.pipeline import Pipeline
+from execution.runner import Runner
+from utils import metrics
 from utils.mt5_connector import connect_mt5, shutdown_mt5
 from utils.notifier import send_alert
-from sim.signal_tracker import record_signal
+from utils.broker import ReplayFinished
+from utils.warmup import start_warm_up
 
 # === Load Environment Variables ===
 load_dotenv()
@@ -25,144 +17,76 @@ load_dotenv()
 # === Symbol Setup ===
 symbol = "XAUUSDc"
 
-# === Connect to MT5 ===
-mt5_enabled = True
-if not connect_mt5():
-    print("❌ MT5 initialization failed.")
-    mt5_enabled = False
-else:
-    print("✅ Connected to MT5.")
-
-try:
-    while True:
-        print("\n🔁 Starting new cycle...")
-
-        # === Fetch OHLCV Data ===
-        df = get_ohlcv(symbol=symbol)
-        if df is None or len(df) < 30:
-            print("⚠️ Insufficient data.")
-            time.sleep(60)
-            continue
-
-        # === GARCH Volatility Filter ===
-        vol = forecast_garch_volatility(df)
-        print(f"📉 Forecasted Volatility: {vol:.2f}%")
-        if vol > 2.0:
-            send_alert("⚠️ High volatility — skipping trade.")
-            time.sleep(900)
-            continue
-
-        # === HMM Market Regime Detection ===
-        regime, dominant = detect_market_regime(df)
-        print(f"📊 Market Regime: {regime}, Dominant: {dominant}")
-        if regime != dominant:
-            send_alert("📉 Non-trending regime — no trades.")
-            time.sleep(900)
-            continue
-
-        # === Apply Strategies ===
-        df = apply_rsi2(df)
-        rsi2_signal = df.iloc[-1]["signal"]
-        rsi_val = df.iloc[-1]["rsi2"]
-
-        df = apply_macd_bollinger(df)
-        macd_signal = df.iloc[-1]["signal_macd_bb"]
-
-        df = detect_hh_ll_breakout(df)
-        structure_signal = df.iloc[-1]["signal_structure"]
-
-        # === (Optional) ATR breakout ===
-        # df = apply_atr_breakout(df)
-        # atr_signal = df.iloc[-1]["signal_atr"]
-
-        # === Ensemble Signal Logic ===
-        combined = rsi2_signal + macd_signal + structure_signal
-
-        if combined >= 2:
-            signal = 1
-            strategy_used = "Ensemble (RSI2 + MACD + Structure)"
-        elif combined <= -2:
-            signal = -1
-            strategy_used = "Ensemble (RSI2 + MACD + Structure)"
-        elif structure_signal != 0:
-            signal = structure_signal
-            strategy_used = "Structure Only"
-        elif macd_signal != 0:
-            signal = macd_signal
-            strategy_used = "MACD_BB Only"
-        elif rsi2_signal != 0:
-            signal = rsi2_signal
-            strategy_used = "RSI2 Only"
-        else:
-            signal = 0
-            strategy_used = None
-
-        # === ML Prediction Filter ===
-        if signal != 0:
-            features = {
-                "rsi2": df.iloc[-1]["rsi2"],
-                "rsi14": df.iloc[-1]["rsi14"],
-                "macd_line": df.iloc[-1]["macd_line"],
-                "macd_signal": df.iloc[-1]["macd_signal"],
-                "macd_hist": df.iloc[-1]["macd_hist"],
-                "bb_upper": df.iloc[-1]["bb_upper"],
-                "bb_lower": df.iloc[-1]["bb_lower"],
-                "bb_width": df.iloc[-1]["bb_upper"] - df.iloc[-1]["bb_lower"],
-                "obv": df.iloc[-1]["obv"],
-                "atr": df.iloc[-1]["atr"],
-                "volatility": vol,
-                "regime": regime
-            }
-
-            ml_decision = predict_trade(features)
-            if ml_decision == 0:
-                print("🤖 ML rejected trade.")
-                signal = 0
-
-        # === Execute Trade ===
-        if signal != 0:
-            direction = "BUY" if signal == 1 else "SELL"
-            price = df.iloc[-1]["close"]
-
-            print(f"🚨 Signal: {direction} from {strategy_used} @ {price:.2f}")
-            send_alert(f"🚨 {strategy_used} → {direction} on {symbol} @ {price:.2f}")
-
-            if mt5_enabled:
-                open_trade(
-                    symbol=symbol,
-                    direction=signal,
-                    sl=150,
-                    tp=300,
-                    strategy=strategy_used,
-                    risk_percent=1.0
-                )
-
-            log_trade(signal, price, rsi_val, sl=150, tp=300, symbol=symbol, strategy=strategy_used)
-
-
-            record_signal(
-                timestamp=df.iloc[-1]["time"],
-                symbol=symbol,
-                direction=signal,
-                entry_price=price,
-                sl=price - 1.5 if signal == 1 else price + 1.5,
-                tp=price + 3.0 if signal == 1 else price - 3.0
-            )
-        else:
-            print("ℹ️ No valid signal this cycle.")
-
-        # === Manage Open Positions ===
-        manage_open_positions(symbol)
-
-        # === Wait Until Next Candle ===
-        time.sleep(900)  # 15M
-
-except KeyboardInterrupt:
-    print("🛑 Stopped manually.")
-
-except Exception as e:
-    print(f"❌ Fatal error: {e}")
-    send_alert(f"❌ Bot error: {e}")
-
-finally:
-    shutdown_mt5()
+# === Pipelines: "SYMBOL:TIMEFRAME,..." run side by side on one MT5 session ===
+PIPELINES = os.getenv("BOT_PIPELINES", f"{symbol}:M15")
+MAGIC = 234000  # first pipeline; the next ones count up from here
+
+# === Risk Setup (points; 100 points = $1.00 on gold) ===
+SL_POINTS = 150
+TP_POINTS = 300
+
+# === Scheduling (seconds) ===
+BAR_SETTLE = 2     # after the bar close, for the broker to publish the bar
+EXIT_EVERY = 60    # open positions are checked this often between bar closes
+
+
+def parse_pipelines(spec):
+    """[(symbol, timeframe)] from "XAUUSDc:M15,XAGUSD:H1" (timeframe defaults to M15)."""
+    pairs = []
+    for item in spec.split(","):
+        if item.strip():
+            name, _, timeframe = item.strip().partition(":")
+            pairs.append((name, (timeframe or "M15").upper()))
+    return pairs
+
+
+def main():
+    # === Heavy imports + ML models load in the background while MT5 connects ===
+    start_warm_up()
+
+    # === Stage timings / MT5 call counts: BOT_METRICS_PORT (Prometheus) or BOT_METRICS_FILE ===
+    metrics.start()
+
+    # === Connect to MT5 ===
+    mt5_enabled = True
+    if not connect_mt5():
+        print("❌ MT5 initialization failed.")
+        mt5_enabled = False
+    else:
+        print("✅ Connected to MT5.")
+
+    # === One pipeline per symbol/timeframe: own indicators, GARCH, HMM and schedule ===
+    pipelines = [
+        Pipeline(name, timeframe, magic=MAGIC + i, sl_points=SL_POINTS, tp_points=TP_POINTS,
+                 trade=mt5_enabled, settle=BAR_SETTLE, exit_every=EXIT_EVERY)
+        for i, (name, timeframe) in enumerate(parse_pipelines(PIPELINES))
+    ]
+    runner = Runner(pipelines)
+    print(f"🧵 Running {', '.join(map(repr, pipelines))}")
+
+    try:
+        runner.run()
+
+    except KeyboardInterrupt:
+        print("🛑 Stopped manually.")
+
+    except ReplayFinished as e:
+        print(f"🏁 {e}")
+
+    except Exception as e:
+        print(f"❌ Fatal error: {e}")
+        send_alert(f"❌ Bot error: {e}")
+
+    finally:
+        print(f"🗓️ Scheduler: {runner.report()}")
+        get_executor().wait_idle(timeout=10)
+        for stage, summary in get_executor().latency().items():
+            print(f"⏱️ Orders {stage}: {summary}")
+        for stage, summary in metrics.summary().items():
+            print(f"⏱️ Stage {stage}: {summary}")
+        print(get_book().report())
+        shutdown_mt5()
+
+
+if __name__ == "__main__":
+    main()
@@ -1,9 +1,4 @@
-import pandas as pd
-import joblib
-
-model, features = joblib.load("ml/exit_model.pkl")
+from ml.predict_exit_probability import load_model
 
 def predict_exit_probability(snapshot: dict) -> float:
-    df = pd.DataFrame([snapshot])
-    df = df[features]
-    return model.predict_proba(df)[0][1]
+    return load_model().predict_proba(snapshot)
@@ -0,0 +1,142 @@
+import copy
+import inspect
+import threading
+
+import joblib
+import numpy as np
+
+from features.registry import model_features
+
+
+# === Compiled fast paths (skip sklearn's per-call validation / per-tree joblib dispatch) ===
+def _forest_proba(forest):
+    trees = [tree.tree_ for tree in forest.estimators_]
+    n_classes = forest.n_classes_
+
+    def proba(X):
+        X = np.ascontiguousarray(X, dtype=np.float32)
+        total = np.zeros((len(X), n_classes))
+        for tree in trees:
+            p = tree.predict(X)[:, :n_classes]  # (n, max_n_classes) for single-output trees
+            total += p / np.where(p.sum(axis=1, keepdims=True) == 0, 1, p.sum(axis=1, keepdims=True))
+        return total / len(trees)
+    return proba
+
+
+def _logistic_proba(model):
+    coef, intercept = model.coef_[0].copy(), float(model.intercept_[0])
+
+    def proba(X):
+        p1 = 1.0 / (1.0 + np.exp(-(X @ coef + intercept)))
+        return np.column_stack([1.0 - p1, p1])
+    return proba
+
+
+def compile_proba(estimator):
+    """predict_proba on float ndarrays without sklearn's overhead, or None for unsupported estimators."""
+    # Imported here: an unpickled estimator has loaded sklearn already, startup has not
+    from sklearn.ensemble._forest import ForestClassifier
+    from sklearn.linear_model import LogisticRegression
+
+    if isinstance(estimator, ForestClassifier) and estimator.n_outputs_ == 1:
+        return _forest_proba(estimator)
+    if type(estimator) is LogisticRegression and len(estimator.classes_) == 2:
+        return _logistic_proba(estimator)
+    return None
+
+
+class ModelRunner:
+    """
+    ndarray inference for one fitted estimator.
+
+    The feature order is fixed once at load; single-row calls fill a
+    preallocated (1, n_features) float buffer from the feature dict and call
+    the estimator on it, so no DataFrame is built per call. The buffer is
+    per thread, so pipelines on different threads can share one runner.
+    """
+
+    def __init__(self, estimator, features=None):
+        self.features = tuple(features if features is not None else model_features(estimator))
+        self.estimator = self._strip_names(estimator)
+        self._local = threading.local()
+        self._kwargs = {}
+        # XGBoost's sklearn API checks column names unless told not to
+        if "validate_features" in inspect.signature(self.estimator.predict).parameters:
+            self._kwargs["validate_features"] = False
+        self._proba = compile_proba(self.estimator)
+        self.classes = getattr(self.estimator, "classes_", None)
+
+    @staticmethod
+    def _strip_names(estimator):
+        """Copy without feature_names_in_, so sklearn does not warn about nameless ndarrays."""
+        if "feature_names_in_" not in vars(estimator):
+            return estimator
+        estimator = copy.copy(estimator)
+        del estimator.feature_names_in_
+        return estimator
+
+    # === Single row ===
+    def row(self, features):
+        """This thread's preallocated (1, n) input filled from a feature dict."""
+        buffer = getattr(self._local, "row", None)
+        if buffer is None:
+            buffer = self._local.row = np.empty((1, len(self.features)), dtype=np.float64)
+        try:
+            buffer[0] = [features[name] for name in self.features]
+        except KeyError:
+            missing = set(self.features) - set(features)
+            raise ValueError(f"Missing features: {missing}") from None
+        return buffer
+
+    def _predict(self, X):
+        if self._proba is not None:
+            return self.classes.take(self._proba(X).argmax(axis=1))
+        return np.asarray(self.estimator.predict(X, **self._kwargs))
+
+    def _predict_proba(self, X):
+        if self._proba is not None:
+            return self._proba(X)
+        return self.estimator.predict_proba(X, **self._kwargs)
+
+    def predict(self, features):
+        return self._predict(self.row(features))[0]
+
+    def predict_proba(self, features):
+        """P(class 1) for one feature dict."""
+        return float(self._predict_proba(self.row(features))[0, 1])
+
+    # === Batch ===
+    def matrix(self, rows):
+        """(n, n_features) float array from a DataFrame, a dict of columns or an ndarray already in order."""
+        if isinstance(rows, np.ndarray):
+            return np.asarray(rows, dtype=np.float64)
+        try:
+            return np.column_stack([np.asarray(rows[name], dtype=np.float64) for name in self.features])
+        except KeyError:
+            missing = set(self.features) - set(rows.keys())
+            raise ValueError(f"Missing features: {missing}") from None
+
+    def predict_many(self, rows):
+        X = self.matrix(rows)
+        if len(X) == 0:
+            return np.zeros(0, dtype=int)
+        return self._predict(X)
+
+    def predict_proba_many(self, rows):
+        """P(class 1) per row."""
+        X = self.matrix(rows)
+        if len(X) == 0:
+            return np.zeros(0)
+        return self._predict_proba(X)[:, 1]
+
+
+def runner_for(obj, features=None):
+    """ModelRunner for an estimator or an (estimator, feature_names) tuple."""
+    if isinstance(obj, (tuple, list)):
+        return ModelRunner(obj[0], features or obj[1])
+    return ModelRunner(obj, features)
+
+
+def load_runner(path, features=None):
+    """ModelRunner for a pickled estimator or a pickled (estimator, feature_names) tuple."""
+    return runner_for(joblib.load(path), features)
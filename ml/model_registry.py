@@ -0,0 +1,268 @@
+import argparse
+import hashlib
+import json
+import os
+import shutil
+import tempfile
+import threading
+from datetime import datetime, timezone
+
+import joblib
+
+REGISTRY_ROOT = "ml/registry"
+
+# Fixed paths the bot loaded from before the registry; used until a version is promoted
+LEGACY_PATHS = {
+    "entry_rf": "ml/models/rf_model.pkl",
+    "entry_xgb": "ml/models/xgb_model.pkl",
+    "exit": "ml/exit_model.pkl",
+    "filter_rf": "models/random_forest_model.pkl",
+    "trade_rf": "ml/trade_model.pkl",
+}
+
+
+# === Artifacts ===
+def _model_dir(name, root=REGISTRY_ROOT):
+    return os.path.join(root, name)
+
+
+def _atomic_write(path, text):
+    tmp = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+    with open(tmp, "w") as f:
+        f.write(text)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp, path)
+
+
+def _sha256(path):
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(1 << 20), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def training_window(df, time_col="timestamp"):
+    """(first, last) timestamp of a training frame as strings, or None without a time column."""
+    if time_col not in df or len(df) == 0:
+        return None
+    times = df[time_col].astype(str)
+    return [times.min(), times.max()]
+
+
+def register(name, model, features=None, metrics=None, window=None, params=None, promote=False, root=REGISTRY_ROOT):
+    """
+    Store `model` as a new immutable version of `name` and return its id.
+
+    The artifact is written to a temp directory and renamed into place, so
+    a version directory is either complete or absent. meta.json records the
+    feature list, training window, metrics, params and the pickle's sha256.
+    """
+    base = _model_dir(name, root)
+    os.makedirs(base, exist_ok=True)
+    staging = tempfile.mkdtemp(prefix=".staging-", dir=base)
+    try:
+        artifact = os.path.join(staging, "model.pkl")
+        joblib.dump(model, artifact)
+        sha = _sha256(artifact)
+        version = f"{datetime.now(timezone.utc):%Y%m%dT%H%M%S}-{sha[:8]}"
+        meta = {
+            "name": name,
+            "version": version,
+            "created": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+            "sha256": sha,
+            "features": list(features) if features is not None else None,
+            "training_window": window,
+            "metrics": metrics or {},
+            "params": params or {},
+        }
+        with open(os.path.join(staging, "meta.json"), "w") as f:
+            json.dump(meta, f, indent=2, default=str)
+        os.rename(staging, os.path.join(base, version))
+    except BaseException:
+        shutil.rmtree(staging, ignore_errors=True)
+        raise
+
+    print(f"📦 Registered {name} {version}")
+    if promote:
+        promote_version(name, version, root)
+    return version
+
+
+def versions(name, root=REGISTRY_ROOT):
+    """meta.json of every stored version of `name`, oldest first."""
+    base = _model_dir(name, root)
+    if not os.path.isdir(base):
+        return []
+    metas = []
+    for entry in sorted(os.listdir(base)):
+        meta_path = os.path.join(base, entry, "meta.json")
+        if os.path.exists(meta_path):
+            with open(meta_path) as f:
+                metas.append(json.load(f))
+    return metas
+
+
+# === Promotion ===
+def current(name, root=REGISTRY_ROOT):
+    """Promoted version id of `name`, or None."""
+    try:
+        with open(os.path.join(_model_dir(name, root), "CURRENT")) as f:
+            return f.read().strip() or None
+    except FileNotFoundError:
+        return None
+
+
+def history(name, root=REGISTRY_ROOT):
+    """Promoted version ids, oldest first (the last one is current)."""
+    try:
+        with open(os.path.join(_model_dir(name, root), "HISTORY")) as f:
+            return [line.split()[1] for line in f if line.strip()]
+    except FileNotFoundError:
+        return []
+
+
+def promote_version(name, version, root=REGISTRY_ROOT):
+    """Point `name` at `version`: one atomic rename of CURRENT, picked up by running bots between cycles."""
+    base = _model_dir(name, root)
+    if not os.path.exists(os.path.join(base, version, "meta.json")):
+        raise ValueError(f"Unknown version {name} {version}")
+    with open(os.path.join(base, "HISTORY"), "a") as f:
+        f.write(f"{datetime.now(timezone.utc).isoformat(timespec='seconds')} {version}\n")
+    _atomic_write(os.path.join(base, "CURRENT"), version)
+    print(f"🚀 Promoted {name} → {version}")
+
+
+def rollback(name, root=REGISTRY_ROOT):
+    """Re-promote the version promoted before the current one."""
+    promoted = history(name, root)
+    now = current(name, root)
+    previous = [v for v in promoted if v != now]
+    if not previous:
+        raise ValueError(f"No earlier version of {name} to roll back to")
+    promote_version(name, previous[-1], root)
+    return previous[-1]
+
+
+def load(name, version=None, root=REGISTRY_ROOT):
+    """
+    (model, meta) for `version` (default: the promoted one), checking the
+    content hash. Without a promoted version the legacy fixed path is used.
+    """
+    version = version or current(name, root)
+    if version is None:
+        path = LEGACY_PATHS.get(name)
+        if path is None or not os.path.exists(path):
+            raise FileNotFoundError(f"❌ No promoted version of {name} and no model at {path}")
+        return joblib.load(path), {"name": name, "version": "legacy", "features": None}
+
+    base = os.path.join(_model_dir(name, root), version)
+    with open(os.path.join(base, "meta.json")) as f:
+        meta = json.load(f)
+    artifact = os.path.join(base, "model.pkl")
+    if _sha256(artifact) != meta["sha256"]:
+        raise ValueError(f"❌ {name} {version}: artifact hash does not match meta.json")
+    return joblib.load(artifact), meta
+
+
+# === Hot reload in the running bot ===
+class ModelHandle:
+    """
+    The live model for one registry name, swapped atomically between cycles.
+
+    `get()` returns the current (meta, value) pair, where value is
+    build(model, meta) (e.g. a ModelRunner). `poll()` is called at the start
+    of a cycle: it only reads CURRENT; a changed version is loaded in a
+    background thread and swapped in by a later poll(), so the loop never
+    waits on unpickling and a cycle never sees a half-switched model.
+    """
+
+    def __init__(self, name, build, root=REGISTRY_ROOT):
+        self.name = name
+        self.build = build
+        self.root = root
+        self._lock = threading.Lock()
+        self._active = None       # (meta, value)
+        self._pending = None      # loaded, waiting for the next poll()
+        self._loading = None      # version being loaded in the background
+        self._failed = None       # version that failed to load (hash, unpickling); not retried
+
+    def get(self):
+        if self._active is None:
+            with self._lock:
+                if self._active is None:
+                    self._active = self._load(current(self.name, self.root))
+        return self._active
+
+    def _load(self, version):
+        model, meta = load(self.name, version, self.root)
+        return meta, self.build(model, meta)
+
+    def _background_load(self, version):
+        try:
+            self._pending = self._load(version)
+        except Exception as e:
+            self._failed = version
+            print(f"⚠️ Could not load {self.name} {version}: {e}")
+        finally:
+            self._loading = None
+
+    def poll(self):
+        """Swap in a version loaded since the last poll; start loading a newly promoted one. Never blocks."""
+        swapped = None
+        if self._pending is not None:
+            pending, self._pending = self._pending, None
+            self._active = pending  # single reference assignment: readers see old or new, never a mix
+            swapped = pending[0]["version"]
+            print(f"🔄 {self.name} now on {swapped}")
+
+        wanted = current(self.name, self.root)
+        active = self._active[0]["version"] if self._active else None
+        if wanted and wanted not in (active, self._loading, self._failed):
+            self._loading = wanted
+            threading.Thread(target=self._background_load, args=(wanted,), name=f"load-{self.name}",
+                             daemon=True).start()
+        return swapped
+
+
+_handles = {}
+
+
+def handle(name, build, root=REGISTRY_ROOT):
+    """Process-wide ModelHandle per registry name."""
+    key = (root, name)
+    if key not in _handles:
+        _handles[key] = ModelHandle(name, build, root)
+    return _handles[key]
+
+
+def poll_models():
+    """poll() every handle in use; called by main.py between cycles."""
+    return {h.name: v for h in list(_handles.values()) if (v := h.poll())}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Model registry: list, promote and roll back versions")
+    sub = parser.add_subparsers(dest="command", required=True)
+    sub.add_parser("list").add_argument("name")
+    promote_parser = sub.add_parser("promote")
+    promote_parser.add_argument("name")
+    promote_parser.add_argument("version")
+    sub.add_parser("rollback").add_argument("name")
+    args = parser.parse_args()
+
+    if args.command == "list":
+        now = current(args.name)
+        for meta in versions(args.name):
+            marker = "→" if meta["version"] == now else " "
+            metrics = ", ".join(f"{k}={v:.4g}" if isinstance(v, float) else f"{k}={v}" for k, v in meta["metrics"].items())
+            print(f"{marker} {meta['version']}  window={meta['training_window']}  {metrics}")
+    elif args.command == "promote":
+        promote_version(args.name, args.version)
+    else:
+        print(f"⏪ {args.name} rolled back to {rollback(args.name)}")
+
+
+if __name__ == "__main__":
+    main()
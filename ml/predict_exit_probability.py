@@ -1,13 +1,12 @@
-import pandas as pd
-import joblib
-import os
+from ml.inference import runner_for
+from ml.model_registry import handle
 
-# === Load Exit Model ===
-model_path = "ml/exit_model.pkl"
-if not os.path.exists(model_path):
-    raise FileNotFoundError(f"❌ Exit model not found at: {model_path}")
+# === Exit Model: promoted registry version, else ml/exit_model.pkl (loaded on first use) ===
+exit_handle = handle("exit", lambda model, meta: runner_for(model, meta["features"]))
 
-model, expected_features = joblib.load(model_path)
+
+def load_model():
+    return exit_handle.get()[1]
 
 
 def predict_exit_probability(features: dict) -> float:
@@ -16,12 +15,9 @@ def predict_exit_probability(features: dict) -> float:
     Returns:
         float: Probability (between 0 and 1)
     """
-    df = pd.DataFrame([features])
-    try:
-        df = df[expected_features]
-    except KeyError as e:
-        missing = set(expected_features) - set(df.columns)
-        raise ValueError(f"Missing features for exit prediction: {missing}")
+    return load_model().predict_proba(features)  # Probability of class "1" (TP); ValueError on missing features
+
 
-    probability = model.predict_proba(df)[0][1]  # Probability of class "1" (TP)
-    return float(probability)
+def predict_exit_probabilities(features):
+    """Batch predict_exit_probability (DataFrame or dict of columns): P(TP before SL) per row."""
+    return load_model().predict_proba_many(features)
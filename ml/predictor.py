@@ -1,17 +1,38 @@
-import joblib
 import numpy as np
-import os
 
-rf_model = joblib.load("ml/models/rf_model.pkl")
-xgb_model = joblib.load("ml/models/xgb_model.pkl")
+from ml.inference import ModelRunner
+from ml.model_registry import handle
+
+
+# === Models from the registry (promoted version, else ml/models/*.pkl), hot-swapped between cycles ===
+def _rf_runner(model, meta):
+    return ModelRunner(model, meta["features"])
+
+
+def _xgb_runner(model, meta):
+    # ndarray runners: column order fixed once, no DataFrame per call
+    features = meta["features"]
+    if features is None:
+        features = getattr(model, "feature_names_in_", None)  # an ndarray when fitted on a DataFrame
+    if features is None:
+        features = rf_handle.get()[1].features
+    return ModelRunner(model, list(features))
+
+
+rf_handle = handle("entry_rf", _rf_runner)
+xgb_handle = handle("entry_xgb", _xgb_runner)
+
+
+def load_models():
+    """(rf_runner, xgb_runner) of the active versions, unpickled on first use (or by the startup warm-up)."""
+    return rf_handle.get()[1], xgb_handle.get()[1]
+
 
 def predict_trade(features: dict) -> int:
     try:
-        input_df = pd.DataFrame([features])
-        input_df = input_df[rf_model.feature_names_in_]
-
-        rf_pred = rf_model.predict(input_df)[0]
-        xgb_pred = xgb_model.predict(input_df)[0]
+        rf_runner, xgb_runner = load_models()
+        rf_pred = rf_runner.predict(features)
+        xgb_pred = xgb_runner.predict(features)
 
         if rf_pred == xgb_pred:
             return rf_pred
@@ -20,3 +41,13 @@ def predict_trade(features: dict) -> int:
     except Exception as e:
         print(f"⚠️ ML error: {e}")
         return 0
+
+
+def predict_trades(features) -> np.ndarray:
+    """Batch predict_trade (DataFrame or dict of columns): one row per candidate bar, 0 where the models disagree."""
+    rf_runner, xgb_runner = load_models()
+    rf_pred = rf_runner.predict_many(features)
+    if len(rf_pred) == 0:
+        return np.zeros(0, dtype=int)
+    xgb_pred = xgb_runner.predict_many(features)
+    return np.where(rf_pred == xgb_pred, rf_pred, 0)
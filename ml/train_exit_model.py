@@ -1,10 +1,13 @@
 # ml/train_exit_model.py
 import pandas as pd
-import joblib
 from sklearn.linear_model import LogisticRegression
 from sklearn.model_selection import train_test_split
 from sklearn.metrics import classification_report
 
+from ml.model_registry import register, training_window
+
+PROMOTE = True
+
 # Load your labeled snapshot dataset
 df = pd.read_csv("data/exit_snapshots.csv")
 df.dropna(inplace=True)
@@ -22,6 +25,7 @@ model.fit(X_train, y_train)
 # Evaluate
 print(classification_report(y_test, model.predict(X_test)))
 
-# Save
-joblib.dump((model, list(X.columns)), "ml/exit_model.pkl")
-print("✅ Exit model saved to ml/exit_model.pkl")
+# Register
+register("exit", model, list(X.columns), {"accuracy": float(model.score(X_test, y_test))},
+         training_window(df), model.get_params(), promote=PROMOTE)
+print("✅ Exit model registered in ml/registry/exit")
@@ -1,11 +1,15 @@
 import pandas as pd
 from sklearn.ensemble import RandomForestClassifier
 from xgboost import XGBClassifier
-import joblib
+
+from ml.model_registry import register, training_window
+
+PROMOTE = True  # new versions go live in running bots at their next cycle
 
 # Load Data
 df = pd.read_csv("ml_dataset.csv")
 df.dropna(inplace=True)
+window = training_window(df)
 
 # Drop unused or datetime columns
 df = df.drop(columns=["timestamp", "time"], errors="ignore")
@@ -22,8 +26,11 @@ rf_model.fit(X, y)
 xgb_model = XGBClassifier(n_estimators=100, max_depth=5, learning_rate=0.1, use_label_encoder=False, eval_metric="logloss")
 xgb_model.fit(X, y)
 
-# Save models
-joblib.dump(rf_model, "ml/models/rf_model.pkl")
-joblib.dump(xgb_model, "ml/models/xgb_model.pkl")
+# Register versions (features, training window, params) in ml/registry/
+features = list(X.columns)
+register("entry_rf", rf_model, features, {"train_accuracy": float(rf_model.score(X, y))}, window,
+         rf_model.get_params(), promote=PROMOTE)
+register("entry_xgb", xgb_model, features, {"train_accuracy": float(xgb_model.score(X, y))}, window,
+         xgb_model.get_params(), promote=PROMOTE)
 
-print("✅ Models trained and saved.")
+print("✅ Models trained and registered.")
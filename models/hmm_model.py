@@ -1,5 +1,15 @@
+from collections import deque
+import os
+
+import joblib
 import numpy as np
-from hmmlearn.hmm import GaussianHMM
+import pandas as pd
+
+
+def _gaussian_hmm(**kwargs):
+    """hmmlearn GaussianHMM, imported on first use (kept out of startup and research imports)."""
+    from hmmlearn.hmm import GaussianHMM
+    return GaussianHMM(**kwargs)
 
 def detect_market_regime(df, price_col="close", n_states=2):
     df = df[[price_col]].copy()
@@ -10,7 +20,7 @@ def detect_market_regime(df, price_col="close", n_states=2):
         return 0, 0
 
     X = df["log_return"].values.reshape(-1, 1)
-    model = GaussianHMM(n_components=n_states, covariance_type="full", n_iter=1000)
+    model = _gaussian_hmm(n_components=n_states, covariance_type="full", n_iter=1000)
     model.fit(X)
     hidden_states = model.predict(X)
 
@@ -19,3 +29,218 @@ def detect_market_regime(df, price_col="close", n_states=2):
     current_regime = df["regime"].iloc[-1]
 
     return current_regime, trend_regime
+
+
+class RegimeModel:
+    """
+    Scheduled-fit HMM regime service with online forward filtering.
+
+    The GaussianHMM is fitted over the last `window` log returns (in %, which
+    keeps EM clear of hmmlearn's min_covar floor) every
+    `refit_every` bars (warm-started from the previous fit) and persisted to
+    `path`. Between fits the filtered state probabilities are rolled forward
+    one bar at a time with the forward algorithm, so a cycle costs O(n_states^2)
+    instead of a full EM + Viterbi pass.
+
+    States are relabelled after every fit in order of increasing return
+    variance (0 = calmest), so labels keep their meaning across refits and
+    restarts. `dominant` is the most frequent decoded state of the last fit,
+    matching detect_market_regime's trend_regime.
+    """
+
+    def __init__(self, n_states=2, window=999, refit_every=96, n_iter=1000,
+                 path="models/hmm_regime.pkl", price_col="close", random_state=None):
+        self.n_states = n_states
+        self.window = window
+        self.refit_every = refit_every
+        self.n_iter = n_iter
+        self.random_state = random_state  # fixed seed -> reproducible cold fits (backtests)
+        self.path = path
+        self.price_col = price_col
+
+        self.returns = deque(maxlen=window)
+        self.startprob = self.transmat = self.means = self.variances = None
+        self.dominant = 0
+        self.probs = None
+        self.last_price = None
+        self.last_time = None
+        self.bars_since_fit = 0
+        self.refits = 0
+
+        if path and os.path.exists(path):
+            self.load(path)
+
+    @property
+    def fitted(self):
+        return self.transmat is not None
+
+    @property
+    def regime(self):
+        return int(np.argmax(self.probs)) if self.probs is not None else 0
+
+    def current(self):
+        """(current_regime, trend_regime) like detect_market_regime."""
+        return self.regime, self.dominant
+
+    # === Persistence ===
+    def save(self, path=None):
+        path = path or self.path
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        tmp = f"{path}.tmp"
+        joblib.dump({
+            "n_states": self.n_states,
+            "startprob": self.startprob,
+            "transmat": self.transmat,
+            "means": self.means,
+            "variances": self.variances,
+            "dominant": self.dominant,
+        }, tmp)
+        os.replace(tmp, path)
+
+    def load(self, path=None):
+        try:
+            state = joblib.load(path or self.path)
+        except Exception as e:
+            print(f"⚠️ Could not load HMM regime model: {e}")
+            return
+        if state.get("n_states") != self.n_states:
+            return
+        self.startprob = state["startprob"]
+        self.transmat = state["transmat"]
+        self.means = state["means"]
+        self.variances = state["variances"]
+        self.dominant = int(state["dominant"])
+
+    # === Fitting ===
+    def _fit(self, X, warm):
+        if warm:
+            model = _gaussian_hmm(n_components=self.n_states, covariance_type="full",
+                                  n_iter=self.n_iter, init_params="", random_state=self.random_state)
+            model.startprob_ = self.startprob
+            model.transmat_ = self.transmat
+            model.means_ = self.means.reshape(-1, 1)
+            model.covars_ = self.variances.reshape(-1, 1, 1)
+        else:
+            model = _gaussian_hmm(n_components=self.n_states, covariance_type="full", n_iter=self.n_iter,
+                                  random_state=self.random_state)
+        model.fit(X)
+
+        variances = model.covars_.reshape(-1)
+        if not (np.all(np.isfinite(model.transmat_)) and np.allclose(model.transmat_.sum(axis=1), 1)
+                and np.all(np.isfinite(variances)) and np.all(variances > 0)):
+            raise ValueError("degenerate HMM fit")
+        return model
+
+    def refit(self):
+        if len(self.returns) < self.n_states * 10:
+            return self.probs
+        X = np.asarray(self.returns, dtype=float).reshape(-1, 1)
+
+        try:
+            try:
+                model = self._fit(X, warm=self.fitted)
+            except ValueError:
+                if not self.fitted:
+                    raise
+                model = self._fit(X, warm=False)
+
+            # Canonical labels: sort states by variance
+            order = np.argsort(model.covars_.reshape(-1))
+            rank = np.empty_like(order)
+            rank[order] = np.arange(self.n_states)
+
+            self.startprob = model.startprob_[order]
+            self.transmat = model.transmat_[np.ix_(order, order)]
+            self.means = model.means_.reshape(-1)[order]
+            self.variances = model.covars_.reshape(-1)[order]
+            self.dominant = int(np.bincount(rank[model.predict(X)], minlength=self.n_states).argmax())
+            # Posterior of the final bar given the whole window == filtered probability
+            self.probs = model.predict_proba(X)[-1][order]
+            self.refits += 1
+            if self.path:
+                self.save()
+        except Exception as e:
+            print(f"⚠️ HMM refit failed: {e}")
+
+        self.bars_since_fit = 0
+        return self.probs
+
+    # === Forward filter ===
+    def _emission(self, x):
+        var = self.variances
+        return np.exp(-0.5 * (x - self.means) ** 2 / var) / np.sqrt(2 * np.pi * var)
+
+    def _filter_step(self, x):
+        prior = self.startprob if self.probs is None else self.probs @ self.transmat
+        post = prior * self._emission(x)
+        total = post.sum()
+        self.probs = post / total if total > 0 and np.isfinite(total) else prior
+
+    def update(self, price):
+        """Consume one close; returns the filtered state probabilities."""
+        price = float(price)
+        if self.last_price is None:
+            self.last_price = price
+            return self.probs
+        x = np.log(price / self.last_price) * 100
+        self.last_price = price
+        self.returns.append(x)
+
+        if not self.fitted:
+            return self.refit()
+
+        self._filter_step(x)
+        self.bars_since_fit += 1
+        if self.bars_since_fit >= self.refit_every:
+            return self.refit()
+        return self.probs
+
+    def seed(self, df):
+        """Load history; filters it with a persisted model, or fits a new one."""
+        prices = df[self.price_col].astype(float).to_numpy()
+        if len(prices) == 0:
+            return self.probs
+        log_returns = np.log(prices[1:] / prices[:-1]) * 100
+        self.returns.extend(log_returns)
+        self.last_price = prices[-1]
+        if "time" in df.columns:
+            self.last_time = df["time"].iloc[-1]
+
+        if not self.fitted:
+            return self.refit()
+        self.probs = None
+        for x in log_returns[-self.window:]:
+            self._filter_step(x)
+        return self.probs
+
+    def sync(self, df):
+        """Feed the closes of `df` newer than the last one seen (needs a `time` column)."""
+        if self.last_time is None or df["time"].iloc[0] > self.last_time:
+            self.returns.clear()
+            return self.seed(df)
+
+        new = df[df["time"] > self.last_time]
+        for t, price in zip(new["time"], new[self.price_col]):
+            self.update(price)
+            self.last_time = t
+        return self.probs
+
+
+def regime_path(closes, warmup=1000, refit_every=96, random_state=0):
+    """
+    Walk-forward RegimeModel output for a whole close series: (regime, dominant)
+    arrays where entry i uses closes <= i only (0 before warmup). Never loads
+    or overwrites the live model file.
+    """
+    closes = np.asarray(closes, dtype=float)
+    model = RegimeModel(refit_every=refit_every, path=None, random_state=random_state)
+    regime = np.zeros(len(closes), dtype=np.int8)
+    dominant = np.zeros(len(closes), dtype=np.int8)
+    if len(closes) < warmup:
+        return regime, dominant
+    model.seed(pd.DataFrame({"close": closes[:warmup]}))
+    regime[warmup - 1], dominant[warmup - 1] = model.current()
+    for i in range(warmup, len(closes)):
+        model.update(closes[i])
+        regime[i], dominant[i] = model.current()
+    return regime, dominant
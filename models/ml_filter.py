@@ -1,16 +1,7 @@
 # models/ml_filter.py
 
-import joblib
-import pandas as pd
-import os
-
-# === Load the trained Random Forest model ===
-MODEL_PATH = "models/random_forest_model.pkl"
-
-if not os.path.exists(MODEL_PATH):
-    raise FileNotFoundError("Random Forest model not found at 'models/random_forest_model.pkl'.")
-
-model = joblib.load(MODEL_PATH)
+from ml.inference import ModelRunner
+from ml.model_registry import handle
 
 # === Define the expected input features (must match training set order) ===
 FEATURES = [
@@ -26,16 +17,21 @@ FEATURES = [
     "regime"       # Trending = 1, Non-trending = 0
 ]
 
+# === Trained Random Forest: promoted registry version, else models/random_forest_model.pkl (loaded on first use) ===
+filter_handle = handle("filter_rf", lambda model, meta: ModelRunner(model, FEATURES))
+
+
+def load_model():
+    return filter_handle.get()[1]
+
+
 def predict_trade_signal(latest_features: dict) -> int:
     """
     Predicts whether the trade is likely to succeed using the trained model.
     Returns 1 for likely success, 0 for likely failure.
     """
     try:
-        df = pd.DataFrame([latest_features])
-        df = df[FEATURES]  # Ensure order consistency
-        prediction = model.predict(df)[0]
-        return int(prediction)
+        return int(load_model().predict(latest_features))  # FEATURES order, ndarray input
     except Exception as e:
         print(f"⚠️ ML Prediction Error: {e}")
         return 0  # Conservative fallback: reject trade
@@ -2,10 +2,13 @@ import pandas as pd
 from sklearn.ensemble import RandomForestClassifier
 from sklearn.model_selection import train_test_split
 from sklearn.metrics import accuracy_score, confusion_matrix
-import joblib
-import os
 
-def train_rf_model(csv_path="data/trade_features.csv"):
+from ml.model_registry import register, training_window
+
+PROMOTE = True
+
+
+def train_rf_model(csv_path="data/trade_features.csv", promote=PROMOTE):
     df = pd.read_csv(csv_path)
 
     # Features to use
@@ -36,10 +39,10 @@ def train_rf_model(csv_path="data/trade_features.csv"):
     print("📊 Confusion Matrix:")
     print(cm)
 
-    # Save model
-    os.makedirs("models", exist_ok=True)
-    joblib.dump(clf, "models/random_forest_model.pkl")
-    print("✅ Model saved to models/random_forest_model.pkl")
+    # Register model
+    register("filter_rf", clf, features, {"accuracy": float(acc)}, training_window(df), clf.get_params(),
+             promote=promote)
+    print("✅ Model registered in ml/registry/filter_rf")
 
 if __name__ == "__main__":
     train_rf_model()
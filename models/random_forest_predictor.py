@@ -1,8 +1,9 @@
 # models/random_forest_predictor.py
-import joblib
 import pandas as pd
 
-model = joblib.load("models/random_forest_model.pkl")
+from ml.model_registry import load
+
+model, _ = load("filter_rf")  # promoted version, else models/random_forest_model.pkl
 
 def predict_with_rf(row):
     features = ["rsi2", "macd", "obv", "atr", "bollinger_width"]
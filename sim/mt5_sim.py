@@ -0,0 +1,592 @@
+# sim/mt5_sim.py
+"""
+Offline stand-in for the MetaTrader5 package.
+
+Exposes the API surface the bot uses (initialize, login, shutdown,
+last_error, copy_rates_from_pos / copy_rates_from / copy_rates_range,
+symbol_info_tick, account_info, positions_get, order_send and the
+constants/retcodes) on top of a replayed history:
+
+- Bars are replayed on a simulated clock. Inside a bar the price follows
+  O -> L -> H -> C (up bars) or O -> H -> L -> C (down bars), unless real
+  ticks are loaded with `load_ticks`, in which case those are replayed.
+- Bar prices are bids; ask = bid + spread (bar spread column or `spread_points`).
+- Market orders fill at bid/ask with `slippage_points` against the trader;
+  SL/TP are checked along the price path whenever the clock advances.
+- `sleep(seconds)` advances the clock instead of blocking. With `speed`
+  set it also waits seconds / speed of wall time (speed=None: full speed).
+
+Select it with MT5_BACKEND=sim (see utils/broker.py). Without explicit
+`load_bars`, `initialize()` replays every "SYMBOL[:TIMEFRAME]" of the
+comma-separated MT5_SIM_SYMBOL (default: BOT_PIPELINES, else XAUUSDc; the
+timeframe defaults to M15) from the local bar store, the first one driving
+the clock from MT5_SIM_WARMUP bars in. Quotes and stops of a symbol follow
+its shortest loaded timeframe.
+"""
+import os
+import time as _time
+from collections import namedtuple
+
+import numpy as np
+
+# === Constants (same values as the MetaTrader5 package) ===
+TIMEFRAME_M1 = 1
+TIMEFRAME_M5 = 5
+TIMEFRAME_M15 = 15
+TIMEFRAME_H1 = 16385
+TIMEFRAME_SECONDS = {TIMEFRAME_M1: 60, TIMEFRAME_M5: 300, TIMEFRAME_M15: 900, TIMEFRAME_H1: 3600}
+
+ORDER_TYPE_BUY = 0
+ORDER_TYPE_SELL = 1
+TRADE_ACTION_DEAL = 1
+TRADE_ACTION_SLTP = 6
+ORDER_TIME_GTC = 0
+ORDER_FILLING_FOK = 0
+ORDER_FILLING_IOC = 1
+ORDER_FILLING_RETURN = 2
+DEAL_TYPE_BUY = 0
+DEAL_TYPE_SELL = 1
+DEAL_ENTRY_IN = 0
+DEAL_ENTRY_OUT = 1
+
+TRADE_RETCODE_REQUOTE = 10004
+TRADE_RETCODE_REJECT = 10006
+TRADE_RETCODE_DONE = 10009
+TRADE_RETCODE_TIMEOUT = 10012
+TRADE_RETCODE_INVALID = 10013
+TRADE_RETCODE_INVALID_VOLUME = 10014
+TRADE_RETCODE_INVALID_STOPS = 10016
+TRADE_RETCODE_MARKET_CLOSED = 10018
+TRADE_RETCODE_NO_MONEY = 10019
+TRADE_RETCODE_PRICE_CHANGED = 10020
+TRADE_RETCODE_PRICE_OFF = 10021
+TRADE_RETCODE_POSITION_CLOSED = 10036
+
+RES_S_OK = 1
+RES_E_NOT_FOUND = -4
+RES_E_INVALID_PARAMS = -2
+
+RATE_DTYPE = np.dtype([
+    ("time", "<i8"), ("open", "<f8"), ("high", "<f8"), ("low", "<f8"), ("close", "<f8"),
+    ("tick_volume", "<u8"), ("spread", "<i4"), ("real_volume", "<u8"),
+])
+
+Tick = namedtuple("Tick", "time bid ask last volume time_msc flags volume_real")
+AccountInfo = namedtuple("AccountInfo", "login balance equity profit margin margin_free leverage currency server")
+TradePosition = namedtuple(
+    "TradePosition",
+    "ticket time type magic identifier volume price_open sl tp price_current profit symbol comment",
+)
+OrderSendResult = namedtuple(
+    "OrderSendResult",
+    "retcode deal order volume price bid ask comment request_id retcode_external request",
+)
+TerminalInfo = namedtuple("TerminalInfo", "connected trade_allowed name")
+TradeDeal = namedtuple(
+    "TradeDeal",
+    "ticket order time time_msc type entry magic position_id reason volume price commission swap profit symbol comment",
+)
+
+
+class ReplayFinished(Exception):
+    """Raised when the simulated clock runs past the end of the replayed data."""
+
+
+class _State:
+    def __init__(self):
+        self.reset()
+
+    def reset(self, balance=10_000.0, spread_points=20, slippage_points=0, point=0.01,
+              contract_size=100.0, requote_rate=0.0, speed=None, seed=0):
+        self.bars = {}          # (symbol, timeframe) -> structured rate array
+        self.ticks = {}         # symbol -> (time_msc, bid, ask)
+        self.primary = None     # (symbol, timeframe) that drives the clock
+        self.now = 0            # simulated epoch seconds
+        self.balance = balance
+        self.spread_points = spread_points
+        self.slippage_points = slippage_points
+        self.point = point
+        self.contract_size = contract_size
+        self.requote_rate = requote_rate
+        self.speed = speed
+        self.rng = np.random.default_rng(seed)
+        self.positions = {}
+        self.history = []       # closed deals: dicts with entry/exit/pnl/reason
+        self.next_ticket = 1
+        self.error = (RES_S_OK, "Success")
+        self.initialized = False
+        self.calls = {}
+        self.cycle_wall = []    # wall seconds between consecutive sleep() calls
+        self._last_wake = None
+
+
+_state = _State()
+
+
+def configure(**kwargs):
+    """Reset the simulator with new account / execution settings (see _State.reset)."""
+    _state.reset(**kwargs)
+
+
+def _count(name):
+    _state.calls[name] = _state.calls.get(name, 0) + 1
+
+
+def call_counts():
+    """Number of API calls per function since configure()."""
+    return dict(_state.calls)
+
+
+# === Data loading ===
+def load_bars(symbol, timeframe, rates, start_index=1000):
+    """
+    Register historical bars (structured array or dict of columns). The
+    first registered series drives the clock, starting at `start_index`.
+    """
+    names = rates.dtype.names if isinstance(rates, np.ndarray) else rates.keys()
+    arr = np.zeros(len(rates["time"]), dtype=RATE_DTYPE)
+    for name in RATE_DTYPE.names:
+        if name in names:
+            arr[name] = np.asarray(rates[name])
+    arr = arr[np.argsort(arr["time"], kind="stable")]
+    _state.bars[(symbol, timeframe)] = arr
+    if _state.primary is None:
+        _state.primary = (symbol, timeframe)
+        _state.now = int(arr["time"][min(max(start_index, 0), len(arr) - 1)])
+
+
+def load_ticks(symbol, time_msc, bid, ask):
+    """Replay real ticks for `symbol` instead of the synthetic intra-bar path."""
+    order = np.argsort(time_msc, kind="stable")
+    _state.ticks[symbol] = (
+        np.asarray(time_msc, dtype=np.int64)[order],
+        np.asarray(bid, dtype=float)[order],
+        np.asarray(ask, dtype=float)[order],
+    )
+
+
+def load_store(symbol="XAUUSDc", timeframe="M15", root="data/store", start_index=1000):
+    """Register bars straight from the local bar store's column files."""
+    from data.bar_store import COLUMNS  # lazy: bar_store itself imports the broker
+
+    path = os.path.join(root, symbol, timeframe)
+    rates = {}
+    for name, dtype in COLUMNS.items():
+        file = os.path.join(path, f"{name}.bin")
+        if os.path.exists(file):
+            rates[name] = np.fromfile(file, dtype=dtype)
+    if "time" not in rates or len(rates["time"]) == 0:
+        raise FileNotFoundError(f"No stored bars for {symbol} {timeframe} under {root}")
+    n = len(rates["time"])
+    rates = {k: v[:n] for k, v in rates.items()}
+    tf = {"M1": TIMEFRAME_M1, "M5": TIMEFRAME_M5, "M15": TIMEFRAME_M15, "H1": TIMEFRAME_H1}[timeframe.upper()]
+    load_bars(symbol, tf, rates, start_index=start_index)
+
+
+# === Price path ===
+def _path(bar, tf_seconds):
+    """(times, prices) of the synthetic intra-bar path of one bar."""
+    t0 = int(bar["time"])
+    o, h, l, c = float(bar["open"]), float(bar["high"]), float(bar["low"]), float(bar["close"])
+    mid = (l, h) if c >= o else (h, l)
+    times = (t0, t0 + tf_seconds / 3, t0 + 2 * tf_seconds / 3, t0 + tf_seconds - 1)
+    return times, (o, mid[0], mid[1], c)
+
+
+def _series(symbol, timeframe=None):
+    """Bars of `symbol` at `timeframe` (None: its shortest loaded timeframe, which prices follow)."""
+    if timeframe is None:
+        loaded = [(TIMEFRAME_SECONDS[tf], tf) for sym, tf in _state.bars if sym == symbol]
+        if not loaded:
+            return None, None
+        timeframe = min(loaded)[1]
+    return _state.bars.get((symbol, timeframe)), timeframe
+
+
+def _visible(symbol, timeframe):
+    """(rates, number of bars visible now, bar seconds); the last visible bar is forming."""
+    arr, tf = _series(symbol, timeframe)
+    if arr is None:
+        return None, 0, 0
+    return arr, int(np.searchsorted(arr["time"], _state.now, side="right")), TIMEFRAME_SECONDS[tf]
+
+
+def _slice(arr, lo, hi, n, tf_seconds):
+    """Copy of arr[lo:hi] with the forming bar (index n - 1) cut at the current time."""
+    lo, hi = max(lo, 0), min(max(hi, 0), n)
+    out = arr[lo:hi].copy()
+    if hi == n and hi > lo:
+        last = out[-1]
+        if _state.now < int(last["time"]) + tf_seconds - 1:
+            times, prices = _path(last, tf_seconds)
+            price = float(np.interp(_state.now, times, prices))
+            seen = [p for t, p in zip(times, prices) if t <= _state.now] + [price]
+            last["high"], last["low"], last["close"] = max(seen), min(seen), price
+            frac = (_state.now - int(last["time"])) / tf_seconds
+            last["tick_volume"] = int(last["tick_volume"] * frac)
+            out[-1] = last
+    return out
+
+
+def _spread(symbol):
+    arr, _ = _series(symbol)
+    if arr is not None and len(arr):
+        i = max(int(np.searchsorted(arr["time"], _state.now, side="right")) - 1, 0)
+        if arr["spread"][i] > 0:
+            return float(arr["spread"][i]) * _state.point
+    return _state.spread_points * _state.point
+
+
+def _quote(symbol):
+    """(bid, ask) at the current simulated time."""
+    if symbol in _state.ticks:
+        t, bid, ask = _state.ticks[symbol]
+        i = int(np.searchsorted(t, _state.now * 1000, side="right")) - 1
+        if i >= 0:
+            return float(bid[i]), float(ask[i])
+    _, tf = _series(symbol)
+    arr, n, tf_seconds = _visible(symbol, tf)
+    if arr is None or n == 0:
+        return None
+    bid = float(_slice(arr, n - 1, n, n, tf_seconds)["close"][-1])
+    return bid, bid + _spread(symbol)
+
+
+# === Stops along the path ===
+def _check_stops(symbol, bid_from, bid_to, at_time):
+    """Trigger SL/TP of `symbol` positions crossed by a monotone move bid_from -> bid_to."""
+    spread = _spread(symbol)
+    for ticket, pos in list(_state.positions.items()):
+        if pos["symbol"] != symbol:
+            continue
+        if pos["type"] == ORDER_TYPE_BUY:
+            lo, hi = min(bid_from, bid_to), max(bid_from, bid_to)
+            sl_hit = pos["sl"] > 0 and lo <= pos["sl"]
+            tp_hit = pos["tp"] > 0 and hi >= pos["tp"]
+            falling = bid_to < bid_from
+        else:
+            lo, hi = min(bid_from, bid_to) + spread, max(bid_from, bid_to) + spread
+            sl_hit = pos["sl"] > 0 and hi >= pos["sl"]
+            tp_hit = pos["tp"] > 0 and lo <= pos["tp"]
+            falling = bid_to > bid_from  # adverse for a sell
+        if sl_hit and (not tp_hit or falling):
+            slip = _state.slippage_points * _state.point
+            price = pos["sl"] - slip if pos["type"] == ORDER_TYPE_BUY else pos["sl"] + slip
+            _close(ticket, price, "SL", at_time)
+        elif tp_hit:
+            _close(ticket, pos["tp"], "TP", at_time)
+
+
+def _check_tick_stops(symbol, t_from, t_to):
+    t, bid, ask = _state.ticks[symbol]
+    lo = int(np.searchsorted(t, t_from * 1000, side="right"))
+    hi = int(np.searchsorted(t, t_to * 1000, side="right"))
+    for ticket, pos in list(_state.positions.items()):
+        if pos["symbol"] != symbol:
+            continue
+        b, a = bid[lo:hi], ask[lo:hi]
+        if pos["type"] == ORDER_TYPE_BUY:
+            sl = np.flatnonzero(b <= pos["sl"]) if pos["sl"] > 0 else np.empty(0, int)
+            tp = np.flatnonzero(b >= pos["tp"]) if pos["tp"] > 0 else np.empty(0, int)
+        else:
+            sl = np.flatnonzero(a >= pos["sl"]) if pos["sl"] > 0 else np.empty(0, int)
+            tp = np.flatnonzero(a <= pos["tp"]) if pos["tp"] > 0 else np.empty(0, int)
+        first_sl = sl[0] if len(sl) else None
+        first_tp = tp[0] if len(tp) else None
+        if first_sl is not None and (first_tp is None or first_sl <= first_tp):
+            _close(ticket, pos["sl"], "SL", int(t[lo + first_sl] // 1000))
+        elif first_tp is not None:
+            _close(ticket, pos["tp"], "TP", int(t[lo + first_tp] // 1000))
+
+
+def _price_at(arr, tf_seconds, at):
+    i = max(int(np.searchsorted(arr["time"], at, side="right")) - 1, 0)
+    times, prices = _path(arr[i], tf_seconds)
+    return float(np.interp(at, times, prices))
+
+
+def _check_path_stops(symbol, target):
+    """Walk the synthetic price path of `symbol` over (now, target], triggering its SL/TP."""
+    arr, tf = _series(symbol)
+    tf_seconds = TIMEFRAME_SECONDS[tf]
+    # Path vertices in (now, target], including gaps between bars
+    points = []
+    i = max(int(np.searchsorted(arr["time"], _state.now, side="right")) - 1, 0)
+    while i < len(arr) and int(arr["time"][i]) <= target:
+        times, prices = _path(arr[i], tf_seconds)
+        points.extend((t, p) for t, p in zip(times, prices) if _state.now < t <= target)
+        i += 1
+    points.append((target, _price_at(arr, tf_seconds, target)))
+
+    prev = _price_at(arr, tf_seconds, _state.now)
+    for t, price in points:
+        _check_stops(symbol, prev, price, int(t))
+        prev = price
+
+
+def advance(seconds):
+    """Move the simulated clock forward, triggering SL/TP of every loaded symbol along the way."""
+    if _state.primary is None:
+        raise ReplayFinished("No bars loaded")
+    target = _state.now + int(seconds)
+
+    for symbol in dict.fromkeys([sym for sym, _ in _state.bars] + list(_state.ticks)):
+        if symbol in _state.ticks:
+            _check_tick_stops(symbol, _state.now, target)
+        elif any(pos["symbol"] == symbol for pos in _state.positions.values()):
+            _check_path_stops(symbol, target)
+
+    _state.now = target
+    arr = _state.bars[_state.primary]
+    if _state.now >= int(arr["time"][-1]) + TIMEFRAME_SECONDS[_state.primary[1]]:
+        raise ReplayFinished(f"Replay finished at {len(arr)} bars")
+
+
+def sleep(seconds):
+    """Broker-clock sleep: advance the simulated clock (optionally paced by `speed`)."""
+    _count("sleep")
+    if _state._last_wake is not None:
+        _state.cycle_wall.append(_time.perf_counter() - _state._last_wake)
+    if _state.speed:
+        _time.sleep(seconds / _state.speed)
+    try:
+        advance(seconds)
+    finally:
+        _state._last_wake = _time.perf_counter()
+
+
+def cycle_latencies():
+    """Wall-clock seconds the bot spent between consecutive sleeps (one per cycle)."""
+    return list(_state.cycle_wall)
+
+
+def now():
+    return _state.now
+
+
+# === Terminal / account ===
+def initialize(*args, **kwargs):
+    _count("initialize")
+    if _state.primary is None:
+        entries = os.getenv("MT5_SIM_SYMBOL") or os.getenv("BOT_PIPELINES") or "XAUUSDc"
+        try:
+            for entry in entries.split(","):
+                symbol, _, timeframe = entry.strip().partition(":")
+                load_store(symbol, timeframe or "M15", root=os.getenv("MT5_SIM_SOURCE", "data/store"),
+                           start_index=int(os.getenv("MT5_SIM_WARMUP", "1000")))
+        except FileNotFoundError as e:
+            _state.error = (RES_E_NOT_FOUND, str(e))
+            return False
+    _state.initialized = True
+    return True
+
+
+def login(login=None, password=None, server=None, timeout=None):
+    _count("login")
+    return _state.initialized
+
+
+def shutdown():
+    _count("shutdown")
+    _state.initialized = False
+
+
+def last_error():
+    return _state.error
+
+
+def terminal_info():
+    return TerminalInfo(True, True, "mt5_sim") if _state.initialized else None
+
+
+def account_info():
+    _count("account_info")
+    profit = sum(_unrealized(pos) for pos in _state.positions.values())
+    equity = _state.balance + profit
+    return AccountInfo(0, _state.balance, equity, profit, 0.0, equity, 100, "USD", "sim")
+
+
+# === Market data ===
+def copy_rates_from_pos(symbol, timeframe, start_pos, count):
+    _count("copy_rates_from_pos")
+    arr, n, tf_seconds = _visible(symbol, timeframe)
+    if arr is None:
+        _state.error = (RES_E_NOT_FOUND, f"No bars for {symbol}")
+        return None
+    end = n - start_pos
+    return _slice(arr, end - count, end, n, tf_seconds)
+
+
+def copy_rates_from(symbol, timeframe, date_from, count):
+    _count("copy_rates_from")
+    arr, n, tf_seconds = _visible(symbol, timeframe)
+    if arr is None:
+        return None
+    end = min(int(np.searchsorted(arr["time"], _epoch(date_from), side="right")), n)
+    return _slice(arr, end - count, end, n, tf_seconds)
+
+
+def copy_rates_range(symbol, timeframe, date_from, date_to):
+    _count("copy_rates_range")
+    arr, n, tf_seconds = _visible(symbol, timeframe)
+    if arr is None:
+        return None
+    lo = int(np.searchsorted(arr["time"], _epoch(date_from), side="left"))
+    hi = int(np.searchsorted(arr["time"], _epoch(date_to), side="right"))
+    return _slice(arr, lo, hi, n, tf_seconds)
+
+
+def symbol_info_tick(symbol):
+    _count("symbol_info_tick")
+    quote = _quote(symbol)
+    if quote is None:
+        _state.error = (RES_E_NOT_FOUND, f"Unknown symbol {symbol}")
+        return None
+    bid, ask = quote
+    return Tick(_state.now, bid, ask, bid, 0, _state.now * 1000, 6, 0.0)
+
+
+def _epoch(value):
+    if isinstance(value, (int, float, np.integer)):
+        return int(value)
+    return int(value.timestamp())
+
+
+# === Trading ===
+def _unrealized(pos):
+    quote = _quote(pos["symbol"])
+    if quote is None:
+        return 0.0
+    bid, ask = quote
+    if pos["type"] == ORDER_TYPE_BUY:
+        return (bid - pos["price_open"]) * pos["volume"] * _state.contract_size
+    return (pos["price_open"] - ask) * pos["volume"] * _state.contract_size
+
+
+def _as_position(ticket, pos):
+    quote = _quote(pos["symbol"])
+    current = (quote[0] if pos["type"] == ORDER_TYPE_BUY else quote[1]) if quote else pos["price_open"]
+    return TradePosition(
+        ticket, pos["time"], pos["type"], pos["magic"], ticket, pos["volume"], pos["price_open"],
+        pos["sl"], pos["tp"], current, _unrealized(pos), pos["symbol"], pos["comment"],
+    )
+
+
+def positions_get(symbol=None, ticket=None, group=None):
+    _count("positions_get")
+    out = []
+    for t, pos in _state.positions.items():
+        if symbol is not None and pos["symbol"] != symbol:
+            continue
+        if ticket is not None and t != ticket:
+            continue
+        out.append(_as_position(t, pos))
+    return tuple(out)
+
+
+def _close(ticket, price, reason, at_time=None):
+    pos = _state.positions.pop(ticket)
+    direction = 1 if pos["type"] == ORDER_TYPE_BUY else -1
+    pnl = (price - pos["price_open"]) * direction * pos["volume"] * _state.contract_size
+    _state.balance += pnl
+    _state.history.append({
+        "ticket": ticket, "symbol": pos["symbol"], "direction": direction, "volume": pos["volume"],
+        "open_time": pos["time"], "close_time": at_time or _state.now, "entry_price": pos["price_open"],
+        "exit_price": price, "sl": pos["sl"], "tp": pos["tp"], "reason": reason, "pnl": pnl,
+        "magic": pos["magic"], "comment": pos["comment"],
+    })
+    return pnl
+
+
+def deals():
+    """Closed trades so far (replay ledger)."""
+    return list(_state.history)
+
+
+def history_deals_get(date_from=None, date_to=None, group=None, ticket=None, position=None):
+    """Entry and exit deals of closed positions (open positions' entry deals are not listed)."""
+    _count("history_deals_get")
+    start = 0 if date_from is None else _epoch(date_from)
+    end = float("inf") if date_to is None else _epoch(date_to)
+    out = []
+    for h in _state.history:
+        if position is not None and h["ticket"] != position:
+            continue
+        buy = h["direction"] == 1
+        legs = (
+            (2 * h["ticket"], h["open_time"], DEAL_TYPE_BUY if buy else DEAL_TYPE_SELL, DEAL_ENTRY_IN,
+             h["entry_price"], 0.0, h["comment"]),
+            (2 * h["ticket"] + 1, h["close_time"], DEAL_TYPE_SELL if buy else DEAL_TYPE_BUY, DEAL_ENTRY_OUT,
+             h["exit_price"], h["pnl"], h["reason"]),
+        )
+        for deal, at, kind, entry, price, profit, comment in legs:
+            if ticket is not None and deal != ticket:
+                continue
+            if start <= at <= end and (group is None or h["symbol"] == group):
+                out.append(TradeDeal(deal, h["ticket"], int(at), int(at) * 1000, kind, entry, h["magic"], h["ticket"],
+                                     0, h["volume"], price, 0.0, 0.0, profit, h["symbol"], comment))
+    return tuple(out)
+
+
+def _result(retcode, request, price=0.0, volume=0.0, order=0, comment=""):
+    quote = _quote(request.get("symbol", "")) if isinstance(request, dict) else None
+    bid, ask = quote if quote else (0.0, 0.0)
+    return OrderSendResult(retcode, order, order, volume, price, bid, ask, comment, 0, 0, request)
+
+
+def order_send(request):
+    _count("order_send")
+    if not isinstance(request, dict):
+        _state.error = (RES_E_INVALID_PARAMS, "request must be a dict")
+        return None
+    action = request.get("action")
+
+    if action == TRADE_ACTION_SLTP:
+        pos = _state.positions.get(request.get("position"))
+        if pos is None:
+            return _result(TRADE_RETCODE_POSITION_CLOSED, request, comment="Position doesn't exist")
+        pos["sl"] = float(request.get("sl", pos["sl"]) or 0.0)
+        pos["tp"] = float(request.get("tp", pos["tp"]) or 0.0)
+        return _result(TRADE_RETCODE_DONE, request, order=request["position"], comment="Request executed")
+
+    if action != TRADE_ACTION_DEAL:
+        return _result(TRADE_RETCODE_INVALID, request, comment="Invalid request")
+
+    symbol = request.get("symbol")
+    quote = _quote(symbol)
+    if quote is None:
+        return _result(TRADE_RETCODE_INVALID, request, comment="Unknown symbol")
+    volume = float(request.get("volume", 0.0))
+    if volume <= 0:
+        return _result(TRADE_RETCODE_INVALID_VOLUME, request, comment="Invalid volume")
+    if _state.requote_rate and _state.rng.random() < _state.requote_rate:
+        return _result(TRADE_RETCODE_REQUOTE, request, comment="Requote")
+
+    bid, ask = quote
+    slip = _state.slippage_points * _state.point
+    is_buy = request.get("type") == ORDER_TYPE_BUY
+    price = ask + slip if is_buy else bid - slip
+
+    # Closing an existing position
+    if request.get("position"):
+        ticket = request["position"]
+        if ticket not in _state.positions:
+            return _result(TRADE_RETCODE_POSITION_CLOSED, request, comment="Position doesn't exist")
+        _close(ticket, price, request.get("comment", "close"))
+        return _result(TRADE_RETCODE_DONE, request, price=price, volume=volume, order=ticket,
+                       comment="Request executed")
+
+    sl = float(request.get("sl", 0.0) or 0.0)
+    tp = float(request.get("tp", 0.0) or 0.0)
+    if (is_buy and ((sl and sl >= bid) or (tp and tp <= ask))) or \
+            (not is_buy and ((sl and sl <= ask) or (tp and tp >= bid))):
+        return _result(TRADE_RETCODE_INVALID_STOPS, request, comment="Invalid stops")
+
+    ticket = _state.next_ticket
+    _state.next_ticket += 1
+    _state.positions[ticket] = {
+        "symbol": symbol, "type": ORDER_TYPE_BUY if is_buy else ORDER_TYPE_SELL, "volume": volume,
+        "price_open": price, "sl": sl, "tp": tp, "magic": request.get("magic", 0),
+        "comment": request.get("comment", ""), "time": _state.now,
+    }
+    return _result(TRADE_RETCODE_DONE, request, price=price, volume=volume, order=ticket, comment="Request executed")
@@ -0,0 +1,115 @@
+# sim/replay.py
+"""
+Run main.py end-to-end against the offline broker and report throughput.
+
+    python -m sim.replay --symbol XAUUSDc --warmup 1000 --slippage 5
+
+Bars come from the local bar store (data/store, filled by data/bar_store.py).
+The bot runs at full speed unless --speed is given (simulated seconds per
+wall second). The report covers cycles/sec, per-cycle latency percentiles,
+broker call counts and the closed-trade ledger. --pipelines
+"XAUUSDc:M15,XAUUSDc:H1" replays several pipelines, with the bars of each
+loaded (the first one drives the clock).
+
+Regression gate (exit status 1 on failure) after a model / feature change:
+
+    python -m sim.replay --metrics-out stages.json               # on the known-good tree
+    python -m sim.replay --baseline stages.json --budget-ms 250  # on the change
+
+--baseline fails any stage whose mean time grew by more than --tolerance
+(and --floor-ms); --budget-ms fails a p99 cycle latency over the budget.
+"""
+import argparse
+import json
+import os
+import runpy
+import sys
+import time
+
+import numpy as np
+
+os.environ["MT5_BACKEND"] = "sim"
+os.environ["TELEGRAM_TOKEN"] = ""  # never message the real chat from a replay
+
+from sim import mt5_sim  # noqa: E402
+from utils import metrics  # noqa: E402
+
+
+def regressions(baseline, current, tolerance=0.25, floor_ms=1.0):
+    """Stages (as in metrics.summary()) whose mean ms grew by more than `tolerance` and `floor_ms`."""
+    out = []
+    for stage, before in baseline.items():
+        after = current.get(stage)
+        if after is None or not before.get("mean_ms"):
+            continue
+        grew = after["mean_ms"] - before["mean_ms"]
+        if grew > floor_ms and grew > tolerance * before["mean_ms"]:
+            out.append(f"{stage}: mean {before['mean_ms']:.2f} -> {after['mean_ms']:.2f} ms")
+    return out
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Replay the bot against the simulated MT5 broker")
+    parser.add_argument("--symbol", default="XAUUSDc")
+    parser.add_argument("--timeframe", default="M15")
+    parser.add_argument("--pipelines", help='"SYMBOL:TIMEFRAME,..." to run (default: --symbol:--timeframe)')
+    parser.add_argument("--source", default="data/store", help="bar store root to replay from")
+    parser.add_argument("--warmup", type=int, default=1000, help="bars of history before the replay starts")
+    parser.add_argument("--speed", type=float, default=None, help="simulated seconds per wall second")
+    parser.add_argument("--slippage", type=int, default=0, help="slippage in points")
+    parser.add_argument("--spread", type=int, default=20, help="fallback spread in points")
+    parser.add_argument("--requote-rate", type=float, default=0.0)
+    parser.add_argument("--balance", type=float, default=10_000.0)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--metrics-out", help="write the per-stage timings (JSON) here")
+    parser.add_argument("--baseline", help="per-stage timings of a known-good run to compare against")
+    parser.add_argument("--tolerance", type=float, default=0.25, help="allowed growth of a stage's mean time")
+    parser.add_argument("--floor-ms", type=float, default=1.0, help="growth always allowed (timer noise)")
+    parser.add_argument("--budget-ms", type=float, default=None, help="p99 cycle latency budget")
+    args = parser.parse_args()
+    metrics.enable()
+
+    mt5_sim.configure(balance=args.balance, spread_points=args.spread, slippage_points=args.slippage,
+                      requote_rate=args.requote_rate, speed=args.speed, seed=args.seed)
+    pipelines = args.pipelines or f"{args.symbol}:{args.timeframe}"
+    for entry in pipelines.split(","):
+        symbol, _, timeframe = entry.strip().partition(":")
+        mt5_sim.load_store(symbol, timeframe or "M15", root=args.source, start_index=args.warmup)
+    os.environ["MT5_SIM_SYMBOL"] = os.environ["BOT_PIPELINES"] = pipelines
+
+    start = time.perf_counter()
+    runpy.run_path("main.py", run_name="__main__")
+    elapsed = time.perf_counter() - start
+
+    latencies = np.array(mt5_sim.cycle_latencies()) * 1000
+    deals = mt5_sim.deals()
+    print("\n=== 📊 Replay Report ===")
+    print(f"Cycles: {len(latencies)} in {elapsed:.2f}s ({len(latencies) / max(elapsed, 1e-9):.1f} cycles/s)")
+    if len(latencies):
+        p50, p90, p99 = np.percentile(latencies, [50, 90, 99])
+        print(f"Cycle latency ms: p50={p50:.2f} p90={p90:.2f} p99={p99:.2f} max={latencies.max():.2f}")
+    print(f"Broker calls: {mt5_sim.call_counts()}")
+    pnl = sum(d["pnl"] for d in deals)
+    print(f"Closed trades: {len(deals)} | PnL: ${pnl:.2f} | Balance: ${mt5_sim.account_info().balance:.2f}")
+
+    stages = metrics.summary()  # printed per stage by main.py
+    for cycle, s in metrics.summary("cycle_mt5_calls").items():
+        print(f"MT5 calls per {cycle} cycle: mean={s['mean_ms']:.1f} max={s['max_ms']:.0f}")
+    if args.metrics_out:
+        with open(args.metrics_out, "w") as f:
+            json.dump(stages, f, indent=2)
+
+    failures = []
+    if args.budget_ms is not None and len(latencies) and np.percentile(latencies, 99) > args.budget_ms:
+        failures.append(f"p99 cycle latency {np.percentile(latencies, 99):.2f} ms over the {args.budget_ms:.0f} ms budget")
+    if args.baseline:
+        with open(args.baseline) as f:
+            failures += regressions(json.load(f), stages, args.tolerance, args.floor_ms)
+    for failure in failures:
+        print(f"❌ {failure}")
+    if failures:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,118 @@
+# sim/telegram_stub.py
+"""
+Local stand-in for the Telegram Bot API's sendMessage, for exercising the
+notifier without touching a real chat.
+
+    python -m sim.telegram_stub --port 8081 [--latency 0.5] [--flood 3]
+    TELEGRAM_API=http://127.0.0.1:8081 python main.py
+
+Records every message it accepts. `latency` delays each response,
+`flood` answers that many requests per chat with a 429 (retry_after) and
+`fail` that many with a 500, to exercise the sender's retry paths.
+"""
+import argparse
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs
+
+
+class TelegramStub:
+    """sendMessage on 127.0.0.1 in a background thread; `messages` holds (chat_id, text, time)."""
+
+    def __init__(self, port=0, latency=0.0, flood=0, fail=0, retry_after=1):
+        self.latency = latency
+        self.flood = flood
+        self.fail = fail
+        self.retry_after = retry_after
+        self.messages = []
+        self.requests = 0
+        self._lock = threading.Lock()
+        self._server = ThreadingHTTPServer(("127.0.0.1", port), self._handler())
+        self._thread = None
+
+    @property
+    def url(self):
+        return f"http://127.0.0.1:{self._server.server_address[1]}"
+
+    def _handler(self):
+        stub = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_POST(self):
+                body = self.rfile.read(int(self.headers.get("Content-Length", 0))).decode()
+                if self.headers.get("Content-Type", "").startswith("application/json"):
+                    form = json.loads(body or "{}")
+                else:
+                    form = {k: v[0] for k, v in parse_qs(body).items()}
+                if stub.latency:
+                    time.sleep(stub.latency)
+
+                with stub._lock:
+                    stub.requests += 1
+                    if not self.path.endswith("/sendMessage") or "chat_id" not in form or not form.get("text"):
+                        status, reply = 400, {"ok": False, "error_code": 400, "description": "Bad Request"}
+                    elif stub.flood > 0:
+                        stub.flood -= 1
+                        status, reply = 429, {"ok": False, "error_code": 429,
+                                              "description": "Too Many Requests",
+                                              "parameters": {"retry_after": stub.retry_after}}
+                    elif stub.fail > 0:
+                        stub.fail -= 1
+                        status, reply = 500, {"ok": False, "error_code": 500, "description": "Internal Server Error"}
+                    else:
+                        stub.messages.append((str(form["chat_id"]), form["text"], time.time()))
+                        status, reply = 200, {"ok": True, "result": {"message_id": len(stub.messages)}}
+
+                payload = json.dumps(reply).encode()
+                self.send_response(status)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(payload)))
+                self.end_headers()
+                self.wfile.write(payload)
+
+            def log_message(self, *args):
+                pass
+
+        return Handler
+
+    def start(self):
+        self._thread = threading.Thread(target=self._server.serve_forever, name="telegram-stub", daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._server.shutdown()
+        self._server.server_close()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Local Telegram sendMessage stand-in")
+    parser.add_argument("--port", type=int, default=8081)
+    parser.add_argument("--latency", type=float, default=0.0, help="seconds before each response")
+    parser.add_argument("--flood", type=int, default=0, help="first N requests get a 429")
+    parser.add_argument("--fail", type=int, default=0, help="next N requests get a 500")
+    args = parser.parse_args()
+
+    stub = TelegramStub(args.port, args.latency, args.flood, args.fail).start()
+    print(f"📨 Telegram stub on {stub.url} (TELEGRAM_API={stub.url})")
+    seen = 0
+    try:
+        while True:
+            time.sleep(0.2)
+            for chat, text, _ in stub.messages[seen:]:
+                print(f"--- chat {chat}\n{text}")
+            seen = len(stub.messages)
+    except KeyboardInterrupt:
+        stub.stop()
+
+
+if __name__ == "__main__":
+    main()
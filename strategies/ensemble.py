@@ -0,0 +1,69 @@
+import numpy as np
+
+ENSEMBLE = "Ensemble (RSI2 + MACD + Structure)"
+
+
+def combine_signals(rsi2_signal, macd_signal, structure_signal):
+    """
+    Ensemble vote of the three strategies: two or more agreeing wins,
+    otherwise the first non-zero of Structure > MACD_BB > RSI2.
+    Returns (signal, strategy_used).
+    """
+    combined = rsi2_signal + macd_signal + structure_signal
+
+    if combined >= 2:
+        return 1, ENSEMBLE
+    if combined <= -2:
+        return -1, ENSEMBLE
+    if structure_signal != 0:
+        return structure_signal, "Structure Only"
+    if macd_signal != 0:
+        return macd_signal, "MACD_BB Only"
+    if rsi2_signal != 0:
+        return rsi2_signal, "RSI2 Only"
+    return 0, None
+
+
+def combine_signals_array(rsi2_signal, macd_signal, structure_signal):
+    """Vectorised combine_signals over many bars: (signal array, strategy_used array)."""
+    rsi2_signal, macd_signal, structure_signal = (np.asarray(x) for x in (rsi2_signal, macd_signal, structure_signal))
+    combined = rsi2_signal + macd_signal + structure_signal
+    conditions = [combined >= 2, combined <= -2, structure_signal != 0, macd_signal != 0, rsi2_signal != 0]
+    signal = np.select(conditions, [1, -1, structure_signal, macd_signal, rsi2_signal], 0)
+    strategy = np.select(conditions, [ENSEMBLE, ENSEMBLE, "Structure Only", "MACD_BB Only", "RSI2 Only"], None)
+    return signal, strategy
+
+
+def entry_features(last, vol, regime):
+    """ML filter input from IndicatorEngine values + GARCH vol + HMM regime (scalars, or arrays for many bars)."""
+    return {
+        "rsi2": last["rsi2"],
+        "rsi14": last["rsi14"],
+        "macd_line": last["macd_line"],
+        "macd_signal": last["macd_signal"],
+        "macd_hist": last["macd_hist"],
+        "bb_upper": last["bb_upper"],
+        "bb_lower": last["bb_lower"],
+        "bb_width": last["bb_upper"] - last["bb_lower"],
+        "obv": last["obv"],
+        "atr": last["atr"],
+        "volatility": vol,
+        "regime": regime
+    }
+
+
+def should_exit(direction, p_win, rsi_now, macd_now, signal_now):
+    """Close when the exit model loses confidence or momentum turns against an extended move."""
+    return p_win < 0.4 or (
+        (direction == 1 and macd_now < signal_now and rsi_now > 70) or
+        (direction == -1 and macd_now > signal_now and rsi_now < 30)
+    )
+
+
+def should_exit_array(direction, p_win, rsi_now, macd_now, signal_now):
+    """Vectorised should_exit over many positions (NaN p_win never exits on confidence alone)."""
+    direction, p_win = np.asarray(direction), np.asarray(p_win, dtype=float)
+    return (p_win < 0.4) | (
+        ((direction == 1) & (macd_now < signal_now) & (rsi_now > 70)) |
+        ((direction == -1) & (macd_now > signal_now) & (rsi_now < 30))
+    )
@@ -1,7 +1,8 @@
 import pandas as pd
-import ta
 
-def apply_macd_bollinger(df: pd.DataFrame) -> pd.DataFrame:
+def apply_macd_bollinger(df: pd.DataFrame, bb_period=21, bb_std=2) -> pd.DataFrame:
+    import ta  # lazy: the live loop only needs macd_bb_signal
+
     df = df.copy()
 
     # MACD
@@ -11,7 +12,7 @@ def apply_macd_bollinger(df: pd.DataFrame) -> pd.DataFrame:
     df["macd_hist"] = df["macd_line"] - df["macd_signal"]
 
     # Bollinger Bands
-    bb = ta.volatility.BollingerBands(df["close"], window=21, window_dev=2)
+    bb = ta.volatility.BollingerBands(df["close"], window=bb_period, window_dev=bb_std)
     df["bb_upper"] = bb.bollinger_hband()
     df["bb_lower"] = bb.bollinger_lband()
 
@@ -30,3 +31,12 @@ def apply_macd_bollinger(df: pd.DataFrame) -> pd.DataFrame:
     ] = -1  # SELL
 
     return df
+
+
+def macd_bb_signal(close, bb_upper, bb_lower, macd_hist):
+    """Scalar form of the apply_macd_bollinger rule for a single bar (NaN -> 0)."""
+    if close < bb_lower and macd_hist > 0:
+        return 1
+    if close > bb_upper and macd_hist < 0:
+        return -1
+    return 0
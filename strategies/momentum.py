@@ -1,9 +1,18 @@
 from indicators.rsi import calculate_rsi
 
-def apply_rsi2(df):
+def apply_rsi2(df, low=10, high=90):
     df["rsi2"] = calculate_rsi(df["close"], 2)
     df["rsi14"] = calculate_rsi(df["close"], 14)  # ✅ Add this line
     df["signal"] = 0
-    df.loc[df["rsi2"] < 10, "signal"] = 1
-    df.loc[df["rsi2"] > 90, "signal"] = -1
+    df.loc[df["rsi2"] < low, "signal"] = 1
+    df.loc[df["rsi2"] > high, "signal"] = -1
     return df
+
+
+def rsi2_signal(rsi2, low=10, high=90):
+    """Scalar form of the apply_rsi2 rule for a single bar."""
+    if rsi2 < low:
+        return 1
+    if rsi2 > high:
+        return -1
+    return 0
@@ -15,3 +15,12 @@ def detect_hh_ll_breakout(df: pd.DataFrame, lookback=20) -> pd.DataFrame:
     df.loc[breakout_down, "signal_structure"] = -1  # SELL
 
     return df
+
+
+def structure_signal(close, prev_high, prev_low):
+    """Scalar form of detect_hh_ll_breakout given the prior `lookback` bars' extremes."""
+    if close > prev_high:
+        return 1
+    if close < prev_low:
+        return -1
+    return 0
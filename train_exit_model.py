@@ -2,8 +2,10 @@ import pandas as pd
 from sklearn.model_selection import train_test_split
 from sklearn.linear_model import LogisticRegression
 from sklearn.metrics import classification_report, roc_auc_score
-import joblib
-import os
+
+from ml.model_registry import register, training_window
+
+PROMOTE = True  # False: register only, promote later with `python -m ml.model_registry promote`
 
 # === Load Dataset ===
 df = pd.read_csv("data/exit_dataset.csv")
@@ -28,9 +30,10 @@ y_pred = model.predict(X_test)
 y_prob = model.predict_proba(X_test)[:, 1]  # probability of hitting TP
 
 print("📊 Classification Report:\n", classification_report(y_test, y_pred))
-print(f"🎯 ROC-AUC Score: {roc_auc_score(y_test, y_prob):.3f}")
+auc = roc_auc_score(y_test, y_prob)
+print(f"🎯 ROC-AUC Score: {auc:.3f}")
 
-# === Save Model and Feature List ===
-os.makedirs("ml", exist_ok=True)
-joblib.dump((model, feature_names), "ml/exit_model.pkl")
-print("✅ Exit model saved to ml/exit_model.pkl")
+# === Register Model and Feature List ===
+register("exit", model, feature_names, {"roc_auc": float(auc), "accuracy": float((y_pred == y_test).mean())},
+         training_window(df), model.get_params(), promote=PROMOTE)
+print("✅ Exit model registered in ml/registry/exit")
@@ -1,7 +1,6 @@
 # train_model.py
 
 import os
-import joblib
 import pandas as pd
 import matplotlib.pyplot as plt
 
@@ -14,6 +13,10 @@ from sklearn.metrics import (
     roc_auc_score
 )
 
+from ml.model_registry import register, training_window
+
+PROMOTE = True
+
 # === Load Dataset ===
 df = pd.read_csv("data/trade_features.csv")
 df.dropna(inplace=True)
@@ -42,16 +45,19 @@ print("🧱 Confusion Matrix:\n", confusion_matrix(y_test, y_pred))
 # === Confidence Scores ===
 accuracy = accuracy_score(y_test, y_pred)
 print(f"✅ Accuracy: {accuracy:.2f}")
+metrics = {"accuracy": float(accuracy)}
 
 if len(y.unique()) == 2:
     y_proba = model.predict_proba(X_test)[:, 1]
     auc = roc_auc_score(y_test, y_proba)
     print(f"✅ AUC Score: {auc:.2f}")
+    metrics["roc_auc"] = float(auc)
 
 # === Cross Validation (optional) ===
 cv_scores = cross_val_score(model, X, y, cv=5, scoring='f1_weighted')
 print(f"🔁 Cross-validated F1 scores: {cv_scores}")
 print(f"📈 Mean F1: {cv_scores.mean():.3f}")
+metrics["cv_f1"] = float(cv_scores.mean())
 
 # === Feature Importances ===
 importances = model.feature_importances_
@@ -63,9 +69,9 @@ print(feat_df.head(10))
 
 # === Save to file ===
 os.makedirs("ml", exist_ok=True)
-joblib.dump((model, feature_names), "ml/trade_model.pkl")
+register("trade_rf", model, feature_names, metrics, training_window(df), model.get_params(), promote=PROMOTE)
 feat_df.to_csv("ml/feature_importance.csv", index=False)
-print("✅ Model and feature importance saved to ml/")
+print("✅ Model registered, feature importance saved to ml/")
 
 # === Plot (optional) ===
 feat_df.head(10).plot(kind="barh", x="feature", y="importance", title="Top 10 Features")
@@ -0,0 +1,31 @@
+# utils/broker.py
+"""
+Broker backend selection. Everything that talks to MetaTrader5 imports
+`mt5` from here, so MT5_BACKEND=sim swaps in the offline replay broker
+(sim/mt5_sim.py) and `sleep` advances its clock instead of blocking.
+"""
+import os
+import time
+
+BACKEND = os.getenv("MT5_BACKEND", "live").lower()
+
+if BACKEND == "sim":
+    from sim import mt5_sim as mt5
+    from sim.mt5_sim import ReplayFinished
+
+    def sleep(seconds):
+        mt5.sleep(seconds)
+
+    def now():
+        return mt5.now()
+else:
+    import MetaTrader5 as mt5
+
+    class ReplayFinished(Exception):
+        """Only raised by the simulated broker."""
+
+    def sleep(seconds):
+        time.sleep(seconds)
+
+    def now():
+        return time.time()
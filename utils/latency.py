@@ -0,0 +1,62 @@
+import bisect
+import threading
+
+# Upper bounds (ms) of the histogram buckets; anything slower lands in +inf
+BUCKETS_MS = (0.01, 0.02, 0.05, 0.1, 0.2, 0.5, 1, 2, 5, 10, 20, 50, 100, 200, 500, 1000, 2000, 5000, 10000, 30000)
+
+
+class Histogram:
+    """Fixed-bucket latency histogram (thread-safe): counts, sum and interpolated quantiles."""
+
+    def __init__(self, buckets=BUCKETS_MS):
+        self.buckets = tuple(buckets)
+        self.counts = [0] * (len(self.buckets) + 1)
+        self.count = 0
+        self.sum = 0.0
+        self.max = 0.0
+        self.min = float("inf")
+        self._lock = threading.Lock()
+
+    def observe(self, ms):
+        with self._lock:
+            self.counts[bisect.bisect_left(self.buckets, ms)] += 1
+            self.count += 1
+            self.sum += ms
+            self.max = max(self.max, ms)
+            self.min = min(self.min, ms)
+
+    def quantile(self, q):
+        """
+        q-quantile, interpolated linearly inside the bucket that holds it
+        (bucket edges narrowed to the smallest / largest observation).
+        """
+        with self._lock:
+            if not self.count:
+                return None
+            rank, seen = q * self.count, 0
+            for i, n in enumerate(self.counts):
+                if n and seen + n >= rank:
+                    lower = max(self.buckets[i - 1] if i else 0.0, self.min)
+                    upper = min(self.buckets[i] if i < len(self.buckets) else self.max, self.max)
+                    return lower + (upper - lower) * max(rank - seen, 0) / n
+                seen += n
+            return self.max
+
+    def cumulative(self):
+        """[(upper bound, observations <= bound)], ending with (inf, count)."""
+        with self._lock:
+            out, seen = [], 0
+            for bound, n in zip(self.buckets + (float("inf"),), self.counts):
+                seen += n
+                out.append((bound, seen))
+            return out
+
+    def summary(self):
+        return {
+            "count": self.count,
+            "mean_ms": self.sum / self.count if self.count else None,
+            "p50_ms": self.quantile(0.5),
+            "p90_ms": self.quantile(0.9),
+            "p99_ms": self.quantile(0.99),
+            "max_ms": self.max if self.count else None,
+        }
@@ -0,0 +1,249 @@
+"""
+Per-stage timers, counters and histograms for the trading loop, exported
+in the Prometheus text format.
+
+Off unless main.py's start() finds BOT_METRICS_PORT (served on
+http://127.0.0.1:<port>/metrics) or BOT_METRICS_FILE (rewritten every
+BOT_METRICS_EVERY seconds, e.g. for a node_exporter textfile collector).
+While off, timer() and cycle() hand back one shared no-op context and
+count_call() returns at once, so the instrumented code pays a function
+call per stage.
+
+Durations are kept in ms (utils/latency.Histogram) and exported in
+seconds; every metric name gets the "bot_" prefix.
+"""
+import atexit
+import contextlib
+import os
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from utils.latency import Histogram
+
+PREFIX = "bot"
+WRITE_EVERY = 15.0  # seconds between rewrites of BOT_METRICS_FILE
+
+# Buckets (calls) of the MT5-calls-per-cycle histogram
+CALL_BUCKETS = (1, 2, 3, 5, 8, 13, 20, 30, 50, 100)
+
+enabled = False
+
+_lock = threading.Lock()
+_counters = {}    # (name, labels) -> value
+_histograms = {}  # (name, labels) -> Histogram
+_collectors = []  # callables returning [(name, type, labels, value)] at export time
+_local = threading.local()  # .calls: MT5 calls of the cycle running on this thread
+_NULL = contextlib.nullcontext()
+
+
+def enable():
+    global enabled
+    enabled = True
+
+
+# === Recording ===
+def histogram(name, labels=(), buckets=None):
+    """The histogram for `name` + `labels` (a tuple of (label, value) pairs), created on first use."""
+    key = (name, labels)
+    h = _histograms.get(key)
+    if h is None:
+        with _lock:
+            h = _histograms.setdefault(key, Histogram(buckets) if buckets else Histogram())
+    return h
+
+
+def observe(name, value, **labels):
+    if enabled:
+        histogram(name, tuple(labels.items())).observe(value)
+
+
+def inc(name, value=1, **labels):
+    if not enabled:
+        return
+    key = (name, tuple(labels.items()))
+    with _lock:
+        _counters[key] = _counters.get(key, 0) + value
+
+
+class _Timer:
+    __slots__ = ("histogram", "start")
+
+    def __init__(self, histogram):
+        self.histogram = histogram
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        self.histogram.observe((time.perf_counter() - self.start) * 1000)
+
+
+def timer(stage, pipeline=""):
+    """Context timing one stage of a cycle into bot_stage_seconds{pipeline, stage}."""
+    if not enabled:
+        return _NULL
+    return _Timer(histogram("stage_seconds", (("pipeline", pipeline), ("stage", stage))))
+
+
+class _Cycle:
+    __slots__ = ("labels", "start")
+
+    def __init__(self, labels):
+        self.labels = labels
+
+    def __enter__(self):
+        _local.calls = 0
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, *exc):
+        elapsed = (time.perf_counter() - self.start) * 1000
+        calls, _local.calls = _local.calls, None
+        histogram("cycle_seconds", self.labels).observe(elapsed)
+        histogram("cycle_mt5_calls", self.labels, CALL_BUCKETS).observe(calls)
+        if exc_type is not None:
+            inc("cycle_errors_total", **dict(self.labels))
+
+
+def cycle(pipeline, kind):
+    """
+    Context around one pipeline cycle ("bar" / "exit"): its duration and the
+    MT5 calls made on its thread (order sends run on the executor's workers
+    and are only in the bot_mt5_calls_total totals).
+    """
+    if not enabled:
+        return _NULL
+    return _Cycle((("pipeline", pipeline), ("kind", kind)))
+
+
+def count_call(name):
+    """One MT5 call (utils/mt5_connector.mt5_call): per function, and towards the current cycle."""
+    if not enabled:
+        return
+    inc("mt5_calls_total", fn=name)
+    calls = getattr(_local, "calls", None)
+    if calls is not None:
+        _local.calls = calls + 1
+
+
+def register(collector):
+    """`collector()` -> [(name, "counter" | "gauge" | "histogram", labels, value)], called at each export."""
+    with _lock:
+        _collectors.append(collector)
+
+
+def summary(name="stage_seconds"):
+    """{"label/label": histogram summary (ms)} of one histogram family, e.g. per pipeline/stage."""
+    with _lock:
+        items = [(labels, h) for (n, labels), h in _histograms.items() if n == name]
+    return {"/".join(value for _, value in labels): h.summary() for labels, h in sorted(items) if h.count}
+
+
+# === Export ===
+def _escape(value):
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _labels(labels):
+    if not labels:
+        return ""
+    return "{" + ",".join(f'{k}="{_escape(v)}"' for k, v in labels) + "}"
+
+
+def _number(value):
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+def render():
+    """All metrics in the Prometheus text exposition format (0.0.4)."""
+    with _lock:
+        samples = [(name, "counter", labels, value) for (name, labels), value in _counters.items()]
+        samples += [(name, "histogram", labels, h) for (name, labels), h in _histograms.items()]
+        collectors = list(_collectors)
+    for collect in collectors:
+        try:
+            samples.extend(collect())
+        except Exception as e:
+            print(f"⚠️ Metrics collector {collect} failed: {e}")
+
+    families = {}
+    for name, kind, labels, value in samples:
+        families.setdefault((name, kind), []).append((tuple(labels), value))
+
+    lines = []
+    for (name, kind), series in families.items():
+        full = f"{PREFIX}_{name}"
+        lines.append(f"# TYPE {full} {kind}")
+        for labels, value in series:
+            if kind != "histogram":
+                lines.append(f"{full}{_labels(labels)} {_number(value)}")
+                continue
+            scale = 1000 if name.endswith("_seconds") else 1  # ms -> s
+            buckets = value.cumulative()
+            for bound, n in buckets:
+                le = "+Inf" if bound == float("inf") else _number(bound / scale)
+                lines.append(f"{full}_bucket{_labels(labels + (('le', le),))} {n}")
+            lines.append(f"{full}_sum{_labels(labels)} {_number(value.sum / scale)}")
+            lines.append(f"{full}_count{_labels(labels)} {buckets[-1][1]}")
+    return "\n".join(lines) + "\n"
+
+
+def write(path):
+    """Replace `path` with the current metrics (atomically, so a scraper never reads half a file)."""
+    tmp = f"{path}.tmp"
+    with open(tmp, "w") as f:
+        f.write(render())
+    os.replace(tmp, path)
+
+
+class _Handler(BaseHTTPRequestHandler):
+    def do_GET(self):
+        if self.path.split("?")[0] not in ("/", "/metrics"):
+            self.send_error(404)
+            return
+        body = render().encode()
+        self.send_response(200)
+        self.send_header("Content-Type", "text/plain; version=0.0.4; charset=utf-8")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass  # no line per scrape on the bot's console
+
+
+def serve(port, host="127.0.0.1"):
+    """Serve /metrics from a daemon thread; returns the server."""
+    server = ThreadingHTTPServer((host, port), _Handler)
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, name="metrics-http", daemon=True).start()
+    return server
+
+
+def _write_loop(path, every):
+    while True:
+        time.sleep(every)
+        try:
+            write(path)
+        except OSError as e:
+            print(f"⚠️ Metrics file {path} not written: {e}")
+
+
+def start(port=None, path=None, every=None):
+    """Turn metrics on and export them as configured (arguments or BOT_METRICS_*). False if left off."""
+    port = port or os.getenv("BOT_METRICS_PORT")
+    path = path or os.getenv("BOT_METRICS_FILE")
+    if not port and not path:
+        return False
+    enable()
+    if port:
+        serve(int(port))
+        print(f"📈 Metrics on http://127.0.0.1:{int(port)}/metrics")
+    if path:
+        every = every or float(os.getenv("BOT_METRICS_EVERY", WRITE_EVERY))
+        threading.Thread(target=_write_loop, args=(path, every), name="metrics-file", daemon=True).start()
+        atexit.register(write, path)  # the last cycles of a run are in the file too
+        print(f"📈 Metrics written to {path} every {every:.0f}s")
+    return True
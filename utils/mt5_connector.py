@@ -1,10 +1,21 @@
-import MetaTrader5 as mt5
+from utils.broker import mt5
 import os
+import threading
 from dotenv import load_dotenv
 
+from utils.metrics import count_call
+
 load_dotenv()
 
+# IPC-level failures (terminal gone / pipe broken): reconnect and retry once
+IPC_ERRORS = {-10001, -10002, -10003, -10004, -10005}
+
+_lock = threading.RLock()
+_connected = False
+
+
 def connect_mt5():
+    global _connected
     login = int(os.getenv("MT5_LOGIN"))
     password = os.getenv("MT5_PASSWORD")
     server = os.getenv("MT5_SERVER")
@@ -18,8 +29,53 @@ def connect_mt5():
         print(f"[❌] login() failed, error code: {mt5.last_error()}")
         return False
 
+    _connected = True
     print("✅ MT5 connection successful")
     return True
 
+
+def ensure_connected():
+    """Reuse the process-wide session; only (re)connect when there is none."""
+    with _lock:
+        if _connected:
+            return True
+        if os.getenv("MT5_LOGIN"):
+            return connect_mt5()
+        # No credentials: attach to the terminal's current login
+        return _initialize_only()
+
+
+def _initialize_only():
+    global _connected
+    if not mt5.initialize():
+        print(f"[❌] initialize() failed, error code: {mt5.last_error()}")
+        return False
+    _connected = True
+    return True
+
+
+def mt5_call(name, *args, **kwargs):
+    """
+    Call `mt5.<name>` on the shared session. A None result caused by an IPC
+    failure triggers one reconnect + retry; other None results are returned as-is.
+    """
+    global _connected
+    count_call(name)
+    with _lock:
+        if not ensure_connected():
+            return None
+        result = getattr(mt5, name)(*args, **kwargs)
+        if result is None and mt5.last_error()[0] in IPC_ERRORS:
+            print(f"⚠️ MT5 {name} failed ({mt5.last_error()}), reconnecting...")
+            _connected = False
+            mt5.shutdown()
+            if ensure_connected():
+                result = getattr(mt5, name)(*args, **kwargs)
+        return result
+
+
 def shutdown_mt5():
-    mt5.shutdown()
+    global _connected
+    with _lock:
+        _connected = False
+        mt5.shutdown()
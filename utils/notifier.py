@@ -1,27 +1,247 @@
 # utils/notifier.py
+"""
+Telegram alerts off the trading path.
+
+`send_alert` only appends to a bounded in-memory queue; a background thread
+posts to the Bot API on one pooled HTTP session. The sender keeps at most
+one message per MIN_INTERVAL per chat; whatever queues up meanwhile goes
+out as one digest (split at Telegram's 4096 character limit). A full queue
+drops its oldest alert (DROP_POLICY="newest" rejects the new one instead);
+the number dropped is noted in the next digest. 429s wait the server's
+retry_after, network errors and 5xx back off exponentially.
+
+TELEGRAM_API points the sender at another server, e.g. the local stand-in
+in sim/telegram_stub.py.
+"""
+import atexit
 import os
-import requests
+import threading
+import time
+from collections import deque
+
 from dotenv import load_dotenv
 
+from utils.metrics import register, timer
+
 load_dotenv()
 
 TELEGRAM_TOKEN = os.getenv("TELEGRAM_TOKEN")
 TELEGRAM_CHAT_ID = os.getenv("TELEGRAM_CHAT_ID")
+TELEGRAM_API = os.getenv("TELEGRAM_API", "https://api.telegram.org")
 
-def send_alert(message: str):
-    if not TELEGRAM_TOKEN or not TELEGRAM_CHAT_ID:
-        print("❌ Telegram credentials not set.")
-        return
+MAX_QUEUE = 1000        # alerts held while the sender is behind
+DROP_POLICY = "oldest"  # or "newest"
+MIN_INTERVAL = 1.0      # seconds between messages to one chat (Telegram: ~1/s per chat)
+MAX_LENGTH = 4096       # Telegram's limit per message
+RETRIES = 5
+BACKOFF = 1.0           # first retry delay, doubled per attempt
+TIMEOUT = (3.05, 10)    # connect, read
+
+
+class Notifier:
+    """Bounded alert queue drained by one background sender thread."""
+
+    def __init__(self, token, api=TELEGRAM_API, max_queue=MAX_QUEUE, drop_policy=DROP_POLICY,
+                 min_interval=MIN_INTERVAL, retries=RETRIES, backoff=BACKOFF, timeout=TIMEOUT):
+        if drop_policy not in ("oldest", "newest"):
+            raise ValueError(f"Unknown drop_policy {drop_policy!r}")
+        self.url = f"{api.rstrip('/')}/bot{token}/sendMessage"
+        self.max_queue = max_queue
+        self.drop_policy = drop_policy
+        self.min_interval = min_interval
+        self.retries = retries
+        self.backoff = backoff
+        self.timeout = timeout
+
+        self._queue = deque()  # (chat_id, text)
+        self._cond = threading.Condition()
+        self._next_send = {}   # chat_id -> earliest monotonic time for its next message
+        self._dropped = {}     # chat_id -> alerts dropped since its last digest
+        self._busy = False
+        self._closed = False
+        self._session = None
+        self.stats = {"queued": 0, "sent": 0, "coalesced": 0, "dropped": 0, "failed": 0, "retries": 0}
+        self._thread = threading.Thread(target=self._run, name="telegram-notifier", daemon=True)
+        self._thread.start()
+
+    # === Trading path: enqueue only ===
+    def send(self, chat_id, text):
+        """Queue `text` for `chat_id`. False if it was dropped (queue full, DROP_POLICY "newest", or closed)."""
+        with self._cond:
+            if self._closed:
+                return False
+            if len(self._queue) >= self.max_queue:
+                if self.drop_policy == "newest":
+                    self._drop(chat_id)
+                    return False
+                self._drop(self._queue.popleft()[0])
+            self._queue.append((chat_id, str(text)))
+            self.stats["queued"] += 1
+            self._cond.notify()
+        return True
+
+    def _drop(self, chat_id):
+        self._dropped[chat_id] = self._dropped.get(chat_id, 0) + 1
+        self.stats["dropped"] += 1
+
+    def samples(self):
+        """Metrics export (utils/metrics.py): alert counts and the queue depth."""
+        out = [("telegram_events_total", "counter", (("event", k),), v) for k, v in self.stats.items()]
+        out.append(("telegram_pending", "gauge", (), self.pending()))
+        return out
+
+    def pending(self):
+        with self._cond:
+            return len(self._queue) + self._busy
+
+    def flush(self, timeout=10.0):
+        """Wait until everything queued has been handed to Telegram (or given up on). True if drained."""
+        deadline = time.monotonic() + timeout
+        with self._cond:
+            while self._queue or self._busy:
+                left = deadline - time.monotonic()
+                if left <= 0:
+                    return False
+                self._cond.wait(min(left, 0.05))
+        return True
 
-    url = f"https://api.telegram.org/bot{TELEGRAM_TOKEN}/sendMessage"
-    payload = {
-        "chat_id": TELEGRAM_CHAT_ID,
-        "text": message
-    }
+    def close(self, timeout=5.0):
+        """Stop accepting alerts, send what is queued (up to `timeout`) and stop the sender."""
+        drained = self.flush(timeout)
+        with self._cond:
+            self._closed = True
+            self._cond.notify_all()
+        self._thread.join(timeout=1.0)
+        return drained
 
+    # === Sender thread ===
+    def _next_batch(self):
+        """Block for the next chat that may be messaged; take all its queued alerts as one digest."""
+        with self._cond:
+            while True:
+                if self._closed and not self._queue:
+                    return None
+                if self._queue:
+                    now = time.monotonic()
+                    ready = {chat for chat, _ in self._queue if self._next_send.get(chat, 0.0) <= now}
+                    if ready:
+                        chat = next(chat for chat, _ in self._queue if chat in ready)
+                        texts = [text for c, text in self._queue if c == chat]
+                        self._queue = deque(item for item in self._queue if item[0] != chat)
+                        dropped = self._dropped.pop(chat, 0)
+                        self._busy = True
+                        return chat, texts, dropped
+                    wait = min(self._next_send[chat] for chat, _ in self._queue) - now
+                    self._cond.wait(max(wait, 0.001))
+                else:
+                    self._cond.wait()
+
+    def _digest(self, texts, dropped):
+        """Messages for one chat: the alerts joined, split at MAX_LENGTH."""
+        if dropped:
+            texts = texts + [f"⚠️ {dropped} alert(s) dropped (queue full)"]
+        messages, current = [], ""
+        for text in texts:
+            while len(text) > MAX_LENGTH:
+                if current:
+                    messages.append(current)
+                    current = ""
+                messages.append(text[:MAX_LENGTH])
+                text = text[MAX_LENGTH:]
+            if current and len(current) + 2 + len(text) > MAX_LENGTH:
+                messages.append(current)
+                current = text
+            else:
+                current = f"{current}\n\n{text}" if current else text
+        if current:
+            messages.append(current)
+        return messages
+
+    def _run(self):
+        while True:
+            batch = self._next_batch()
+            if batch is None:
+                return
+            chat, texts, dropped = batch
+            try:
+                self.stats["coalesced"] += len(texts) - 1
+                for message in self._digest(texts, dropped):
+                    wait = self._next_send.get(chat, 0.0) - time.monotonic()
+                    if wait > 0:
+                        time.sleep(wait)  # later parts of a long digest
+                    self._post(chat, message)
+                    self._next_send[chat] = time.monotonic() + self.min_interval
+            except Exception as e:
+                print(f"❌ Telegram exception: {e}")
+            finally:
+                with self._cond:
+                    self._busy = False
+                    self._cond.notify_all()
+
+    def _post(self, chat, text):
+        """One sendMessage with retry; True once Telegram accepted it."""
+        if self._session is None:
+            import requests  # lazy: only needed once an alert is actually sent
+
+            self._session = requests.Session()
+            self._session.mount("https://", requests.adapters.HTTPAdapter(pool_connections=1, pool_maxsize=2))
+            self._session.mount("http://", requests.adapters.HTTPAdapter(pool_connections=1, pool_maxsize=2))
+
+        delay = self.backoff
+        for attempt in range(self.retries + 1):
+            retry_after = None
+            try:
+                with timer("telegram"):
+                    response = self._session.post(self.url, data={"chat_id": chat, "text": text},
+                                                  timeout=self.timeout)
+                if response.status_code == 200:
+                    self.stats["sent"] += 1
+                    return True
+                if response.status_code == 429:
+                    retry_after = _retry_after(response)
+                elif response.status_code < 500:
+                    print(f"❌ Telegram error: {response.text}")  # bad request / auth: retrying will not help
+                    break
+                error = f"HTTP {response.status_code}"
+            except Exception as e:
+                error = e
+            if attempt == self.retries:
+                print(f"❌ Telegram exception: {error}")
+                break
+            self.stats["retries"] += 1
+            time.sleep(retry_after if retry_after is not None else delay)
+            delay *= 2
+        self.stats["failed"] += 1
+        return False
+
+
+def _retry_after(response):
     try:
-        response = requests.post(url, data=payload)
-        if response.status_code != 200:
-            print(f"❌ Telegram error: {response.text}")
-    except Exception as e:
-        print(f"❌ Telegram exception: {e}")
+        return float(response.json()["parameters"]["retry_after"])
+    except Exception:
+        return MIN_INTERVAL
+
+
+_notifier = None
+_notifier_lock = threading.Lock()
+
+
+def get_notifier():
+    """Process-wide Notifier for TELEGRAM_TOKEN (started on first use, flushed at exit)."""
+    global _notifier
+    if _notifier is None:
+        with _notifier_lock:
+            if _notifier is None:
+                _notifier = Notifier(TELEGRAM_TOKEN)
+                atexit.register(_notifier.close)
+                register(_notifier.samples)
+    return _notifier
+
+
+def send_alert(message: str, chat_id=None):
+    """Queue an alert for Telegram; returns immediately (False if it was dropped)."""
+    chat_id = chat_id or TELEGRAM_CHAT_ID
+    if not TELEGRAM_TOKEN or not chat_id:
+        print("❌ Telegram credentials not set.")
+        return False
+    return get_notifier().send(chat_id, message)
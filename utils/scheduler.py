@@ -0,0 +1,152 @@
+import time
+
+from utils.broker import now, sleep
+from utils.latency import Histogram
+
+TIMEFRAME_SECONDS = {"M1": 60, "M5": 300, "M15": 900, "M30": 1800, "H1": 3600}
+
+
+class BarScheduler:
+    """
+    Runs `on_bar` just after each bar close and `on_exit` on a faster
+    cadence in between, on the broker clock (utils.broker now / sleep).
+
+    Deadlines are absolute (bar close + `settle`, then every `exit_every`
+    seconds), so time spent in a cycle never pushes later cycles back.
+    `on_bar` returns False when the new bar is not there yet; it is retried
+    every `retry` seconds until the next close (a number instead of False:
+    retried after that many seconds). A wake-up more than `late`
+    seconds past its deadline is reported as missed (bar closes slept
+    through are counted as skipped), a callback running past its budget as
+    an overrun. Lateness and durations are kept as histograms (ms).
+    """
+
+    def __init__(self, timeframe="M15", settle=2.0, exit_every=60.0, retry=1.0, late=5.0,
+                 bar_budget=30.0, exit_budget=5.0):
+        self.period = TIMEFRAME_SECONDS[timeframe.upper()]
+        self.settle = settle
+        self.exit_every = exit_every
+        self.retry = retry
+        self.late = late
+        self.budgets = {"bar": bar_budget, "exit": exit_budget}
+        self.stats = {"bar": 0, "exit": 0, "unchanged": 0, "missed": 0, "skipped_bars": 0, "overrun": 0}
+        self.lateness = {"bar": Histogram(), "exit": Histogram()}
+        self.durations = {"bar": Histogram(), "exit": Histogram()}
+        # Nothing is due until start() arms the deadlines
+        self.close = None
+        self.bar_due = self.exit_due = float("inf")
+
+    def next_close(self, t):
+        """First bar close strictly after broker time `t`."""
+        return (int(t) // self.period + 1) * self.period
+
+    def _run(self, kind, fn, deadline):
+        lateness = now() - deadline
+        self.lateness[kind].observe(max(lateness, 0) * 1000)
+        if lateness > self.late:
+            self.stats["missed"] += 1
+            print(f"⏰ Missed {kind} deadline by {lateness:.1f}s")
+
+        start = time.perf_counter()
+        result = fn()
+        elapsed = time.perf_counter() - start
+        self.durations[kind].observe(elapsed * 1000)
+        if elapsed > self.budgets[kind]:
+            self.stats["overrun"] += 1
+            print(f"🐢 {kind} cycle overran its {self.budgets[kind]:.0f}s budget ({elapsed:.1f}s)")
+        return result
+
+    def _retry_delay(self, result):
+        """Seconds until the bar cycle is retried, or None when `result` asks for no retry."""
+        if result is False:
+            return self.retry
+        if isinstance(result, (int, float)) and not isinstance(result, bool):
+            return result
+        return None
+
+    # === Deadlines (also driven one step at a time by execution/runner.py) ===
+    def start(self, t, exits=True):
+        """Arm the deadlines after a first cycle at broker time `t`."""
+        self.close = self.next_close(t)
+        self.bar_due = self.close + self.settle
+        self.exit_due = t + self.exit_every if exits else float("inf")
+
+    def begin(self, on_bar, exits=True):
+        """First cycle right away, as the bot always did on start; then arm the deadlines."""
+        result = self._run("bar", on_bar, now())
+        self.start(now(), exits)
+        delay = self._retry_delay(result)
+        if delay is not None:
+            self.bar_due = min(self.bar_due, now() + delay)
+        return result
+
+    def next_due(self):
+        return min(self.bar_due, self.exit_due)
+
+    def due(self, t):
+        """"bar", "exit" or None at broker time `t` (the bar cycle wins a tie)."""
+        if t >= self.bar_due:
+            return "bar"
+        if t >= self.exit_due:
+            return "exit"
+        return None
+
+    def fire(self, kind, fn):
+        """Run the due `kind` callback and move the deadlines on."""
+        if kind == "exit":
+            result = self._run("exit", fn, self.exit_due)
+            self.stats["exit"] += 1
+            self.exit_due += self.exit_every
+            if self.exit_due <= now():
+                self.exit_due = now() + self.exit_every
+            return result
+
+        skipped = (int(now() - self.settle) - self.close) // self.period
+        if skipped > 0:
+            self.stats["skipped_bars"] += skipped
+            print(f"⏭️ Slept through {skipped} bar close(s)")
+            self.close += skipped * self.period
+        result = self._run("bar", fn, self.bar_due)
+        delay = self._retry_delay(result)
+        if delay is not None:
+            self.stats["unchanged"] += 1
+            retry_at = now() + delay
+            if retry_at < self.next_close(self.close) + self.settle:
+                self.bar_due = retry_at
+                return result
+        else:
+            self.stats["bar"] += 1
+
+        next_close = self.next_close(now() - self.settle)
+        skipped = (next_close - self.close) // self.period - 1
+        if skipped > 0:
+            self.stats["skipped_bars"] += skipped - 1
+            print(f"⏭️ Bar cycle ran past {skipped} bar close(s); catching up on the latest")
+            next_close -= self.period  # its deadline is already past: runs at once, reported as missed
+        self.close = next_close
+        self.bar_due = self.close + self.settle
+        # An exit check right after the bar cycle (which managed positions) is redundant
+        if self.exit_due != float("inf"):
+            self.exit_due = now() + self.exit_every
+        return result
+
+    def run(self, on_bar, on_exit=None):
+        """Loop forever (until a callback or the broker raises)."""
+        self.begin(on_bar, exits=on_exit is not None)
+
+        while True:
+            wait = self.next_due() - now()
+            if wait > 0:
+                sleep(wait)
+            kind = self.due(now())
+            self.fire(kind, on_bar if kind == "bar" else on_exit)
+
+    def report(self):
+        """One line per cadence: counts, lateness and duration percentiles."""
+        lines = [", ".join(f"{k}={v}" for k, v in self.stats.items())]
+        for kind in ("bar", "exit"):
+            if self.durations[kind].count:
+                late, took = self.lateness[kind].summary(), self.durations[kind].summary()
+                lines.append(f"{kind}: late p50/p99 {late['p50_ms']}/{late['p99_ms']} ms, "
+                             f"took p50/p99 {took['p50_ms']:.0f}/{took['p99_ms']:.0f} ms")
+        return "\n".join(lines)
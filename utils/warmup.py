@@ -0,0 +1,40 @@
+import importlib
+import threading
+import time
+
+# Heavy libraries the live loop needs in its first cycles, imported off the main thread
+MODULES = ("scipy.signal", "arch", "hmmlearn.hmm", "requests")
+
+# Models unpickled ahead of the first ML call, and the performance book seeded from
+# the closed-trade journal before the first close ("module:function")
+LOADERS = ("ml.predictor:load_models", "ml.predict_exit_probability:load_model", "analysis.performance:get_book")
+
+timings = {}
+
+
+def warm_up(modules=MODULES, loaders=LOADERS):
+    """Import `modules` and run `loaders`, recording seconds per step in `timings`. Failures are reported, not raised."""
+    for name in modules:
+        start = time.perf_counter()
+        try:
+            importlib.import_module(name)
+        except Exception as e:
+            print(f"⚠️ Warm-up import {name} failed: {e}")
+        timings[name] = time.perf_counter() - start
+
+    for target in loaders:
+        module, func = target.split(":")
+        start = time.perf_counter()
+        try:
+            getattr(importlib.import_module(module), func)()
+        except Exception as e:
+            print(f"⚠️ Warm-up {target} failed: {e}")
+        timings[target] = time.perf_counter() - start
+    return timings
+
+
+def start_warm_up(**kwargs):
+    """Run warm_up in a daemon thread so startup goes straight to connecting and syncing bars."""
+    thread = threading.Thread(target=warm_up, kwargs=kwargs, name="warm-up", daemon=True)
+    thread.start()
+    return thread